@@ -0,0 +1,43 @@
+from typing import Dict
+
+from core.admission import get_pool
+
+
+class AdmissionControlMixin:
+    """
+    Applies admission control (see core.admission) to some of a viewset's actions.
+    Capacity is acquired before the action runs and released once its response
+    is finalized.
+    """
+
+    # Action name -> admission pool name
+    admission_pools: Dict[str, str] = {}
+
+    def get_admission_cost(self, request) -> int:
+        raise NotImplementedError
+
+    def readmit(self, cost: int):
+        """
+        Hold `cost` for the current request instead (see Admission.resize), once
+        it is better known, whether this viewset or the async view admitted it.
+        """
+        admission = self.admission or getattr(self.request, "admission", None)
+        if admission is not None:
+            admission.resize(cost)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.admission = None
+
+        pool_name = self.admission_pools.get(self.action)
+        # The request may already have been admitted, e.g. by AsyncOrderUploadView
+        if pool_name is None or getattr(request, "admission", None) is not None:
+            return
+        pool = get_pool(pool_name)
+        if pool is not None:
+            self.admission = pool.admit(self.get_admission_cost(request))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(self, "admission", None) is not None:
+            self.admission.release()
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,270 @@
+"""
+Async (ASGI) versions of the hot read endpoints.
+
+These views serve GET requests directly on the event loop using Django's async
+ORM, reusing the querysets, filters, serializers and pagination of the matching
+DRF viewsets so that responses are identical. Like DRF views, they negotiate the
+renderer and check permissions and throttles first; those checks, serializing and
+rendering run off the event loop, as they may query the database. Every other
+method is delegated to the regular synchronous viewset.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Type
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+from api.exceptions import error_payload
+from api.serializers import OrderSummarySerializer
+from api.views import JobViewSet, OrderViewSet, ShippingProviderViewSet
+from core.admission import get_pool, upload_cost
+from core.exceptions import ServerBusy
+from core.models import Order
+from core.services.archive_service import ArchiveService
+from core.services.job_service import JobService
+from core.utils import request_content_length
+
+LIST_ACTIONS = {"get": "list", "post": "create"}
+DETAIL_ACTIONS = {
+    "get": "retrieve",
+    "put": "update",
+    "patch": "partial_update",
+    "delete": "destroy",
+}
+
+
+class AsyncViewSetView(View):
+    viewset_class: Type[GenericViewSet]
+    # HTTP method -> viewset action, as passed to ViewSet.as_view()
+    actions: Dict[str, str]
+
+    sync_view = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        initkwargs.setdefault("sync_view", cls.viewset_class.as_view(cls.actions))
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method.lower() in ("get", "head") and "get" in self.actions:
+            return await super().dispatch(request, *args, **kwargs)
+        return await self.delegate(request, *args, **kwargs)
+
+    async def delegate(self, request, *args, **kwargs):
+        """Handle the request with the synchronous viewset."""
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.get_viewset(request, *args, **kwargs)
+        try:
+            # Content negotiation, versioning, permissions and throttling, as in
+            # APIView.dispatch(). Permissions and throttles may query the database.
+            await sync_to_async(viewset.initial)(viewset.request, *args, **kwargs)
+            if self.actions["get"] == "list":
+                data = await self.alist(viewset)
+            else:
+                data = await self.aretrieve(viewset)
+            response = Response(data)
+        except Exception as exc:
+            response = viewset.handle_exception(exc)
+        return await sync_to_async(self.finalize_response)(viewset, response)
+
+    def get_viewset(self, request, *args, **kwargs) -> GenericViewSet:
+        viewset = self.viewset_class(
+            action_map=self.actions, args=args, kwargs=kwargs, format_kwarg=None
+        )
+        viewset.request = viewset.initialize_request(request, *args, **kwargs)
+        viewset.headers = viewset.default_response_headers
+        return viewset
+
+    def finalize_response(self, viewset: GenericViewSet, response) -> HttpResponse:
+        """Render the response with the negotiated renderer, as DRF views do."""
+        response = viewset.finalize_response(viewset.request, response)
+        return response.render()
+
+    def get_queryset(self, viewset: GenericViewSet):
+        return viewset.filter_queryset(viewset.get_queryset())
+
+    async def aserialize(self, viewset: GenericViewSet, instance, **kwargs):
+        """Serialize off the event loop, as serializers may load relations lazily."""
+        return await sync_to_async(
+            lambda: viewset.get_serializer(instance, **kwargs).data
+        )()
+
+    async def aget_object(self, viewset: GenericViewSet):
+        queryset = self.get_queryset(viewset)
+        lookup_url_kwarg = viewset.lookup_url_kwarg or viewset.lookup_field
+        obj = await queryset.filter(
+            **{viewset.lookup_field: viewset.kwargs[lookup_url_kwarg]}
+        ).afirst()
+        if obj is None:
+            raise NotFound(
+                f"No {queryset.model._meta.object_name} matches the given query."
+            )
+        return obj
+
+    async def alist(self, viewset: GenericViewSet):
+        queryset = self.get_queryset(viewset)
+        paginator = viewset.paginator
+        if paginator is None:
+            objects = [obj async for obj in queryset]
+            return await self.aserialize(viewset, objects, many=True)
+
+        page = await paginator.apaginate_queryset(queryset, viewset.request)
+        data = await self.aserialize(viewset, page, many=True)
+        return await paginator.aget_paginated_data(data)
+
+    async def aretrieve(self, viewset: GenericViewSet):
+        obj = await self.aget_object(viewset)
+        return await self.aserialize(viewset, obj)
+
+    def render(self, data, status: int = 200, headers=None) -> HttpResponse:
+        """Render JSON, for responses sent before the viewset is involved."""
+        return HttpResponse(
+            CamelCaseJSONRenderer().render(data),
+            status=status,
+            content_type="application/json",
+            headers=headers,
+        )
+
+
+class AsyncOrderListView(AsyncViewSetView):
+    viewset_class = OrderViewSet
+    actions = LIST_ACTIONS
+
+    async def alist(self, viewset: GenericViewSet):
+        job = await sync_to_async(viewset.get_archived_job)()
+        if job is not None:
+            return await sync_to_async(viewset.list_archived, thread_sensitive=False)(
+                job
+            )
+        return await super().alist(viewset)
+
+
+class AsyncOrderDetailView(AsyncViewSetView):
+    viewset_class = OrderViewSet
+    actions = DETAIL_ACTIONS
+
+    async def aretrieve(self, viewset: GenericViewSet):
+        try:
+            return await super().aretrieve(viewset)
+        except NotFound:
+            # Only the scan of the archive runs outside of the ORM's thread
+            job_ids = await sync_to_async(viewset.get_archived_order_jobs)()
+            order = await sync_to_async(
+                viewset.get_archived_order, thread_sensitive=False
+            )(job_ids)
+            if order is None:
+                raise
+            return await sync_to_async(lambda: OrderSummarySerializer(order).data)()
+
+
+class AsyncShippingProviderListView(AsyncViewSetView):
+    viewset_class = ShippingProviderViewSet
+    actions = {"get": "list"}
+
+
+class AsyncShippingProviderDetailView(AsyncViewSetView):
+    viewset_class = ShippingProviderViewSet
+    actions = {"get": "retrieve"}
+
+
+class AsyncJobDetailView(AsyncViewSetView):
+    viewset_class = JobViewSet
+    actions = {"get": "retrieve"}
+
+    def get_queryset(self, viewset: GenericViewSet):
+        return (
+            super()
+            .get_queryset(viewset)
+            .prefetch_related(
+                Prefetch("orders", queryset=Order.objects.only("id").order_by("id"))
+            )
+        )
+
+    async def aretrieve(self, viewset: GenericViewSet):
+        job = await self.aget_object(viewset)
+        cost = await JobService(job=job).aget_cost()
+        context = {**viewset.get_serializer_context(), "cost": cost}
+        if job.archived_at is not None:
+            context["order_ids"] = await sync_to_async(
+                ArchiveService().get_order_ids, thread_sensitive=False
+            )(job.id)
+        return await self.aserialize(viewset, job, context=context)
+
+
+_upload_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_upload_executor() -> ThreadPoolExecutor:
+    global _upload_executor
+    if _upload_executor is None:
+        _upload_executor = ThreadPoolExecutor(
+            max_workers=settings.UPLOAD_WORKERS, thread_name_prefix="upload"
+        )
+    return _upload_executor
+
+
+class AsyncOrderUploadView(AsyncViewSetView):
+    """
+    Runs CSV uploads on a dedicated thread pool rather than the thread shared by
+    all synchronous ORM calls, so that parsing and validating a large file with
+    Polars never holds up the read endpoints.
+
+    Uploads are admitted (see core.admission) on the event loop before being
+    handed to the pool, so that uploads waiting for capacity don't hold a thread,
+    as if they weren't compressed. The viewset charges compressed uploads more
+    once they are parsed.
+    """
+
+    viewset_class = OrderViewSet
+    actions = {"post": "upload"}
+
+    def run_upload(self, request, *args, **kwargs):
+        request.upload_started = True
+        try:
+            return self.sync_view(request, *args, **kwargs)
+        finally:
+            if request.admission is not None:
+                request.admission.release()
+            # Upload threads outlive the request, so their connections are not
+            # managed by the request_finished signal. Honour CONN_MAX_AGE here.
+            close_old_connections()
+
+    async def delegate(self, request, *args, **kwargs):
+        request.admission = None
+        pool = get_pool("upload")
+        # Without a Content-Length the viewset admits the upload once it is parsed
+        length = request_content_length(request)
+        if pool is not None and length is not None:
+            try:
+                request.admission = await pool.aadmit(upload_cost(length))
+            except ServerBusy as exc:
+                return self.render(
+                    error_payload(exc),
+                    status=exc.status_code,
+                    headers={"Retry-After": str(exc.wait)},
+                )
+
+        try:
+            return await sync_to_async(
+                self.run_upload, thread_sensitive=False, executor=get_upload_executor()
+            )(request, *args, **kwargs)
+        finally:
+            # Normally released by run_upload, unless the request was cancelled
+            # before the upload started
+            if request.admission is not None and not getattr(
+                request, "upload_started", False
+            ):
+                request.admission.release()
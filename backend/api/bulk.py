@@ -0,0 +1,120 @@
+from typing import Type
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from api.serializers import (
+    BulkExportQuerySerializer,
+    BulkImportResponseSerializer,
+    BulkImportSerializer,
+    ErrorResponseSerializer,
+)
+from core.exceptions import AppException, ErrorCode
+from core.services.bulk_service import BulkService
+
+
+class BulkImportExportMixin:
+    """
+    Adds bulk import and streaming export of the user's saved records (those with
+    is_user_created set) to a viewset, through a BulkService.
+    """
+
+    bulk_service_class: Type[BulkService]
+    # Plural name of the records, for messages
+    bulk_records_name: str
+
+    @extend_schema(
+        summary="Bulk import saved records",
+        description=(
+            "Create saved records (with isUserCreated set) from a CSV file (multipart, optionally "
+            "gzip or zstd compressed) or a JSON array of objects, with the columns of the export. "
+            "Every row is validated first, and nothing is saved if any row has errors: the "
+            "response then holds the errors of the first rows, by row number (from 2 in CSV "
+            "files, from 0 in JSON arrays)."
+        ),
+        request={
+            "multipart/form-data": BulkImportSerializer,
+            "application/json": {"type": "array", "items": {"type": "object"}},
+        },
+        responses={
+            status.HTTP_201_CREATED: BulkImportResponseSerializer,
+            status.HTTP_400_BAD_REQUEST: ErrorResponseSerializer,
+        },
+    )
+    @action(detail=False, methods=["post"], url_path="import")
+    def bulk_import(self, request):
+        service = self.bulk_service_class()
+        if request.content_type.startswith("multipart/"):
+            serializer = BulkImportSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            service.read_csv(serializer.validated_data["file"])
+        else:
+            service.read_json(request.data)
+
+        if not service.is_valid:
+            row_errors = {k: v for k, v in service.errors.items() if k != "general"}
+            shown = sorted(row_errors.items())[: settings.UPLOAD_ERRORS_IN_RESPONSE]
+            general = (
+                {"general": service.errors["general"]}
+                if "general" in service.errors
+                else {}
+            )
+            raise AppException(
+                detail=f"Failed to import {self.bulk_records_name}",
+                code=ErrorCode.IMPORT_VALIDATION_ERROR,
+                info={
+                    "errors": {**general, **dict(shown)},
+                    "error_row_count": len(row_errors),
+                    "truncated": len(shown) < len(row_errors),
+                },
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+        created = service.save()
+        return Response(
+            {
+                "message": f"Successfully imported {created} {self.bulk_records_name}.",
+                "created": created,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(
+        summary="Export saved records",
+        description=(
+            "Stream the saved records (with isUserCreated set) matching the filters, as CSV or "
+            "as a JSON array, in the format that the import accepts."
+        ),
+        parameters=[BulkExportQuerySerializer],
+        responses={
+            (status.HTTP_200_OK, "text/csv"): OpenApiTypes.BINARY,
+            (status.HTTP_200_OK, "application/json"): OpenApiTypes.BINARY,
+            status.HTTP_400_BAD_REQUEST: ErrorResponseSerializer,
+        },
+    )
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        serializer = BulkExportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        export_format = serializer.validated_data["export_format"]
+
+        records = (
+            self.filter_queryset(self.get_queryset()).user_created().order_by("id")
+        )
+        service = self.bulk_service_class()
+        if export_format == "json":
+            response = StreamingHttpResponse(
+                service.export_json(records), content_type="application/json"
+            )
+        else:
+            response = StreamingHttpResponse(
+                service.export_csv(records), content_type="text/csv"
+            )
+        filename = f"{self.bulk_records_name}.{export_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
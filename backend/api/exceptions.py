@@ -1,4 +1,5 @@
 from rest_framework import status
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
 from rest_framework.views import exception_handler
 from core.exceptions import AppException, ErrorCode
@@ -12,18 +13,17 @@ def handler(exc, context):
         return None
 
     if isinstance(exc, AppException):
-        return Response(exc.get_full_details(), status=exc.status_code)
+        return Response(
+            exc.get_full_details(),
+            status=exc.status_code,
+            headers=_error_headers(response),
+        )
 
     if response is not None:
         return Response(
-            {
-                "message": response.data.get("detail", "An error occurred."),
-                "code": str(
-                    getattr(exc, "default_code", ErrorCode.SERVER_ERROR)
-                ).upper(),
-                "info": response.data,  # Includes raw response data
-            },
+            _error_payload(response.data, exc),
             status=response.status_code,
+            headers=_error_headers(response),
         )
 
     return Response(
@@ -34,3 +34,35 @@ def handler(exc, context):
         },
         status=status.HTTP_500_INTERNAL_SERVER_ERROR,
     )
+
+
+def _error_headers(response) -> dict:
+    # Headers set by DRF's handler, e.g. Retry-After for throttled requests
+    return {
+        header: response[header]
+        for header in ("Retry-After", "WWW-Authenticate")
+        if response.has_header(header)
+    }
+
+
+def _error_payload(data, exc) -> dict:
+    return {
+        "message": data.get("detail", "An error occurred."),
+        "code": str(getattr(exc, "default_code", ErrorCode.SERVER_ERROR)).upper(),
+        "info": data,  # Includes raw response data
+    }
+
+
+def error_payload(exc: APIException) -> dict:
+    """
+    Build the error response body for an exception raised outside of DRF's own
+    exception handling (e.g. in async views), in the same format as handler().
+    """
+    if isinstance(exc, AppException):
+        return exc.get_full_details()
+
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+    return _error_payload(data, exc)
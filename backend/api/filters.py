@@ -1,5 +1,5 @@
 import django_filters
-from core.models import Order, Package, Address
+from core.models import Order, OrderSummary, Package, Address
 
 
 class OrderFilter(django_filters.FilterSet):
@@ -28,6 +28,34 @@ class OrderFilter(django_filters.FilterSet):
         ]
 
 
+class OrderSummaryFilter(django_filters.FilterSet):
+    """OrderFilter for the order summary read model, with the same parameters."""
+
+    sender_name = django_filters.CharFilter(
+        field_name="sender_first_name", lookup_expr="icontains"
+    )
+    recipient_name = django_filters.CharFilter(
+        field_name="recipient_first_name", lookup_expr="icontains"
+    )
+    from_address = django_filters.CharFilter(
+        field_name="from_address_address", lookup_expr="icontains"
+    )
+    to_address = django_filters.CharFilter(
+        field_name="to_address_address", lookup_expr="icontains"
+    )
+    job = django_filters.NumberFilter(field_name="job", lookup_expr="exact")
+
+    class Meta:
+        model = OrderSummary
+        fields = [
+            "sender_name",
+            "recipient_name",
+            "from_address",
+            "to_address",
+            "job",
+        ]
+
+
 class PackageFilter(django_filters.FilterSet):
     is_user_created = django_filters.BooleanFilter(field_name="is_user_created")
 
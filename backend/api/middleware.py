@@ -0,0 +1,89 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.deprecation import MiddlewareMixin
+from djangorestframework_camel_case.settings import api_settings
+from djangorestframework_camel_case.util import underscoreize
+
+from core.profiling import RequestProfile, install_sql_recorder
+
+
+class CamelCaseMiddleWare(MiddlewareMixin):
+    """
+    Converts camelCase query parameters to snake_case.
+
+    Same behaviour as djangorestframework_camel_case's middleware, but supports
+    both sync and async requests so that async views are not forced onto a thread.
+    """
+
+    def process_request(self, request):
+        request.GET = underscoreize(request.GET, **api_settings.JSON_UNDERSCOREIZE)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests from staff users that ask for it with an `X-Profile: 1`
+    header or a `_profile=1` query parameter (see core.profiling). The profile id
+    is returned in the X-Profile-Id response header.
+
+    The middleware is not loaded at all unless REQUEST_PROFILING_ENABLED is set,
+    and other requests only pay for the header and query parameter lookups.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    HEADER = "X-Profile"
+    QUERY_PARAM = "_profile"
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install_sql_recorder()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        if not self.is_requested(request) or not self.is_allowed(request.user):
+            return self.get_response(request)
+
+        profile = RequestProfile(request)
+        profile.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.stop()
+        return self.finish(profile, response)
+
+    async def __acall__(self, request):
+        if not self.is_requested(request) or not self.is_allowed(await request.auser()):
+            return await self.get_response(request)
+
+        profile = RequestProfile(request)
+        profile.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profile.stop()
+        return await sync_to_async(self.finish)(profile, response)
+
+    def is_requested(self, request) -> bool:
+        flag = request.headers.get(self.HEADER) or request.GET.get(self.QUERY_PARAM)
+        return flag in ("1", "true")
+
+    def is_allowed(self, user) -> bool:
+        return user.is_active and user.is_staff
+
+    def finish(self, profile: RequestProfile, response):
+        profile.save(response.status_code)
+        response["X-Profile-Id"] = profile.id
+        response["Server-Timing"] = (
+            f"total;dur={profile.duration_ms:.1f}, db;dur={profile.sql_time_ms:.1f}"
+        )
+        return response
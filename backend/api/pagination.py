@@ -1,7 +1,55 @@
+from django.core.paginator import AsyncPaginator, InvalidPage
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class StandardPagination(PageNumberPagination):
     page_size = 100
     page_size_query_param = "page_size"
     max_page_size = 1000
+
+    async def apaginate_queryset(self, queryset, request) -> list:
+        """Async counterpart of paginate_queryset(), using Django's async ORM."""
+        self.request = request
+        paginator = AsyncPaginator(queryset, self.get_page_size(request))
+        page_number = request.query_params.get(self.page_query_param) or 1
+        if page_number in self.last_page_strings:
+            page_number = await paginator.anum_pages()
+
+        try:
+            self.page = await paginator.apage(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        return await self.page.aget_object_list()
+
+    async def aget_paginated_data(self, data) -> dict:
+        """Async counterpart of get_paginated_response(), returning the response body."""
+        url = self.request.build_absolute_uri()
+
+        next_link = None
+        if await self.page.ahas_next():
+            next_link = replace_query_param(
+                url, self.page_query_param, await self.page.anext_page_number()
+            )
+
+        previous_link = None
+        if await self.page.ahas_previous():
+            previous_number = await self.page.aprevious_page_number()
+            if previous_number == 1:
+                previous_link = remove_query_param(url, self.page_query_param)
+            else:
+                previous_link = replace_query_param(
+                    url, self.page_query_param, previous_number
+                )
+
+        return {
+            "count": await self.page.paginator.acount(),
+            "next": next_link,
+            "previous": previous_link,
+            "results": data,
+        }
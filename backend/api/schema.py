@@ -0,0 +1,197 @@
+"""
+Serve the OpenAPI schema without regenerating it on every request. Generating it
+introspects every viewset and serializer, so it is done once per code version:
+the document is kept in memory and in SCHEMA_CACHE_DIR, where the build_schema
+management command can write it ahead of time (see entrypoint.sh), and served
+with an ETag so that clients and the docs page can revalidate it cheaply.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+from importlib.metadata import version as package_version
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+# Packages whose source the schema is generated from
+SOURCE_PACKAGES = ("api", "core", "config")
+
+# Installed distributions that change the generated schema
+SCHEMA_DISTRIBUTIONS = ("drf-spectacular", "djangorestframework")
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    """
+    The version of the code, which cached schemas are only valid for:
+    SCHEMA_CODE_VERSION if set (e.g. the commit the image was built from), or
+    else a fingerprint of the project's source files and of the versions of the
+    packages generating the schema. Computed once per process, since changes to
+    the code only take effect once processes restart.
+    """
+    if settings.SCHEMA_CODE_VERSION:
+        return settings.SCHEMA_CODE_VERSION
+
+    digest = hashlib.sha256()
+    for distribution in SCHEMA_DISTRIBUTIONS:
+        digest.update(f"{distribution}=={package_version(distribution)}\n".encode())
+    base_dir = Path(settings.BASE_DIR)
+    for package in SOURCE_PACKAGES:
+        for path in sorted((base_dir / package).rglob("*.py")):
+            stat = path.stat()
+            digest.update(
+                f"{path.relative_to(base_dir)}:{stat.st_mtime_ns}:{stat.st_size}\n".encode()
+            )
+    return digest.hexdigest()[:16]
+
+
+class SchemaCache:
+    """
+    The generated schema of each API version, in memory and on disk, for the
+    current code version. Documents are stored as JSON, and rendered into other
+    formats (e.g. YAML) once per format.
+    """
+
+    # (API version, code version) -> schema
+    _schemas: Dict[Tuple[Optional[str], str], Dict[str, Any]] = {}
+    # (API version, code version, media type) -> (rendered document, ETag)
+    _rendered: Dict[Tuple[Optional[str], str, str], Tuple[bytes, str]] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, directory: Optional[str | Path] = None):
+        self.directory = Path(directory or settings.SCHEMA_CACHE_DIR)
+
+    def path_for(self, api_version: Optional[str]) -> Path:
+        return (
+            self.directory / f"openapi-{api_version or 'default'}-{code_version()}.json"
+        )
+
+    def get(
+        self, api_version: Optional[str], generate: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """The schema of an API version, generated with `generate` if not cached."""
+        key = (api_version, code_version())
+        schema = self._schemas.get(key)
+        if schema is not None:
+            return schema
+
+        with self._lock:
+            if key not in self._schemas:
+                schema = self.read(api_version)
+                if schema is None:
+                    schema = self.write(api_version, generate())
+                self._schemas[key] = schema
+        return self._schemas[key]
+
+    def render(
+        self,
+        api_version: Optional[str],
+        generate: Callable[[], Dict[str, Any]],
+        renderer,
+        media_type: str,
+    ) -> Tuple[bytes, str]:
+        """The schema rendered with a DRF renderer, and its ETag."""
+        key = (api_version, code_version(), media_type)
+        if key not in self._rendered:
+            content = renderer.render(self.get(api_version, generate), media_type)
+            if isinstance(content, str):
+                content = content.encode()
+            etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+            self._rendered[key] = (content, etag)
+        return self._rendered[key]
+
+    def read(self, api_version: Optional[str]) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self.path_for(api_version).read_bytes())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def write(
+        self, api_version: Optional[str], schema: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Store the schema of an API version, replacing the ones of other code
+        versions. Written to a temporary file first, so that processes reading it
+        concurrently never see a partial file. Returns the schema as read back,
+        so that every process renders the same document (and ETag) from it.
+        """
+        path = self.path_for(api_version)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        content = json.dumps(schema, default=str)
+        temporary = path.with_suffix(f".{os.getpid()}.tmp")
+        temporary.write_text(content)
+        os.replace(temporary, path)
+        for stale in self.directory.glob(f"openapi-{api_version or 'default'}-*.json"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+        return json.loads(content)
+
+    @classmethod
+    def clear(cls):
+        """Forget the schemas kept in memory, e.g. after settings change in tests."""
+        with cls._lock:
+            cls._schemas.clear()
+            cls._rendered.clear()
+        code_version.cache_clear()
+
+
+def generate_schema(
+    api_version: Optional[str],
+    generator_class=None,
+    public: Optional[bool] = None,
+    **generator_kwargs,
+) -> Dict[str, Any]:
+    """Generate the schema of an API version, as SpectacularAPIView does."""
+    generator_class = generator_class or spectacular_settings.DEFAULT_GENERATOR_CLASS
+    if public is None:
+        public = spectacular_settings.SERVE_PUBLIC
+    generator = generator_class(api_version=api_version, **generator_kwargs)
+    return generator.get_schema(request=None, public=public)
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    SpectacularAPIView serving the schema from SchemaCache. Responses carry an
+    ETag and must be revalidated, so that repeated requests (e.g. from the docs
+    page) get a 304 Not Modified instead of the whole document.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        api_version = (
+            self.api_version or request.version or self._get_version_parameter(request)
+        )
+        content, etag = SchemaCache().render(
+            api_version,
+            lambda: generate_schema(
+                api_version,
+                generator_class=self.generator_class,
+                public=self.serve_public,
+                urlconf=self.urlconf,
+                patterns=self.patterns,
+            ),
+            request.accepted_renderer,
+            request.accepted_media_type,
+        )
+
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=request.accepted_media_type)
+            response["Content-Disposition"] = (
+                f'inline; filename="{self._get_filename(request, api_version)}"'
+            )
+        response["ETag"] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
@@ -1,9 +1,26 @@
 from rest_framework import serializers
-from core.models import Order, OrderParty, Package, Address, ShippingProvider, Job
+from core.models import (
+    Order,
+    OrderParty,
+    OrderSummary,
+    Package,
+    Address,
+    ShippingProvider,
+    Job,
+    ErrorReport,
+)
 from core.exceptions import ErrorCode
-from core.services.job_service import JobService
+from core.labels import LabelFormat
+from core.services.archive_service import ArchiveService
+from core.services.csv_service import VALID_CSV_HEADERS
+from core.services.facet_service import FacetService
+from core.services.job_service import JobCost, JobService
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
+from djangorestframework_camel_case.util import camel_to_underscore
+
+# Most rows that can be revalidated at once, see CSVRowValidationSerializer
+MAX_VALIDATED_ROWS = 1000
 
 
 class BatchOrderActionSerializer(serializers.Serializer):
@@ -49,6 +66,10 @@ class OrderPartySerializer(serializers.ModelSerializer):
 
 
 class PackageSerializer(serializers.ModelSerializer):
+    billable_weight = serializers.DecimalField(
+        max_digits=12, decimal_places=4, read_only=True
+    )
+
     class Meta:
         model = Package
         fields = (
@@ -57,6 +78,7 @@ class PackageSerializer(serializers.ModelSerializer):
             "width",
             "height",
             "weight",
+            "billable_weight",
             "item_sku",
             "is_user_created",
         )
@@ -65,24 +87,55 @@ class PackageSerializer(serializers.ModelSerializer):
 class ShippingProviderSerializer(serializers.ModelSerializer):
     class Meta:
         model = ShippingProvider
-        fields = ("id", "name", "description", "cost_per_pound")
+        fields = ("id", "name", "description", "cost_per_pound", "rate_table")
 
 
 class JobSerializer(serializers.ModelSerializer):
-    orders = serializers.PrimaryKeyRelatedField(
-        many=True,
-        read_only=True,
-    )
+    orders = serializers.SerializerMethodField()
     total_cost = serializers.SerializerMethodField()
+    # Orders left out of total_cost, as their provider's rate table has no price
+    unpriced_orders = serializers.SerializerMethodField()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Job ID -> JobCost, computed once for both fields
+        self._costs = {}
+
+    @extend_schema_field(serializers.ListField(child=serializers.IntegerField()))
+    def get_orders(self, obj: Job):
+        # Async views read archived order IDs ahead of time, like the cost
+        if "order_ids" in self.context:
+            return self.context["order_ids"]
+        if obj.archived_at is not None:
+            return ArchiveService().get_order_ids(obj.id)
+        return [order.pk for order in obj.orders.all()]
 
     @extend_schema_field(OpenApiTypes.DECIMAL)
     def get_total_cost(self, obj: Job):
-        job_service = JobService(job=obj)
-        return job_service.get_total_cost()
+        return self.get_cost(obj).total
+
+    @extend_schema_field(serializers.ListField(child=serializers.IntegerField()))
+    def get_unpriced_orders(self, obj: Job):
+        return self.get_cost(obj).unpriced_order_ids
+
+    def get_cost(self, obj: Job) -> JobCost:
+        # Async views compute the cost ahead of time, since serializers are sync
+        if "cost" in self.context:
+            return self.context["cost"]
+        if obj.pk not in self._costs:
+            self._costs[obj.pk] = JobService(job=obj).get_cost()
+        return self._costs[obj.pk]
 
     class Meta:
         model = Job
-        fields = ("id", "orders", "created_at", "total_cost")
+        fields = (
+            "id",
+            "orders",
+            "created_at",
+            "archived_at",
+            "total_cost",
+            "unpriced_orders",
+        )
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -108,9 +161,37 @@ class OrderSerializer(serializers.ModelSerializer):
             "created_at",
             "phone_number",
             "phone_number_2",
+            "order_number",
         )
 
 
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for the order summary read model, with the same output
+    as OrderSerializer: the prefixed columns of each related object are nested
+    under the name of the relation.
+    """
+
+    class Meta:
+        model = OrderSummary
+        fields = "__all__"
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        representation = {"id": data.pop("order"), "job": data.pop("job")}
+        for relation in OrderSummary.NESTED:
+            prefix = f"{relation}_"
+            nested = {
+                key.removeprefix(prefix): data.pop(key)
+                for key in list(data)
+                if key.startswith(prefix)
+            }
+            # Only the shipping provider is optional
+            representation[relation] = nested if nested["id"] is not None else None
+        representation.update(data)
+        return representation
+
+
 class OrderUpdateSerializer(serializers.ModelSerializer):
     shipping_provider = serializers.PrimaryKeyRelatedField(
         queryset=ShippingProvider.objects.all()
@@ -129,15 +210,45 @@ class SimpleResponseSerializer(serializers.Serializer):
     info = serializers.JSONField(required=False, allow_null=True)
 
 
+class ProviderAssignmentResponseSerializer(serializers.Serializer):
+    message = serializers.CharField()
+    unpriced_orders = serializers.ListField(child=serializers.IntegerField())
+
+
 class UploadResponseSerializer(serializers.Serializer):
     message = serializers.CharField()
     job = serializers.IntegerField(required=False, allow_null=True)
+    created = serializers.IntegerField(required=False)
+    updated = serializers.IntegerField(required=False)
+    unchanged = serializers.IntegerField(required=False)
 
 
 class TotalCostResponseSerializer(serializers.Serializer):
     total_cost = serializers.DecimalField(max_digits=12, decimal_places=2)
 
 
+class ProviderRateSerializer(serializers.Serializer):
+    shipping_provider = serializers.IntegerField()
+    cost = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class OrderRatesSerializer(serializers.Serializer):
+    order = serializers.IntegerField()
+    cheapest_shipping_provider = serializers.IntegerField(allow_null=True)
+    rates = ProviderRateSerializer(many=True)
+
+
+class ProviderTotalSerializer(serializers.Serializer):
+    shipping_provider = serializers.IntegerField()
+    name = serializers.CharField()
+    total_cost = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class JobRatesResponseSerializer(serializers.Serializer):
+    providers = ProviderTotalSerializer(many=True)
+    orders = OrderRatesSerializer(many=True)
+
+
 class ErrorResponseSerializer(serializers.Serializer):
     message = serializers.CharField()
     code = serializers.ChoiceField(
@@ -149,4 +260,163 @@ class ErrorResponseSerializer(serializers.Serializer):
 
 
 class CSVUploadSerializer(serializers.Serializer):
-    file = serializers.FileField()
+    file = serializers.FileField(
+        help_text="Orders CSV, optionally gzip (.csv.gz) or zstd (.csv.zst) compressed."
+    )
+    job = serializers.PrimaryKeyRelatedField(
+        queryset=Job.objects.all(),
+        required=False,
+        help_text="Update this job instead of creating a new one (see upload).",
+    )
+
+
+class CSVRowSerializer(serializers.Serializer):
+    """One row of an orders CSV, with the columns named as in VALID_CSV_HEADERS."""
+
+    row = serializers.IntegerField(
+        min_value=2, help_text="Row number in the uploaded file, as in its errors."
+    )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for header in VALID_CSV_HEADERS:
+            fields[header] = serializers.CharField(
+                required=False, allow_blank=True, allow_null=True, trim_whitespace=False
+            )
+        return fields
+
+
+class CSVRowValidationSerializer(serializers.Serializer):
+    rows = serializers.ListField(
+        child=CSVRowSerializer(), allow_empty=False, max_length=MAX_VALIDATED_ROWS
+    )
+
+
+class CSVRowValidationResponseSerializer(serializers.Serializer):
+    errors = serializers.DictField(
+        child=serializers.ListField(child=serializers.CharField()),
+        help_text="Errors by row number. Rows without errors are left out.",
+    )
+
+
+class ErrorReportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ErrorReport
+        fields = (
+            "id",
+            "created_at",
+            "file_name",
+            "general_errors",
+            "row_count",
+            "error_count",
+        )
+
+
+class ErrorReportRowSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    errors = serializers.ListField(child=serializers.CharField())
+
+
+class JobLabelsQuerySerializer(serializers.Serializer):
+    label_format = serializers.ChoiceField(choices=LabelFormat, default=LabelFormat.PDF)
+
+
+class OrderFacetsQuerySerializer(serializers.Serializer):
+    facets = serializers.CharField(
+        required=False,
+        help_text=(
+            "Comma-separated facets to count, out of "
+            f"{', '.join(FacetService.FACETS)}. Defaults to all of them."
+        ),
+    )
+
+    def validate_facets(self, value: str) -> list[str]:
+        # Facet names are accepted in camelCase too, as they are returned
+        facets = [camel_to_underscore(name.strip()) for name in value.split(",")]
+        unknown = [name for name in facets if name not in FacetService.FACETS]
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown facet(s): {', '.join(unknown)}."
+            )
+        return facets
+
+    def validate(self, attrs):
+        attrs.setdefault("facets", list(FacetService.FACETS))
+        return attrs
+
+
+class FacetValueSerializer(serializers.Serializer):
+    value = serializers.CharField(allow_null=True)
+    label = serializers.CharField(allow_null=True)
+    count = serializers.IntegerField()
+
+
+class OrderFacetsResponseSerializer(serializers.Serializer):
+    facets = serializers.DictField(
+        child=FacetValueSerializer(many=True),
+        help_text="The values of each requested facet, most common first.",
+    )
+
+
+class JobCloneSerializer(serializers.Serializer):
+    share_addresses = serializers.BooleanField(
+        default=False,
+        help_text="Point the copied orders at the original addresses instead of copies.",
+    )
+    share_parties = serializers.BooleanField(
+        default=False,
+        help_text="Point the copied orders at the original senders and recipients instead of copies.",
+    )
+    share_packages = serializers.BooleanField(
+        default=False,
+        help_text="Point the copied orders at the original packages instead of copies.",
+    )
+
+
+class OrderChangesQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        help_text=(
+            "Sequence number (the `next` of a previous response) to return the changes "
+            "after. Without it, no changes are returned, only the current sequence number."
+        ),
+    )
+    job = serializers.IntegerField(
+        required=False, help_text="Only return the changes of this job's orders."
+    )
+    include_orders = serializers.BooleanField(
+        default=False, help_text="Also return the created and updated orders."
+    )
+
+
+class OrderChangesResponseSerializer(serializers.Serializer):
+    next = serializers.IntegerField(
+        help_text="Sequence number to pass as `since` to fetch the next changes."
+    )
+    has_more = serializers.BooleanField(
+        help_text="Whether there are more changes to fetch right away."
+    )
+    created = serializers.ListField(child=serializers.IntegerField())
+    updated = serializers.ListField(child=serializers.IntegerField())
+    deleted = serializers.ListField(child=serializers.IntegerField())
+    orders = OrderSerializer(
+        many=True,
+        required=False,
+        help_text="The created and updated orders, with `includeOrders`.",
+    )
+
+
+class BulkImportSerializer(serializers.Serializer):
+    file = serializers.FileField(
+        help_text="CSV with a header row, optionally gzip (.csv.gz) or zstd (.csv.zst) compressed."
+    )
+
+
+class BulkImportResponseSerializer(serializers.Serializer):
+    message = serializers.CharField()
+    created = serializers.IntegerField()
+
+
+class BulkExportQuerySerializer(serializers.Serializer):
+    export_format = serializers.ChoiceField(choices=["csv", "json"], default="csv")
@@ -1,12 +1,22 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularSwaggerView
+from api.schema import CachedSpectacularAPIView
 from api.views import (
     OrderViewSet,
     AddressViewSet,
     ShippingProviderViewSet,
     PackageViewSet,
     JobViewSet,
+    ErrorReportViewSet,
+)
+from api.async_views import (
+    AsyncOrderListView,
+    AsyncOrderDetailView,
+    AsyncOrderUploadView,
+    AsyncShippingProviderListView,
+    AsyncShippingProviderDetailView,
+    AsyncJobDetailView,
 )
 
 app_name = "api"
@@ -19,11 +29,20 @@ router.register(
     r"shipping-providers", ShippingProviderViewSet, basename="shipping-providers"
 )
 router.register(r"jobs", JobViewSet, basename="jobs")
+router.register(r"error-reports", ErrorReportViewSet, basename="error-reports")
 
 
 urlpatterns = [
-    path("schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("schema/", CachedSpectacularAPIView.as_view(), name="schema"),
     path("docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
+    # Async versions of the hot endpoints, which take precedence over the router's
+    # synchronous routes. Methods they do not serve natively fall back to the viewset.
+    path("orders/", AsyncOrderListView.as_view()),
+    path("orders/upload/", AsyncOrderUploadView.as_view()),
+    path("orders/<int:pk>/", AsyncOrderDetailView.as_view()),
+    path("shipping-providers/", AsyncShippingProviderListView.as_view()),
+    path("shipping-providers/<int:pk>/", AsyncShippingProviderDetailView.as_view()),
+    path("jobs/<int:pk>/", AsyncJobDetailView.as_view()),
 ]
 
 urlpatterns += router.urls
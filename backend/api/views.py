@@ -1,12 +1,30 @@
+from dataclasses import asdict
+from typing import List, Optional
+
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin, UpdateModelMixin
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.filters import SearchFilter
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema_view, extend_schema
-from core.models import Order, OrderParty, Address, Package, ShippingProvider, Job
+from core.models import (
+    Order,
+    OrderParty,
+    OrderSummary,
+    Address,
+    Package,
+    ShippingProvider,
+    Job,
+    ErrorReport,
+    UploadClaim,
+)
 from api.serializers import (
     OrderSerializer,
+    OrderSummarySerializer,
     OrderUpdateSerializer,
     AddressSerializer,
     ShippingProviderSerializer,
@@ -17,26 +35,62 @@ from api.serializers import (
     BatchOrderUpdatePackageSerializer,
     BatchOrderUpdateShippingProviderSerializer,
     SimpleResponseSerializer,
+    ProviderAssignmentResponseSerializer,
     ErrorResponseSerializer,
     CSVUploadSerializer,
+    CSVRowValidationSerializer,
+    CSVRowValidationResponseSerializer,
     UploadResponseSerializer,
     JobSerializer,
+    JobRatesResponseSerializer,
+    JobLabelsQuerySerializer,
+    JobCloneSerializer,
+    ErrorReportSerializer,
+    ErrorReportRowSerializer,
+    OrderFacetsQuerySerializer,
+    OrderFacetsResponseSerializer,
+    OrderChangesQuerySerializer,
+    OrderChangesResponseSerializer,
 )
-from api.filters import OrderFilter, PackageFilter, AddressFilter
+from api.admission import AdmissionControlMixin
+from api.bulk import BulkImportExportMixin
+from api.filters import OrderFilter, OrderSummaryFilter, PackageFilter, AddressFilter
+from core.admission import upload_cost
+from core.services.archive_service import ArchiveService
+from core.services.bulk_service import AddressBulkService, PackageBulkService
+from core.services.change_service import (
+    ChangesExpired,
+    OrderChanges,
+    OrderChangeService,
+)
+from core.services.clone_service import JobCloneService
 from core.services.csv_service import CSVService
+from core.services.error_report_service import ErrorReportService
+from core.services.facet_service import FacetService
+from core.services.job_service import JobService
+from core.services.label_service import LabelService
+from core.compression import Compression, detect_compression
 from core.exceptions import AppException, ErrorCode
+from core.utils import file_sha256, request_content_length
+
+# OrderViewSet actions that read from the order summary read model
+SUMMARY_ACTIONS = ("list", "facets")
 
 
-class AddressViewSet(ModelViewSet):
+class AddressViewSet(BulkImportExportMixin, ModelViewSet):
     queryset = Address.objects.all()
     serializer_class = AddressSerializer
     filterset_class = AddressFilter
+    bulk_service_class = AddressBulkService
+    bulk_records_name = "addresses"
 
 
-class PackageViewSet(ModelViewSet):
+class PackageViewSet(BulkImportExportMixin, ModelViewSet):
     queryset = Package.objects.all()
     serializer_class = PackageSerializer
     filterset_class = PackageFilter
+    bulk_service_class = PackageBulkService
+    bulk_records_name = "packages"
 
 
 class OrderPartyViewSet(GenericViewSet, RetrieveModelMixin, UpdateModelMixin):
@@ -45,17 +99,19 @@ class OrderPartyViewSet(GenericViewSet, RetrieveModelMixin, UpdateModelMixin):
 
 
 class ShippingProviderViewSet(GenericViewSet, ListModelMixin, RetrieveModelMixin):
-    queryset = ShippingProvider.objects.all()
+    queryset = ShippingProvider.objects.all().order_by("id")
     serializer_class = ShippingProviderSerializer
 
 
 @extend_schema_view(
+    list=extend_schema(responses=OrderSerializer(many=True)),
     batch_delete=extend_schema(
         summary="Batch delete orders",
         description="Delete multiple orders by providing a list of order IDs.",
         request=BatchOrderActionSerializer,
         responses={
             status.HTTP_200_OK: SimpleResponseSerializer,
+            status.HTTP_429_TOO_MANY_REQUESTS: ErrorResponseSerializer,
             status.HTTP_500_INTERNAL_SERVER_ERROR: ErrorResponseSerializer,
         },
     ),
@@ -65,6 +121,7 @@ class ShippingProviderViewSet(GenericViewSet, ListModelMixin, RetrieveModelMixin
         request=BatchOrderUpdateAddressSerializer,
         responses={
             status.HTTP_200_OK: SimpleResponseSerializer,
+            status.HTTP_429_TOO_MANY_REQUESTS: ErrorResponseSerializer,
             status.HTTP_500_INTERNAL_SERVER_ERROR: ErrorResponseSerializer,
         },
     ),
@@ -74,6 +131,7 @@ class ShippingProviderViewSet(GenericViewSet, ListModelMixin, RetrieveModelMixin
         request=BatchOrderUpdatePackageSerializer,
         responses={
             status.HTTP_200_OK: SimpleResponseSerializer,
+            status.HTTP_429_TOO_MANY_REQUESTS: ErrorResponseSerializer,
             status.HTTP_500_INTERNAL_SERVER_ERROR: ErrorResponseSerializer,
         },
     ),
@@ -83,12 +141,71 @@ class ShippingProviderViewSet(GenericViewSet, ListModelMixin, RetrieveModelMixin
         request=BatchOrderUpdateShippingProviderSerializer,
         responses={
             status.HTTP_200_OK: SimpleResponseSerializer,
+            status.HTTP_429_TOO_MANY_REQUESTS: ErrorResponseSerializer,
             status.HTTP_500_INTERNAL_SERVER_ERROR: ErrorResponseSerializer,
         },
     ),
+    validate_rows=extend_schema(
+        summary="Revalidate rows of a CSV upload",
+        description=(
+            "Validate rows of an upload that failed validation, after they were edited, with the "
+            "same row-level checks as an uploaded file. Only the given rows are checked, so the "
+            "size of the original file doesn't matter. Nothing is saved."
+        ),
+        request=CSVRowValidationSerializer,
+        responses={
+            status.HTTP_200_OK: CSVRowValidationResponseSerializer,
+            status.HTTP_400_BAD_REQUEST: ErrorResponseSerializer,
+        },
+    ),
+    facets=extend_schema(
+        summary="Count orders by facet",
+        description=(
+            "Count the orders matching the same filters and search as the orders list by "
+            "destination state, shipping provider, job and weight bucket (billable weight in "
+            "pounds), for the orders dashboard. Results are cached until orders change. "
+            "Archived jobs are not counted."
+        ),
+        filters=True,
+        parameters=[OrderFacetsQuerySerializer],
+        responses={
+            status.HTTP_200_OK: OrderFacetsResponseSerializer,
+            status.HTTP_400_BAD_REQUEST: ErrorResponseSerializer,
+        },
+    ),
+    changes=extend_schema(
+        summary="List order changes",
+        description=(
+            "The IDs of the orders created, updated and deleted since a sequence number, so that "
+            "clients can stay in sync with small incremental fetches instead of refetching whole "
+            "pages. Pass the `next` of each response as `since` to the next request, and fetch "
+            "again right away while `hasMore` is true. Imports, batch actions, single updates, "
+            "deletes and archiving are all recorded; an order changed several times is reported "
+            "once. Changes are kept for a limited time: when some of the changes since `since` "
+            "are no longer kept, the request fails with 410 and the orders should be refetched."
+        ),
+        parameters=[OrderChangesQuerySerializer],
+        responses={
+            status.HTTP_200_OK: OrderChangesResponseSerializer,
+            status.HTTP_400_BAD_REQUEST: ErrorResponseSerializer,
+            status.HTTP_410_GONE: ErrorResponseSerializer,
+        },
+    ),
     upload=extend_schema(
         summary="Upload orders from CSV",
-        description="Upload a CSV file to create multiple orders. The file will be validated before processing.",
+        description=(
+            "Upload a CSV file to create multiple orders. The file will be validated before processing. "
+            "If it isn't valid, the response holds the errors of its first rows, the number of rows "
+            "with errors and the ID of an error report with all of them (see /error-reports/). "
+            "Repeating an upload (same file contents, or the same Idempotency-Key header) within the "
+            "configured window returns the existing job instead of creating a new one, or 409 while "
+            "the first upload is still being processed. "
+            "With a job, the file updates that job instead: every row needs a unique order_number, "
+            "rows matching an order of the job replace it if they changed, other rows are added, and "
+            "orders that aren't in the file are kept. "
+            "When the server is busy with other uploads, the request is rejected with 429 "
+            "and a Retry-After header."
+        ),
         request={
             "multipart/form-data": {
                 "type": "object",
@@ -96,18 +213,22 @@ class ShippingProviderViewSet(GenericViewSet, ListModelMixin, RetrieveModelMixin
                     "file": {
                         "type": "string",
                         "format": "binary",
-                    }
+                    },
+                    "job": {"type": "integer"},
                 },
                 "required": ["file"],
             }
         },
         responses={
+            status.HTTP_200_OK: UploadResponseSerializer,
             status.HTTP_201_CREATED: UploadResponseSerializer,
             status.HTTP_400_BAD_REQUEST: ErrorResponseSerializer,
+            status.HTTP_409_CONFLICT: ErrorResponseSerializer,
+            status.HTTP_429_TOO_MANY_REQUESTS: ErrorResponseSerializer,
         },
     ),
 )
-class OrderViewSet(ModelViewSet):
+class OrderViewSet(AdmissionControlMixin, ModelViewSet):
     queryset = (
         Order.objects.all()
         .order_by("id")
@@ -121,18 +242,134 @@ class OrderViewSet(ModelViewSet):
         )
     )
     serializer_class = OrderSerializer
-    filterset_class = OrderFilter
-    search_fields = [
-        "id",
-        "to_address__name",
-        "from_address__name",
-        "sender__first_name",
-        "sender__last_name",
-        "recipient__first_name",
-        "recipient__last_name",
-    ]
+    admission_pools = {
+        "upload": "upload",
+        "batch_delete": "batch",
+        "batch_update_address": "batch",
+        "batch_update_package": "batch",
+        "batch_update_shipping_provider": "batch",
+    }
+
+    # The list and facets are read from the order summary read model (see
+    # OrderSummary), so their filters and search fields refer to its columns.
+    @property
+    def filterset_class(self):
+        # The schema is generated from OrderFilter, which has the same parameters
+        if self.action in SUMMARY_ACTIONS and not getattr(
+            self, "swagger_fake_view", False
+        ):
+            return OrderSummaryFilter
+        return OrderFilter
+
+    @property
+    def search_fields(self):
+        if self.action in SUMMARY_ACTIONS:
+            return [
+                "order__id",
+                "to_address_name",
+                "from_address_name",
+                "sender_first_name",
+                "sender_last_name",
+                "recipient_first_name",
+                "recipient_last_name",
+            ]
+        return [
+            "id",
+            "to_address__name",
+            "from_address__name",
+            "sender__first_name",
+            "sender__last_name",
+            "recipient__first_name",
+            "recipient__last_name",
+        ]
+
+    def get_queryset(self):
+        if self.action in SUMMARY_ACTIONS:
+            return OrderSummary.objects.order_by("order")
+        return super().get_queryset()
+
+    def list(self, request, *args, **kwargs):
+        job = self.get_archived_job()
+        if job is not None:
+            return Response(self.list_archived(job))
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            order = self.get_archived_order()
+            if order is None:
+                raise
+            return Response(OrderSummarySerializer(order).data)
+
+    def get_archived_job(self) -> Optional[Job]:
+        """The archived job that the list is filtered by, if any."""
+        job_id = self.request.query_params.get("job", "")
+        # Checking for the archive file first saves a query for active jobs
+        if not job_id.isdigit() or not ArchiveService().path_for(job_id).exists():
+            return None
+        return Job.objects.filter(id=job_id, archived_at__isnull=False).first()
+
+    def list_archived(self, job: Job) -> dict:
+        """
+        A page of the orders list for an archived job, read from its Parquet file
+        with the same filters, search and pagination as the orders table.
+        """
+        params = self.request.query_params
+        contains = {
+            filter.field_name: params[name]
+            for name, filter in OrderSummaryFilter.base_filters.items()
+            if filter.lookup_expr == "icontains" and params.get(name)
+        }
+        orders = ArchiveService().find_orders(
+            job.id,
+            contains=contains,
+            search_terms=SearchFilter().get_search_terms(self.request),
+            # Archive columns are named like OrderSummary's attributes
+            search_columns=[field.replace("__", "_") for field in self.search_fields],
+        )
+        page = self.paginate_queryset(orders)
+        data = self.get_serializer(page, many=True).data
+        return self.get_paginated_response(data).data
+
+    def get_archived_order_id(self) -> Optional[int]:
+        lookup = str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field))
+        return int(lookup) if lookup.isdigit() else None
+
+    def get_archived_order_jobs(self) -> List[int]:
+        """The archived jobs that may hold the order, read from the database."""
+        order_id = self.get_archived_order_id()
+        if order_id is None:
+            return []
+        return ArchiveService().jobs_holding(order_id)
+
+    def get_archived_order(
+        self, job_ids: Optional[List[int]] = None
+    ) -> Optional[OrderSummary]:
+        order_id = self.get_archived_order_id()
+        if order_id is None:
+            return None
+        return ArchiveService().get_order(order_id, job_ids)
+
+    def get_admission_cost(self, request) -> int:
+        if self.action == "upload":
+            length = request_content_length(request)
+            if length is None:
+                return sum(
+                    self.get_upload_cost(file) for file in request.FILES.values()
+                )
+            # As if it weren't compressed, until the upload is parsed (see upload())
+            return upload_cost(length)
+        order_ids = request.data.get("order_ids")
+        return len(order_ids) if isinstance(order_ids, list) else 0
+
+    def get_upload_cost(self, file) -> int:
+        return upload_cost(file.size, detect_compression(file) != Compression.NONE)
 
     def get_serializer_class(self):
+        if self.action == "list":
+            return OrderSummarySerializer
         if self.action == "batch_update_address":
             return BatchOrderUpdateAddressSerializer
         if self.action in ["update", "partial_update"]:
@@ -145,6 +382,8 @@ class OrderViewSet(ModelViewSet):
             return BatchOrderActionSerializer
         elif self.action == "upload":
             return CSVUploadSerializer
+        elif self.action == "validate_rows":
+            return CSVRowValidationSerializer
         return super().get_serializer_class()
 
     @action(detail=False, methods=["post"], url_path="batch-delete")
@@ -215,41 +454,369 @@ class OrderViewSet(ModelViewSet):
             }
         )
 
+    @action(detail=False, methods=["post"], url_path="validate-rows")
+    def validate_rows(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        rows = {row.pop("row"): row for row in serializer.validated_data["rows"]}
+        csv_service = CSVService.from_rows(rows)
+
+        return Response({"errors": csv_service.errors})
+
+    @action(detail=False, methods=["get"], url_path="facets")
+    def facets(self, request):
+        serializer = OrderFacetsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        orders = self.filter_queryset(self.get_queryset())
+        # Cached per filter and search parameters
+        params = sorted(
+            (key, request.query_params.getlist(key))
+            for key in request.query_params
+            if key != "facets"
+        )
+        facets = FacetService(orders).get_facets(
+            serializer.validated_data["facets"], cache_key=params
+        )
+        return Response({"facets": facets})
+
+    @action(detail=False, methods=["get"], url_path="changes")
+    def changes(self, request):
+        serializer = OrderChangesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        service = OrderChangeService(job_id=params.get("job"))
+        if "since" not in params:
+            changes = OrderChanges(next=service.latest())
+        else:
+            try:
+                changes = service.get_changes(params["since"])
+            except ChangesExpired:
+                raise AppException(
+                    detail="Some of the changes since this point are no longer kept. Refetch the orders.",
+                    code=ErrorCode.CHANGES_EXPIRED,
+                    status_code=status.HTTP_410_GONE,
+                )
+
+        data = asdict(changes)
+        if params["include_orders"]:
+            orders = OrderSummary.objects.filter(
+                order__in=changes.created + changes.updated
+            ).order_by("order")
+            data["orders"] = OrderSummarySerializer(orders, many=True).data
+        return Response(data)
+
     @action(detail=False, methods=["post"], url_path="upload")
     def upload(self, request):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         csv_file = serializer.validated_data["file"]
+        self.readmit(self.get_upload_cost(csv_file))
+        if "job" in serializer.validated_data:
+            return self.upsert(csv_file, serializer.validated_data["job"])
+
+        content_hash = file_sha256(csv_file)
+        idempotency_key = request.headers.get("Idempotency-Key", "").strip()
+
+        claim = None
+        if settings.UPLOAD_IDEMPOTENCY_WINDOW > 0:
+            key = (
+                f"key:{idempotency_key}"
+                if idempotency_key
+                else f"sha256:{content_hash}"
+            )
+            claim, created = UploadClaim.objects.claim(
+                key, window=settings.UPLOAD_IDEMPOTENCY_WINDOW
+            )
+            if not created and claim.job_id is not None:
+                return Response(
+                    {
+                        "message": f"Upload already processed as job {claim.job_id}.",
+                        "job": claim.job_id,
+                    },
+                    status=status.HTTP_200_OK,
+                )
+            if not created:
+                raise AppException(
+                    detail="The same upload is still being processed; retry later.",
+                    code=ErrorCode.UPLOAD_IN_PROGRESS,
+                    status_code=status.HTTP_409_CONFLICT,
+                )
+
+        try:
+            orders = self.import_file(csv_file, content_hash, idempotency_key)
+        except BaseException:
+            if claim is not None:
+                claim.delete()
+            raise
+
+        if claim is not None and orders:
+            # Not save(), as the claim may have expired in the meantime
+            UploadClaim.objects.filter(pk=claim.pk).update(job=orders[0].job)
+        elif claim is not None:
+            claim.delete()  # Nothing to return to a repeated upload
+
+        return Response(
+            {
+                "message": f"Successfully uploaded {len(orders)} order(s).",
+                "job": orders[0].job.id if orders else None,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def import_file(
+        self, csv_file, content_hash: str, idempotency_key: str
+    ) -> List[Order]:
+        """Create a new job from an uploaded file."""
         csv_service = CSVService(csv_file)
 
         if not csv_service.is_valid:
             raise AppException(
                 detail="Failed to process CSV file",
                 code=ErrorCode.CSV_VALIDATION_ERROR,
-                info={"errors": csv_service.errors},
+                info=ErrorReportService().summarize(csv_service.errors, csv_file),
                 status_code=status.HTTP_400_BAD_REQUEST,
             )
 
-        orders = csv_service.create_orders()
+        orders = csv_service.create_orders(
+            content_hash=content_hash, idempotency_key=idempotency_key
+        )
 
         if not csv_service.is_valid:
             raise AppException(
                 detail="Failed to create orders from CSV",
                 code=ErrorCode.CSV_VALIDATION_ERROR,
-                info={"errors": csv_service.errors},
+                info=ErrorReportService().summarize(csv_service.errors, csv_file),
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        return orders
+
+    def upsert(self, csv_file, job: Job) -> Response:
+        """Update an existing job from an uploaded file, by order number."""
+        if job.archived_at is not None:
+            raise AppException(
+                detail=f"Job {job.id} is archived and can only be viewed.",
+                code=ErrorCode.JOB_ARCHIVED,
+                status_code=status.HTTP_409_CONFLICT,
+            )
+
+        csv_service = CSVService(csv_file)
+        result = csv_service.upsert_orders(job) if csv_service.is_valid else None
+
+        if not csv_service.is_valid:
+            raise AppException(
+                detail="Failed to update orders from CSV",
+                code=ErrorCode.CSV_VALIDATION_ERROR,
+                info=ErrorReportService().summarize(csv_service.errors, csv_file),
                 status_code=status.HTTP_400_BAD_REQUEST,
             )
 
         return Response(
             {
-                "message": f"Successfully uploaded {len(orders)} order(s).",
-                "job": orders[0].job.id if orders else None,
+                "message": (
+                    f"Updated job {job.id}: {len(result.created)} order(s) created, "
+                    f"{len(result.updated)} updated, {result.unchanged} unchanged."
+                ),
+                "job": job.id,
+                "created": len(result.created),
+                "updated": len(result.updated),
+                "unchanged": result.unchanged,
             },
-            status=status.HTTP_201_CREATED,
+            status=status.HTTP_200_OK,
         )
 
 
+@extend_schema_view(
+    rates=extend_schema(
+        summary="Compare shipping provider rates for a job",
+        description="Compute the cost of every order in the job under every shipping provider, along with per-provider totals.",
+        responses={
+            status.HTTP_200_OK: JobRatesResponseSerializer,
+            status.HTTP_404_NOT_FOUND: ErrorResponseSerializer,
+            status.HTTP_409_CONFLICT: ErrorResponseSerializer,
+        },
+    ),
+    assign_cheapest_providers=extend_schema(
+        summary="Assign the cheapest shipping provider to each order",
+        description=(
+            "Set every order in the job to the shipping provider with the lowest cost for that order. "
+            "Orders that no provider has a price for keep their provider and are listed in unpricedOrders."
+        ),
+        request=None,
+        responses={
+            status.HTTP_200_OK: ProviderAssignmentResponseSerializer,
+            status.HTTP_404_NOT_FOUND: ErrorResponseSerializer,
+            status.HTTP_409_CONFLICT: ErrorResponseSerializer,
+        },
+    ),
+    labels=extend_schema(
+        summary="Download shipping labels for a job",
+        description=(
+            "Render a shipping label for every order in the job. PDF labels are merged into "
+            "a single document; ZPL labels are returned as a zip archive with one file per order. "
+            "The response is streamed as labels are rendered."
+        ),
+        parameters=[JobLabelsQuerySerializer],
+        responses={
+            (status.HTTP_200_OK, "application/pdf"): OpenApiTypes.BINARY,
+            (status.HTTP_200_OK, "application/zip"): OpenApiTypes.BINARY,
+            status.HTTP_400_BAD_REQUEST: ErrorResponseSerializer,
+            status.HTTP_404_NOT_FOUND: ErrorResponseSerializer,
+            status.HTTP_409_CONFLICT: ErrorResponseSerializer,
+        },
+    ),
+    clone=extend_schema(
+        summary="Clone a job",
+        description=(
+            "Create a new job with a copy of every order of the job, to ship the same batch again "
+            "without uploading it again. The copy runs entirely in the database, in one "
+            "transaction. The orders' addresses, senders and recipients, and packages are copied "
+            "too, unless they are shared with the original orders; saved addresses and packages "
+            "are always shared."
+        ),
+        request=JobCloneSerializer,
+        responses={
+            status.HTTP_201_CREATED: JobSerializer,
+            status.HTTP_404_NOT_FOUND: ErrorResponseSerializer,
+            status.HTTP_409_CONFLICT: ErrorResponseSerializer,
+        },
+    ),
+)
 class JobViewSet(GenericViewSet, RetrieveModelMixin):
     queryset = Job.objects.all()
     serializer_class = JobSerializer
+
+    def get_active_job(self) -> Job:
+        """The job, for actions that archived jobs don't support."""
+        job = self.get_object()
+        if job.archived_at is not None:
+            raise AppException(
+                detail=f"Job {job.id} is archived and can only be viewed.",
+                code=ErrorCode.JOB_ARCHIVED,
+                status_code=status.HTTP_409_CONFLICT,
+            )
+        return job
+
+    @action(detail=True, methods=["get"], url_path="rates")
+    def rates(self, request, pk=None):
+        job_service = JobService(job=self.get_active_job())
+        matrix = job_service.get_rate_matrix()
+        totals = job_service.get_provider_totals(matrix)
+        cheapest = dict(
+            job_service.get_cheapest_providers(matrix)
+            .select("order_id", "provider_id")
+            .iter_rows()
+        )
+        provider_names = dict(ShippingProvider.objects.values_list("id", "name"))
+
+        # The matrix is sorted by order, so rates can be grouped in a single pass
+        orders = {}
+        for order_id, provider_id, cost in matrix.iter_rows():
+            if order_id not in orders:
+                orders[order_id] = {
+                    "order": order_id,
+                    "cheapest_shipping_provider": cheapest.get(order_id),
+                    "rates": [],
+                }
+            orders[order_id]["rates"].append(
+                {"shipping_provider": provider_id, "cost": f"{cost:.2f}"}
+            )
+
+        return Response(
+            {
+                "providers": [
+                    {
+                        "shipping_provider": provider_id,
+                        "name": provider_names.get(provider_id, ""),
+                        "total_cost": f"{total_cost:.2f}",
+                    }
+                    for provider_id, total_cost in totals.iter_rows()
+                ],
+                "orders": list(orders.values()),
+            }
+        )
+
+    @action(detail=True, methods=["get"], url_path="labels")
+    def labels(self, request, pk=None):
+        serializer = JobLabelsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        label_service = LabelService(
+            job=self.get_active_job(),
+            label_format=serializer.validated_data["label_format"],
+        )
+        response = StreamingHttpResponse(
+            label_service.stream(), content_type=label_service.content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{label_service.filename}"'
+        )
+        return response
+
+    @action(detail=True, methods=["post"], url_path="clone")
+    def clone(self, request, pk=None):
+        serializer = JobCloneSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        job = JobCloneService(
+            job=self.get_active_job(), **serializer.validated_data
+        ).clone()
+
+        return Response(JobSerializer(job).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["post"], url_path="assign-cheapest-providers")
+    def assign_cheapest_providers(self, request, pk=None):
+        job_service = JobService(job=self.get_active_job())
+        assignment = job_service.assign_cheapest_providers()
+
+        return Response(
+            {
+                "message": f"Successfully assigned the cheapest shipping provider to {assignment.updated} order(s).",
+                "unpriced_orders": assignment.unpriced_order_ids,
+            }
+        )
+
+
+@extend_schema_view(
+    retrieve=extend_schema(
+        summary="Get an upload error report",
+        description="Totals and general errors of an upload that failed validation.",
+    ),
+    rows=extend_schema(
+        summary="List the errors of an upload",
+        description="The errors of each row of an upload that failed validation, by row number.",
+        responses=ErrorReportRowSerializer(many=True),
+    ),
+    annotated=extend_schema(
+        summary="Download an upload annotated with its errors",
+        description=(
+            "The uploaded CSV (decompressed) with an extra `errors` column holding the errors "
+            "of each row, so that it can be fixed and uploaded again."
+        ),
+        responses={(status.HTTP_200_OK, "text/csv"): OpenApiTypes.BINARY},
+    ),
+)
+class ErrorReportViewSet(RetrieveModelMixin, GenericViewSet):
+    queryset = ErrorReport.objects.all()
+    serializer_class = ErrorReportSerializer
+
+    @action(detail=True, methods=["get"])
+    def rows(self, request, pk=None):
+        report = self.get_object()
+        page = self.paginate_queryset(ErrorReportService().rows(report))
+        serializer = ErrorReportRowSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["get"])
+    def annotated(self, request, pk=None):
+        report = self.get_object()
+        response = StreamingHttpResponse(
+            ErrorReportService().annotated(report), content_type="text/csv"
+        )
+        # orders.csv.gz -> orders-errors.csv, as the download is decompressed
+        filename = f"{report.file_name.split('.')[0] or 'upload'}-errors.csv"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
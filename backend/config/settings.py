@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -38,6 +39,7 @@ CORS_ALLOWED_ORIGINS = config(
     "CORS_ALLOWED_ORIGINS", cast=lambda v: [s.strip() for s in v.split(",")]
 )
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key", "x-profile")
 
 # Application definition
 
@@ -65,11 +67,12 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "api.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # Third-party
     "corsheaders.middleware.CorsMiddleware",
-    "djangorestframework_camel_case.middleware.CamelCaseMiddleWare",
+    "api.middleware.CamelCaseMiddleWare",
 ]
 
 
@@ -91,17 +94,58 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
 
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# DB_ENGINE selects the database: "sqlite" (default) or "postgres". PostgreSQL
+# enables the COPY-based fast path for CSV imports.
+DB_ENGINE = config("DB_ENGINE", default="sqlite")
+
+# SQLite is tuned for concurrent readers and writers: WAL lets reads proceed while
+# an import is writing, and IMMEDIATE transactions take the write lock up front so
+# that concurrent writers wait on the busy timeout instead of failing with
+# "database is locked" when upgrading a read transaction.
+SQLITE_MMAP_SIZE = config("SQLITE_MMAP_SIZE", default=256 * 1024 * 1024, cast=int)
+SQLITE_CACHE_SIZE_KB = config("SQLITE_CACHE_SIZE_KB", default=64 * 1024, cast=int)
+
+if DB_ENGINE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": config("POSTGRES_DB", default="labelstack"),
+            "USER": config("POSTGRES_USER", default="labelstack"),
+            "PASSWORD": config("POSTGRES_PASSWORD", default=""),
+            "HOST": config("POSTGRES_HOST", default="localhost"),
+            "PORT": config("POSTGRES_PORT", default="5432"),
+            "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=600, cast=int),
+            "CONN_HEALTH_CHECKS": True,
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": config("SQLITE_PATH", default=str(BASE_DIR / "db.sqlite3")),
+            "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=600, cast=int),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "timeout": config("SQLITE_BUSY_TIMEOUT", default=20, cast=int),
+                "transaction_mode": "IMMEDIATE",
+                "init_command": ";".join(
+                    [
+                        "PRAGMA journal_mode=WAL",
+                        "PRAGMA synchronous=NORMAL",
+                        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+                        f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+                        "PRAGMA temp_store=MEMORY",
+                    ]
+                ),
+            },
+        }
     }
-}
 
 
 # Password validation
@@ -176,3 +220,142 @@ SPECTACULAR_SETTINGS = {
 }
 
 PHONENUMBER_DEFAULT_REGION = "US"
+
+# Uploads of the same file (or with the same Idempotency-Key header) within this
+# many seconds return the existing job instead of creating a new one, or 409 while
+# the first one is still being processed (see core.models.UploadClaim). 0 disables.
+UPLOAD_IDEMPOTENCY_WINDOW = config("UPLOAD_IDEMPOTENCY_WINDOW", default=600, cast=int)
+
+# Limits for gzip and zstd compressed uploads, which are decompressed on the fly.
+# Uploads that inflate beyond either limit are rejected as decompression bombs.
+UPLOAD_MAX_DECOMPRESSED_SIZE = config(
+    "UPLOAD_MAX_DECOMPRESSED_SIZE", default=1024 * 1024 * 1024, cast=int
+)
+UPLOAD_MAX_COMPRESSION_RATIO = config(
+    "UPLOAD_MAX_COMPRESSION_RATIO", default=100, cast=int
+)
+
+# Maximum number of CSV uploads processed at once by an ASGI worker. Uploads run on
+# their own thread pool so that they never hold up the async read endpoints.
+UPLOAD_WORKERS = config("UPLOAD_WORKERS", default=2, cast=int)
+
+# Shipping label rendering. Labels are rendered in chunks of LABEL_RENDER_CHUNK_SIZE
+# across LABEL_RENDER_WORKERS processes (0 uses one per CPU).
+LABEL_RENDER_WORKERS = config("LABEL_RENDER_WORKERS", default=0, cast=int)
+LABEL_RENDER_CHUNK_SIZE = config("LABEL_RENDER_CHUNK_SIZE", default=200, cast=int)
+LABEL_CACHE_TIMEOUT = config("LABEL_CACHE_TIMEOUT", default=60 * 60 * 24, cast=int)
+
+# Rendered labels are cached in LABEL_CACHE_DIR, on disk so that every worker
+# process shares them, up to LABEL_CACHE_MAX_ENTRIES labels. Other caches are
+# local to each process.
+LABEL_CACHE_DIR = config("LABEL_CACHE_DIR", default=str(BASE_DIR / "label_cache"))
+LABEL_CACHE_MAX_ENTRIES = config("LABEL_CACHE_MAX_ENTRIES", default=50_000, cast=int)
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "labels": {
+        "BACKEND": "core.cache.SharedFileCache",
+        "LOCATION": LABEL_CACHE_DIR,
+        "TIMEOUT": LABEL_CACHE_TIMEOUT,
+        "OPTIONS": {"MAX_ENTRIES": LABEL_CACHE_MAX_ENTRIES},
+    },
+}
+
+# Stream CSV imports into PostgreSQL with COPY instead of batched INSERTs. Has no
+# effect on other databases.
+ORDER_IMPORT_USE_COPY = config("ORDER_IMPORT_USE_COPY", default=True, cast=bool)
+
+# On-demand request profiling for staff users (see api.middleware.ProfilingMiddleware).
+# Profiles are written to REQUEST_PROFILING_DIR and stacks are sampled every
+# REQUEST_PROFILING_INTERVAL_MS milliseconds.
+REQUEST_PROFILING_ENABLED = config(
+    "REQUEST_PROFILING_ENABLED", default=False, cast=bool
+)
+REQUEST_PROFILING_DIR = config(
+    "REQUEST_PROFILING_DIR", default=str(BASE_DIR / "profiles")
+)
+REQUEST_PROFILING_INTERVAL_MS = config(
+    "REQUEST_PROFILING_INTERVAL_MS", default=1.0, cast=float
+)
+
+# Admission control for uploads and batch actions (see core.admission). Each worker
+# process admits uploads while the uploaded bytes in flight fit
+# ADMISSION_UPLOAD_BUDGET_BYTES, and batch actions while the orders they touch fit
+# ADMISSION_BATCH_BUDGET_ORDERS (0 disables either). Requests that don't fit wait
+# up to ADMISSION_QUEUE_TIMEOUT seconds, with at most ADMISSION_MAX_QUEUED waiting,
+# and are otherwise rejected with 429 and a Retry-After of ADMISSION_RETRY_AFTER.
+# Compressed uploads count as the size they may inflate to, and every upload as at
+# least ADMISSION_UPLOAD_MIN_BYTES, so that at most budget / minimum uploads (4 by
+# default) are processed at once, leaving the other worker threads to reads.
+ADMISSION_UPLOAD_BUDGET_BYTES = config(
+    "ADMISSION_UPLOAD_BUDGET_BYTES", default=64 * 1024 * 1024, cast=int
+)
+ADMISSION_UPLOAD_MIN_BYTES = config(
+    "ADMISSION_UPLOAD_MIN_BYTES", default=16 * 1024 * 1024, cast=int
+)
+ADMISSION_BATCH_BUDGET_ORDERS = config(
+    "ADMISSION_BATCH_BUDGET_ORDERS", default=20000, cast=int
+)
+ADMISSION_QUEUE_TIMEOUT = config("ADMISSION_QUEUE_TIMEOUT", default=5.0, cast=float)
+ADMISSION_MAX_QUEUED = config("ADMISSION_MAX_QUEUED", default=4, cast=int)
+ADMISSION_RETRY_AFTER = config("ADMISSION_RETRY_AFTER", default=5, cast=int)
+
+# Jobs archived with the archive_jobs management command are moved out of the
+# order tables into one Parquet file per job in ORDER_ARCHIVE_DIR, compressed with
+# ORDER_ARCHIVE_COMPRESSION (zstd, lz4, snappy, gzip or uncompressed).
+ORDER_ARCHIVE_DIR = config("ORDER_ARCHIVE_DIR", default=str(BASE_DIR / "archive"))
+ORDER_ARCHIVE_COMPRESSION = config("ORDER_ARCHIVE_COMPRESSION", default="zstd")
+
+# Reject uploaded rows whose from or to ZIP code does not belong to its state,
+# according to the ZIP prefix table bundled in core/data/zip_prefixes.csv. Off
+# by default, as it rejects files that were accepted before.
+CSV_VALIDATE_ZIP_STATE = config("CSV_VALIDATE_ZIP_STATE", default=False, cast=bool)
+
+# Uploads that fail validation return the errors of their first
+# UPLOAD_ERRORS_IN_RESPONSE rows. All errors are stored as an error report in
+# UPLOAD_ERROR_REPORT_DIR, along with a copy of the upload, and kept for
+# UPLOAD_ERROR_REPORT_RETENTION seconds.
+UPLOAD_ERRORS_IN_RESPONSE = config("UPLOAD_ERRORS_IN_RESPONSE", default=20, cast=int)
+UPLOAD_ERROR_REPORT_DIR = config(
+    "UPLOAD_ERROR_REPORT_DIR", default=str(BASE_DIR / "error_reports")
+)
+UPLOAD_ERROR_REPORT_RETENTION = config(
+    "UPLOAD_ERROR_REPORT_RETENTION", default=7 * 24 * 60 * 60, cast=int
+)
+
+# Order facets (counts for the orders dashboard) are cached for
+# FACET_CACHE_TIMEOUT seconds, or until the orders change.
+FACET_CACHE_TIMEOUT = config("FACET_CACHE_TIMEOUT", default=5 * 60, cast=int)
+
+# Shipping providers with a rate table are priced by zone and weight break from
+# the table's files in RATE_TABLE_DIR (see core/rate_tables.py) instead of by
+# cost_per_pound.
+RATE_TABLE_DIR = config(
+    "RATE_TABLE_DIR", default=str(BASE_DIR / "core" / "data" / "rate_tables")
+)
+
+# Bulk imports of saved addresses and packages accept at most
+# BULK_IMPORT_MAX_ROWS rows, inserted BULK_IMPORT_BATCH_SIZE rows per statement.
+BULK_IMPORT_MAX_ROWS = config("BULK_IMPORT_MAX_ROWS", default=100_000, cast=int)
+BULK_IMPORT_BATCH_SIZE = config("BULK_IMPORT_BATCH_SIZE", default=1000, cast=int)
+
+# Creates, updates and deletes of orders are recorded in a change feed, so that
+# clients can fetch what changed since they last looked. Entries are kept for
+# ORDER_CHANGE_RETENTION seconds, and at most ORDER_CHANGES_PAGE_SIZE are read
+# per request. Each process deletes the expired entries at most once every
+# ORDER_CHANGE_PRUNE_INTERVAL seconds, when it records changes (see also the
+# prune_order_changes management command).
+ORDER_CHANGE_RETENTION = config(
+    "ORDER_CHANGE_RETENTION", default=7 * 24 * 60 * 60, cast=int
+)
+ORDER_CHANGE_PRUNE_INTERVAL = config(
+    "ORDER_CHANGE_PRUNE_INTERVAL", default=60 * 60, cast=int
+)
+ORDER_CHANGES_PAGE_SIZE = config("ORDER_CHANGES_PAGE_SIZE", default=1000, cast=int)
+
+# The OpenAPI schema is generated once per code version and kept in memory and in
+# SCHEMA_CACHE_DIR (see api/schema.py). SCHEMA_CODE_VERSION identifies the code,
+# e.g. the commit an image was built from; by default, the modification times
+# of the project's source files are used.
+SCHEMA_CACHE_DIR = config("SCHEMA_CACHE_DIR", default=str(BASE_DIR / "schema_cache"))
+SCHEMA_CODE_VERSION = config("SCHEMA_CODE_VERSION", default="")
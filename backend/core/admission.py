@@ -0,0 +1,197 @@
+"""
+Admission control for expensive write requests.
+
+Each worker process admits CSV uploads and batch actions while the total cost of
+the work in flight fits a budget: uploaded bytes for uploads, and orders touched
+for batch actions. A request that does not fit waits up to
+ADMISSION_QUEUE_TIMEOUT seconds for capacity, and is rejected with 429 Too Many
+Requests (and a Retry-After header) after that, or straight away if
+ADMISSION_MAX_QUEUED requests are already waiting.
+
+Bounding both the work in flight and the number of waiting requests keeps
+uploads from occupying every worker thread, so read requests can still be
+served while a burst of uploads is being processed. To that end uploads are
+charged at least ADMISSION_UPLOAD_MIN_BYTES each, which caps how many run at
+once however small they are, and compressed uploads are charged the most they
+may inflate to (see upload_cost()).
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from core.exceptions import ServerBusy
+
+# Pool name -> setting holding its budget
+POOL_BUDGETS = {
+    "upload": "ADMISSION_UPLOAD_BUDGET_BYTES",
+    "batch": "ADMISSION_BATCH_BUDGET_ORDERS",
+}
+
+
+class Admission:
+    """Capacity held by an admitted request, until it is released."""
+
+    def __init__(self, pool: "AdmissionPool", cost: int):
+        self.pool = pool
+        self.cost = cost
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.pool.release(self.cost)
+
+    def resize(self, cost: int):
+        """
+        Hold `cost` instead, once the cost of the request is better known, e.g.
+        after parsing it. Extra capacity is waited for like a new request, without
+        holding the current capacity meanwhile so that requests waiting for each
+        other's capacity can't deadlock. Raises ServerBusy, releasing the
+        admission.
+        """
+        if self.released or cost == self.cost:
+            return
+        if cost < self.cost:
+            self.pool.release(self.cost - cost)
+            self.cost = cost
+            return
+        self.release()
+        self.pool._acquire(cost)
+        self.cost = cost
+        self.released = False
+
+
+class AdmissionPool:
+    """A budget shared by the requests of one kind within a worker process."""
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(
+        self,
+        name: str,
+        budget: int,
+        max_queued: int,
+        timeout: float,
+        retry_after: int,
+    ):
+        self.name = name
+        self.budget = budget
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.queued = 0
+        self._condition = threading.Condition()
+
+    def _fits(self, cost: int) -> bool:
+        # A request larger than the whole budget is admitted on its own, as it
+        # could never run otherwise.
+        return self.in_flight == 0 or self.in_flight + cost <= self.budget
+
+    def _busy(self) -> ServerBusy:
+        return ServerBusy(retry_after=self.retry_after)
+
+    def try_acquire(self, cost: int) -> Optional[Admission]:
+        """Admit the request if it fits the budget right now."""
+        with self._condition:
+            if not self._fits(cost):
+                return None
+            self.in_flight += cost
+        return Admission(self, cost)
+
+    def admit(self, cost: int) -> Admission:
+        """Admit the request, waiting for capacity if needed. Raises ServerBusy."""
+        self._acquire(cost)
+        return Admission(self, cost)
+
+    def _acquire(self, cost: int):
+        with self._condition:
+            if not self._fits(cost):
+                if self.queued >= self.max_queued:
+                    raise self._busy()
+                self.queued += 1
+                try:
+                    admitted = self._condition.wait_for(
+                        lambda: self._fits(cost), self.timeout
+                    )
+                finally:
+                    self.queued -= 1
+                if not admitted:
+                    raise self._busy()
+            self.in_flight += cost
+
+    async def aadmit(self, cost: int) -> Admission:
+        """Like admit(), but waits without blocking the event loop."""
+        admission = self.try_acquire(cost)
+        if admission is not None:
+            return admission
+
+        with self._condition:
+            if self.queued >= self.max_queued:
+                raise self._busy()
+            self.queued += 1
+        try:
+            deadline = time.monotonic() + self.timeout
+            while (remaining := deadline - time.monotonic()) > 0:
+                await asyncio.sleep(min(self.POLL_INTERVAL, remaining))
+                admission = self.try_acquire(cost)
+                if admission is not None:
+                    return admission
+            raise self._busy()
+        finally:
+            with self._condition:
+                self.queued -= 1
+
+    def release(self, cost: int):
+        with self._condition:
+            self.in_flight -= cost
+            self._condition.notify_all()
+
+
+def upload_cost(size: int, compressed: bool = False) -> int:
+    """
+    The admission cost of an upload of `size` bytes: compressed uploads are
+    charged the size they may inflate to within UPLOAD_MAX_COMPRESSION_RATIO and
+    UPLOAD_MAX_DECOMPRESSED_SIZE, and every upload at least
+    ADMISSION_UPLOAD_MIN_BYTES.
+    """
+    if compressed:
+        size = min(
+            size * settings.UPLOAD_MAX_COMPRESSION_RATIO,
+            settings.UPLOAD_MAX_DECOMPRESSED_SIZE,
+        )
+    return max(size, settings.ADMISSION_UPLOAD_MIN_BYTES)
+
+
+_pools: Dict[str, AdmissionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str) -> Optional[AdmissionPool]:
+    """The admission pool with the given name, or None if its budget is disabled."""
+    budget = getattr(settings, POOL_BUDGETS[name])
+    if budget <= 0:
+        return None
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = AdmissionPool(
+                name,
+                budget=budget,
+                max_queued=settings.ADMISSION_MAX_QUEUED,
+                timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+                retry_after=settings.ADMISSION_RETRY_AFTER,
+            )
+        return _pools[name]
+
+
+@receiver(setting_changed)
+def _reset_pools(setting, **kwargs):
+    if setting.startswith("ADMISSION_"):
+        with _pools_lock:
+            _pools.clear()
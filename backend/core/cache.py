@@ -0,0 +1,25 @@
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class SharedFileCache(FileBasedCache):
+    """
+    A FileBasedCache, shared by every process of the host, that makes room for
+    new entries once per set_many() call rather than once per key, since doing
+    so lists every file of the cache.
+    """
+
+    _batched = False
+
+    def _cull(self):
+        if not self._batched:
+            super()._cull()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._cull()
+        # Cache instances are per thread (see django.core.cache.caches)
+        self._batched = True
+        try:
+            return super().set_many(data, timeout=timeout, version=version)
+        finally:
+            self._batched = False
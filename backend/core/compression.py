@@ -0,0 +1,150 @@
+"""
+Transparent decompression of uploaded files.
+
+Compressed uploads are detected by their magic bytes and inflated chunk by chunk
+into a temporary file, so that the decompressed contents are never held in
+memory all at once. Limits on the decompressed size and on the compression ratio
+guard against decompression bombs.
+"""
+
+import gzip
+import tempfile
+from contextlib import contextmanager
+from enum import StrEnum
+from typing import IO, Iterator
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+CHUNK_SIZE = 1024 * 1024
+ZSTD_INPUT_SIZE = 256
+
+# Small inputs can have huge compression ratios (e.g. a column of blank cells), so
+# the ratio limit only applies once this much data has been decompressed.
+RATIO_CHECK_THRESHOLD = 16 * 1024 * 1024
+
+
+class Compression(StrEnum):
+    NONE = "none"
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+
+class DecompressionError(ValueError):
+    """Raised when a compressed upload is corrupt or exceeds the limits."""
+
+
+def detect_compression(file: IO[bytes]) -> Compression:
+    """Detect the compression of a file from its magic bytes."""
+    file.seek(0)
+    header = file.read(len(ZSTD_MAGIC))
+    file.seek(0)
+
+    if header.startswith(GZIP_MAGIC):
+        return Compression.GZIP
+    if header.startswith(ZSTD_MAGIC):
+        return Compression.ZSTD
+    return Compression.NONE
+
+
+def _gzip_chunks(file: IO[bytes]) -> Iterator[bytes]:
+    with gzip.GzipFile(fileobj=file, mode="rb") as reader:
+        while chunk := reader.read(CHUNK_SIZE):
+            yield chunk
+
+
+def _zstd_chunks(file: IO[bytes]) -> Iterator[bytes]:
+    # A single zstd block of a few bytes can expand to 128 KiB, so the input is
+    # fed in small pieces to bound the output of each decompress() call. Frames
+    # are decompressed one at a time so that a truncated last frame is detected.
+    import zstandard
+
+    decompressor = zstandard.ZstdDecompressor()
+    frame = decompressor.decompressobj()
+    in_frame = False
+    while data := file.read(ZSTD_INPUT_SIZE):
+        while data:
+            in_frame = True
+            try:
+                chunk = frame.decompress(data)
+            except zstandard.ZstdError as e:
+                raise OSError(f"Invalid zstd data: {e}") from e
+            if chunk:
+                yield chunk
+            data = b""
+            if frame.eof:
+                data = frame.unused_data
+                frame = decompressor.decompressobj()
+                in_frame = False
+    if in_frame:
+        raise EOFError("Compressed file ended before the end-of-frame marker")
+
+
+def inflate(
+    file: IO[bytes],
+    compression: Compression,
+    output: IO[bytes],
+    max_size: int,
+    max_ratio: int,
+) -> int:
+    """
+    Decompress a file into output, one chunk at a time.
+
+    Args:
+        file: The compressed file, positioned at the start
+        compression: The compression format of the file
+        output: Writable file that receives the decompressed bytes
+        max_size: Maximum number of decompressed bytes
+        max_ratio: Maximum ratio of decompressed to compressed bytes
+
+    Returns:
+        The number of decompressed bytes written
+
+    Raises:
+        DecompressionError: If the file is corrupt or a limit is exceeded
+    """
+    written = 0
+    try:
+        chunks = (
+            _gzip_chunks(file)
+            if compression == Compression.GZIP
+            else _zstd_chunks(file)
+        )
+        for chunk in chunks:
+            written += len(chunk)
+            if written > max_size:
+                raise DecompressionError(
+                    f"The decompressed file exceeds the maximum size of "
+                    f"{max_size} bytes."
+                )
+            # Bytes read from the compressed file so far. The gzip reader buffers
+            # ahead, so this overestimates and errs on the side of allowing.
+            consumed = max(file.tell(), 1)
+            if written > RATIO_CHECK_THRESHOLD and written > consumed * max_ratio:
+                raise DecompressionError(
+                    f"The file's compression ratio exceeds the maximum of "
+                    f"{max_ratio}:1."
+                )
+            output.write(chunk)
+    except (OSError, EOFError) as e:
+        raise DecompressionError(
+            f"The {compression} file is corrupt or truncated."
+        ) from e
+    return written
+
+
+@contextmanager
+def decompressed(file: IO[bytes], max_size: int, max_ratio: int) -> Iterator[IO[bytes]]:
+    """
+    Yield a readable file with the decompressed contents of a gzip or zstd
+    compressed file. Uncompressed files are yielded as they are.
+    """
+    compression = detect_compression(file)
+    if compression == Compression.NONE:
+        yield file
+        return
+
+    with tempfile.TemporaryFile() as output:
+        inflate(file, compression, output, max_size=max_size, max_ratio=max_ratio)
+        output.seek(0)
+        yield output
@@ -8,6 +8,11 @@ from rest_framework.exceptions import APIException
 class ErrorCode(StrEnum):
     SERVER_ERROR = "SERVER_ERROR"
     CSV_VALIDATION_ERROR = "CSV_VALIDATION_ERROR"
+    SERVER_BUSY = "SERVER_BUSY"
+    JOB_ARCHIVED = "JOB_ARCHIVED"
+    IMPORT_VALIDATION_ERROR = "IMPORT_VALIDATION_ERROR"
+    CHANGES_EXPIRED = "CHANGES_EXPIRED"
+    UPLOAD_IN_PROGRESS = "UPLOAD_IN_PROGRESS"
 
 
 class AppException(APIException):
@@ -40,3 +45,19 @@ class AppException(APIException):
 
     def __str__(self):
         return self.message
+
+
+class ServerBusy(AppException):
+    """
+    Raised when the server has no capacity for a request right now. The client
+    should retry after `retry_after` seconds, which is sent as a Retry-After header.
+    """
+
+    detail = "The server is busy. Please try again shortly."
+    code = ErrorCode.SERVER_BUSY
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+
+    def __init__(self, retry_after: int, detail: Optional[str] = None):
+        # DRF's exception handler sends `wait` as the Retry-After header
+        self.wait = retry_after
+        super().__init__(detail=detail, info={"retry_after": retry_after})
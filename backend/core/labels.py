@@ -0,0 +1,282 @@
+"""
+Shipping label renderers.
+
+This module deliberately has no Django imports so that its functions can be
+executed inside process pool workers without configuring Django first. Labels
+are described by plain dicts (see LabelService.LABEL_FIELDS for the keys).
+"""
+
+import hashlib
+import json
+import zipfile
+import zlib
+from enum import StrEnum
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+# Bump whenever the rendered output changes so that cached labels are invalidated
+LABEL_RENDERER_VERSION = 1
+
+# 4x6 inch thermal label, in PDF points (1/72 inch)
+PDF_PAGE_WIDTH = 288
+PDF_PAGE_HEIGHT = 432
+
+
+class LabelFormat(StrEnum):
+    PDF = "pdf"
+    ZPL = "zpl"
+
+
+def label_content_hash(label: Dict[str, Any], label_format: LabelFormat) -> str:
+    """Hash of everything that affects a rendered label."""
+    payload = json.dumps(
+        [LABEL_RENDERER_VERSION, str(label_format), label],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _address_lines(label: Dict[str, Any], prefix: str) -> List[str]:
+    lines = [
+        label[f"{prefix}_name"],
+        label[f"{prefix}_street"],
+        label[f"{prefix}_street_2"],
+        f"{label[f'{prefix}_city']}, {label[f'{prefix}_state']} {label[f'{prefix}_zip_code']}",
+    ]
+    return [line for line in lines if line]
+
+
+def _package_line(label: Dict[str, Any]) -> str:
+    lbs, oz = divmod(label["weight"], 16)
+    return (
+        f"{lbs} lb {oz} oz - "
+        f"{label['length']} x {label['width']} x {label['height']} in"
+    )
+
+
+def _pdf_text(value: str) -> bytes:
+    escaped = value.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"(" + escaped.encode("latin-1", errors="replace") + b")"
+
+
+def render_pdf_page(label: Dict[str, Any]) -> bytes:
+    """Render a label as a compressed PDF page content stream."""
+
+    def text_block(x: int, y: int, size: int, lines: List[str]) -> bytes:
+        body = b" T* ".join(_pdf_text(line) + b" Tj" for line in lines)
+        return b"BT /F1 %d Tf %d TL %d %d Td %s ET\n" % (
+            size,
+            size + 3,
+            x,
+            y,
+            body,
+        )
+
+    content = b"".join(
+        [
+            text_block(18, 405, 8, ["FROM:", *_address_lines(label, "from")]),
+            b"18 330 m 270 330 l S\n",
+            text_block(18, 305, 10, ["SHIP TO:"]),
+            text_block(36, 285, 14, _address_lines(label, "to")),
+            b"18 190 m 270 190 l S\n",
+            text_block(
+                18,
+                170,
+                9,
+                [
+                    f"Order #{label['order_id']}",
+                    _package_line(label),
+                    f"Carrier: {label['carrier'] or 'Unassigned'}",
+                    f"Phone: {label['phone_number']}",
+                    f"SKU: {label['item_sku']}" if label["item_sku"] else "",
+                ],
+            ),
+        ]
+    )
+    return zlib.compress(content)
+
+
+def _zpl_text(value: str) -> str:
+    # ^ and ~ are ZPL command prefixes and cannot appear in field data
+    return value.replace("^", " ").replace("~", " ")
+
+
+def render_zpl(label: Dict[str, Any]) -> bytes:
+    """Render a label as a ZPL II document for 4x6 inch thermal printers."""
+    commands = ["^XA", "^CI28"]
+    y = 40
+
+    def field(text: str, size: int, x: int = 40):
+        nonlocal y
+        commands.append(f"^CF0,{size}^FO{x},{y}^FD{_zpl_text(text)}^FS")
+        y += size + 8
+
+    field("FROM:", 22)
+    for line in _address_lines(label, "from"):
+        field(line, 22)
+    y += 20
+    commands.append(f"^FO30,{y}^GB752,3,3^FS")
+    y += 30
+    field("SHIP TO:", 28)
+    for line in _address_lines(label, "to"):
+        field(line, 40, x=70)
+    y += 20
+    commands.append(f"^FO30,{y}^GB752,3,3^FS")
+    y += 30
+    field(f"Order #{label['order_id']}", 26)
+    field(_package_line(label), 26)
+    field(f"Carrier: {label['carrier'] or 'Unassigned'}", 26)
+    field(f"Phone: {label['phone_number']}", 26)
+    if label["item_sku"]:
+        field(f"SKU: {label['item_sku']}", 26)
+    commands.append("^XZ")
+
+    return ("\n".join(commands) + "\n").encode("utf-8")
+
+
+RENDERERS = {
+    LabelFormat.PDF: render_pdf_page,
+    LabelFormat.ZPL: render_zpl,
+}
+
+
+def render_chunk(
+    label_format: LabelFormat, labels: List[Dict[str, Any]]
+) -> List[bytes]:
+    """Render a chunk of labels. Used as the process pool work unit."""
+    renderer = RENDERERS[label_format]
+    return [renderer(label) for label in labels]
+
+
+class PDFStreamWriter:
+    """
+    Writes a multi-page PDF incrementally, so that pages can be sent to the client
+    as soon as they are rendered. The page tree is written last, since its page
+    count is only known once every page has been added.
+    """
+
+    CATALOG_ID = 1
+    PAGES_ID = 2
+    FONT_ID = 3
+
+    def __init__(self):
+        self._offset = 0
+        self._offsets: Dict[int, int] = {}
+        self._page_ids: List[int] = []
+        self._next_id = self.FONT_ID + 1
+
+    def _write(self, data: bytes) -> bytes:
+        self._offset += len(data)
+        return data
+
+    def _object(self, object_id: int, body: bytes) -> bytes:
+        self._offsets[object_id] = self._offset
+        return self._write(b"%d 0 obj\n%s\nendobj\n" % (object_id, body))
+
+    def _allocate_id(self) -> int:
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def start(self) -> bytes:
+        return b"".join(
+            [
+                self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"),
+                self._object(
+                    self.CATALOG_ID,
+                    b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES_ID,
+                ),
+                self._object(
+                    self.FONT_ID,
+                    b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                    b"/Encoding /WinAnsiEncoding >>",
+                ),
+            ]
+        )
+
+    def add_page(self, content_stream: bytes) -> bytes:
+        """Add a page from a content stream produced by render_pdf_page."""
+        content_id = self._allocate_id()
+        page_id = self._allocate_id()
+        self._page_ids.append(page_id)
+
+        return b"".join(
+            [
+                self._object(
+                    content_id,
+                    b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream"
+                    % (len(content_stream), content_stream),
+                ),
+                self._object(
+                    page_id,
+                    b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+                    b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+                    % (
+                        self.PAGES_ID,
+                        PDF_PAGE_WIDTH,
+                        PDF_PAGE_HEIGHT,
+                        self.FONT_ID,
+                        content_id,
+                    ),
+                ),
+            ]
+        )
+
+    def finish(self) -> bytes:
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self._page_ids)
+        pages = self._object(
+            self.PAGES_ID,
+            b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_ids)),
+        )
+
+        xref_offset = self._offset
+        object_count = self._next_id
+        xref = [b"xref\n0 %d\n" % object_count, b"0000000000 65535 f \n"]
+        xref += [
+            b"%010d 00000 n \n" % self._offsets[object_id]
+            for object_id in range(1, object_count)
+        ]
+        trailer = b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+            object_count,
+            self.CATALOG_ID,
+            xref_offset,
+        )
+        return pages + self._write(b"".join(xref) + trailer)
+
+
+def stream_pdf(pages: Iterable[bytes]) -> Iterator[bytes]:
+    """Merge rendered PDF page content streams into a single streamed document."""
+    writer = PDFStreamWriter()
+    yield writer.start()
+    for page in pages:
+        yield writer.add_page(page)
+    yield writer.finish()
+
+
+class _ZipStream:
+    """Unseekable write target that lets zipfile output be drained chunk by chunk."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(files: Iterable[Tuple[str, bytes]]) -> Iterator[bytes]:
+    """Stream a zip archive of (name, content) pairs as they become available."""
+    buffer = _ZipStream()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in files:
+            zf.writestr(name, content)
+            yield buffer.drain()
+    yield buffer.drain()
@@ -0,0 +1,307 @@
+"""
+Load-test harness for the API.
+
+Drives a weighted mix of dashboard requests and uploads against a running server
+from a number of concurrent clients, and summarizes throughput and latency
+percentiles per endpoint. The data the requests refer to (jobs, orders and
+shipping providers) is described by a context file written by the
+seed_load_test management command. See the load_test management command for the
+full workflow.
+
+This module only uses the standard library so that it can drive any server.
+"""
+
+import http.client
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+API_PREFIX = "/api/v1"
+
+SEARCH_TERMS = ["John", "Jane", "Smith", "Oak", "Main", "Alice", "Bob"]
+
+CSV_HEADER = (
+    "Header Row (ignored by CSVService)\n"
+    "first name,last name,address,address2,city,zip/postal code,abbreviation,"
+    "first name,last name,address,address2,city,zip/postal code,abbreviation,"
+    "lbs,oz,length,width,height,phone num1,phone num2,order no,item-sku\n"
+)
+CSV_ROW = (
+    "John,Doe,123 Main St,Apt 4,New York,10001,NY,Jane,Smith,456 Oak Ave,,"
+    "Los Angeles,90001,CA,{lbs},{oz},10,8,6,212-555-1234,,{order_number},SKU-{sku}\n"
+)
+UPLOAD_ROWS = 25
+
+
+@dataclass
+class Result:
+    endpoint: str
+    status: int
+    latency_ms: float
+
+    @property
+    def ok(self) -> bool:
+        return 0 < self.status < 400
+
+
+class Client:
+    """Minimal keep-alive HTTP client. Each load-test worker has its own."""
+
+    def __init__(self, base_url: str, timeout: float = 60):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.timeout = timeout
+        self._connection: Optional[http.client.HTTPConnection] = None
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, bytes]:
+        if self._connection is None:
+            self._connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=self.timeout
+            )
+        try:
+            self._connection.request(method, path, body=body, headers=headers or {})
+            response = self._connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            # Reconnect on the next request
+            self.close()
+            raise
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None):
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        return self.request("GET", path, headers={"Accept": "application/json"})
+
+    def post_json(self, path: str, data: Dict[str, Any]):
+        return self.request(
+            "POST",
+            path,
+            body=json.dumps(data).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+
+    def post_file(self, path: str, field: str, filename: str, content: bytes):
+        boundary = uuid.uuid4().hex
+        body = b"".join(
+            [
+                f"--{boundary}\r\n".encode(),
+                f'Content-Disposition: form-data; name="{field}"; '
+                f'filename="{filename}"\r\n'.encode(),
+                b"Content-Type: text/csv\r\n\r\n",
+                content,
+                f"\r\n--{boundary}--\r\n".encode(),
+            ]
+        )
+        return self.request(
+            "POST",
+            path,
+            body=body,
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+# Scenarios take a client, the seeded context and a random generator, and return
+# the response status. The context is the JSON written by seed_load_test:
+# {"jobs": {"<job id>": [order ids]}, "shipping_providers": [provider ids]}.
+Scenario = Callable[[Client, Dict[str, Any], random.Random], int]
+
+
+def orders_list(client: Client, context, rng: random.Random) -> int:
+    """A page of the orders table, filtered by job and sometimes searched."""
+    job_id, order_ids = rng.choice(list(context["jobs"].items()))
+    page_size = 50
+    params = {
+        "job": job_id,
+        "page": rng.randint(1, max(1, math.ceil(len(order_ids) / page_size))),
+        "pageSize": page_size,
+    }
+    variant = rng.random()
+    if variant < 0.25:
+        params = {"search": rng.choice(SEARCH_TERMS), "pageSize": page_size}
+    elif variant < 0.4:
+        params["recipientName"] = rng.choice(SEARCH_TERMS)
+        params["page"] = 1
+    status, _ = client.get_json(f"{API_PREFIX}/orders/", params)
+    return status
+
+
+def job_retrieve(client: Client, context, rng: random.Random) -> int:
+    job_id = rng.choice(list(context["jobs"]))
+    status, _ = client.get_json(f"{API_PREFIX}/jobs/{job_id}/")
+    return status
+
+
+def batch_update(client: Client, context, rng: random.Random) -> int:
+    """Change the shipping provider of a selection of orders in one job."""
+    order_ids = rng.choice(list(context["jobs"].values()))
+    status, _ = client.post_json(
+        f"{API_PREFIX}/orders/batch-update-shipping-provider/",
+        {
+            "orderIds": rng.sample(order_ids, min(len(order_ids), 20)),
+            "shippingProviderId": rng.choice(context["shipping_providers"]),
+        },
+    )
+    return status
+
+
+def csv_upload(client: Client, context, rng: random.Random) -> int:
+    """Upload a small, unique CSV, so that it is never treated as a repeat."""
+    nonce = uuid.UUID(int=rng.getrandbits(128)).hex[:12]
+    rows = "".join(
+        CSV_ROW.format(
+            lbs=rng.randint(0, 20),
+            oz=rng.randint(0, 15),
+            order_number=f"LT-{nonce}-{i}",
+            sku=rng.randint(1, 500),
+        )
+        for i in range(UPLOAD_ROWS)
+    )
+    status, _ = client.post_file(
+        f"{API_PREFIX}/orders/upload/",
+        "file",
+        f"loadtest-{nonce}.csv",
+        (CSV_HEADER + rows).encode(),
+    )
+    return status
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "orders_list": orders_list,
+    "job_retrieve": job_retrieve,
+    "batch_update": batch_update,
+    "csv_upload": csv_upload,
+}
+
+DEFAULT_MIX = {
+    "orders_list": 60,
+    "job_retrieve": 25,
+    "batch_update": 10,
+    "csv_upload": 5,
+}
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """Parse a mix such as "orders_list=60,csv_upload=5" into scenario weights."""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(
+                f"Unknown scenario {name!r}. Choose from: {', '.join(SCENARIOS)}."
+            )
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise ValueError("At least one scenario needs a positive weight.")
+    return mix
+
+
+def run_load(
+    base_url: str,
+    context: Dict[str, Any],
+    mix: Dict[str, int],
+    concurrency: int,
+    duration: float,
+    seed: int = 0,
+) -> List[Result]:
+    """
+    Run the mix from `concurrency` concurrent clients for `duration` seconds and
+    return the result of every request.
+    """
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    results: List[Result] = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency)
+
+    def worker(index: int):
+        rng = random.Random(seed * 1000 + index)
+        client = Client(base_url)
+        worker_results = []
+        barrier.wait()
+        deadline = time.perf_counter() + duration
+        try:
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                start = time.perf_counter()
+                try:
+                    status = SCENARIOS[name](client, context, rng)
+                except (OSError, http.client.HTTPException):
+                    status = 0
+                latency_ms = (time.perf_counter() - start) * 1000
+                worker_results.append(Result(name, status, latency_ms))
+        finally:
+            client.close()
+            with lock:
+                results.extend(worker_results)
+
+    threads = [
+        threading.Thread(target=worker, args=(i,), name=f"loadtest-{i}")
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def percentile(values: List[float], p: float) -> float:
+    """The p-th percentile of values, using the nearest-rank method."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_results(results: List[Result], duration: float) -> Dict[str, Any]:
+    """Throughput and latency statistics for a list of results."""
+    latencies = [result.latency_ms for result in results]
+    summary = {
+        "requests": len(results),
+        "errors": sum(1 for result in results if not result.ok),
+        "throughput_rps": round(len(results) / duration, 2),
+    }
+    if latencies:
+        summary.update(
+            {
+                "mean_ms": round(sum(latencies) / len(latencies), 2),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "max_ms": round(max(latencies), 2),
+            }
+        )
+    return summary
+
+
+def summarize(results: List[Result], duration: float) -> Dict[str, Any]:
+    """Summarize a load-test stage, overall and per endpoint."""
+    by_endpoint: Dict[str, List[Result]] = {}
+    for result in results:
+        by_endpoint.setdefault(result.endpoint, []).append(result)
+
+    return {
+        "total": summarize_results(results, duration),
+        "endpoints": {
+            endpoint: summarize_results(endpoint_results, duration)
+            for endpoint, endpoint_results in sorted(by_endpoint.items())
+        },
+    }
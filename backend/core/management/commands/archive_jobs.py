@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.services.archive_service import ArchiveService
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the orders of jobs older than a cutoff out of the database into "
+        "compressed Parquet files in ORDER_ARCHIVE_DIR. Archived jobs stay "
+        "viewable through the API, read-only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=90,
+            help="Archive jobs created more than this many days ago.",
+        )
+        parser.add_argument("--limit", type=int, help="Archive at most this many jobs.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the jobs that would be archived without archiving them.",
+        )
+
+    def handle(self, *args, **options):
+        if options["older_than"] < 0:
+            raise CommandError("--older-than must not be negative.")
+
+        service = ArchiveService()
+        cutoff = timezone.now() - timedelta(days=options["older_than"])
+        jobs = service.archivable_jobs(before=cutoff).order_by("created_at")
+        if options["limit"] is not None:
+            jobs = jobs[: options["limit"]]
+
+        archived = 0
+        for job in jobs:
+            if options["dry_run"]:
+                self.stdout.write(
+                    f"Would archive job {job.id} ({job.created_at:%Y-%m-%d})."
+                )
+                continue
+            count = service.archive_job(job)
+            archived += 1
+            self.stdout.write(
+                f"Archived job {job.id} with {count} order(s) to "
+                f"{service.path_for(job.id)}."
+            )
+
+        if not options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Archived {archived} job(s)."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api.schema import SchemaCache, generate_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema for the current code version into "
+        "SCHEMA_CACHE_DIR, so that API processes serve it without generating it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--api-version",
+            default="v1",
+            help="API version (URL namespace) to generate the schema of.",
+        )
+
+    def handle(self, *args, **options):
+        api_version = options["api_version"]
+        cache = SchemaCache()
+        cache.write(api_version, generate_schema(api_version))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {cache.path_for(api_version)}."))
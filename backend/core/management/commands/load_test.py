@@ -0,0 +1,290 @@
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import DEFAULT_MIX, Client, parse_mix, run_load, summarize
+
+RESULTS_DIR = settings.BASE_DIR / "benchmarks" / "results"
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a load test against the API and write throughput and latency "
+        "percentiles per endpoint to a JSON report. By default a fresh SQLite "
+        "database is seeded and served by a local uvicorn server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="Base URL of an already running server. Requires --context.",
+        )
+        parser.add_argument(
+            "--context",
+            type=Path,
+            help="Context file written by seed_load_test, for use with --url.",
+        )
+        parser.add_argument("--jobs", type=int, default=10, help="Jobs to seed.")
+        parser.add_argument(
+            "--orders", type=int, default=1000, help="Orders to seed per job."
+        )
+        parser.add_argument(
+            "--workers", type=int, default=1, help="Server worker processes."
+        )
+        parser.add_argument(
+            "--concurrency",
+            default="8",
+            help="Concurrent clients. A comma separated list runs one stage per level.",
+        )
+        parser.add_argument(
+            "--duration", type=float, default=30, help="Seconds per stage."
+        )
+        parser.add_argument(
+            "--warmup", type=float, default=2, help="Unmeasured seconds per stage."
+        )
+        parser.add_argument(
+            "--mix",
+            default=",".join(
+                f"{name}={weight}" for name, weight in DEFAULT_MIX.items()
+            ),
+            help="Scenario weights, e.g. orders_list=60,job_retrieve=25.",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+        parser.add_argument(
+            "--output", type=Path, help="Report path. Defaults to benchmarks/results/."
+        )
+        parser.add_argument(
+            "--baseline", type=Path, help="Earlier report to compare the results to."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options["mix"])
+            levels = [int(level) for level in options["concurrency"].split(",")]
+        except ValueError as e:
+            raise CommandError(str(e))
+        if any(level < 1 for level in levels):
+            raise CommandError("--concurrency levels must be at least 1.")
+
+        if options["url"]:
+            if not options["context"]:
+                raise CommandError("--context is required with --url.")
+            with open(options["context"]) as f:
+                context = json.load(f)
+            stages = self.run_stages(options["url"], context, mix, levels, options)
+        else:
+            with tempfile.TemporaryDirectory(prefix="loadtest-") as directory:
+                env = self.server_env(Path(directory))
+                context_path = Path(directory) / "context.json"
+                self.prepare_database(env, context_path, options)
+                with open(context_path) as f:
+                    context = json.load(f)
+                with _Server(env, options["workers"]) as url:
+                    stages = self.run_stages(url, context, mix, levels, options)
+
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": self.git_commit(),
+            "database": "sqlite" if not options["url"] else "external",
+            "seed": {
+                "jobs": len(context["jobs"]),
+                "orders": sum(len(ids) for ids in context["jobs"].values()),
+            },
+            "mix": mix,
+            "duration_s": options["duration"],
+            "stages": stages,
+        }
+        output = options["output"] or RESULTS_DIR / (
+            f"loadtest-{report['git_commit'][:12] or 'unknown'}-"
+            f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.json"
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        self.stdout.write(self.style.SUCCESS(f"Report written to {output}."))
+
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                self.compare(json.load(f), report)
+
+    def run_stages(
+        self, url: str, context, mix, levels: List[int], options
+    ) -> List[Dict[str, Any]]:
+        stages = []
+        for concurrency in levels:
+            if options["warmup"] > 0:
+                run_load(url, context, mix, concurrency, options["warmup"], seed=-1)
+
+            results = run_load(
+                url, context, mix, concurrency, options["duration"], options["seed"]
+            )
+            stage = {
+                "concurrency": concurrency,
+                **summarize(results, options["duration"]),
+            }
+            stages.append(stage)
+            self.print_stage(stage)
+        return stages
+
+    def print_stage(self, stage: Dict[str, Any]):
+        self.stdout.write(f"\nConcurrency {stage['concurrency']}:")
+        rows = [("total", stage["total"]), *stage["endpoints"].items()]
+        for name, stats in rows:
+            self.stdout.write(
+                f"  {name:<14} {stats['requests']:>7} req "
+                f"{stats['throughput_rps']:>8.1f} req/s "
+                f"p50 {stats.get('p50_ms', 0):>8.1f} ms "
+                f"p95 {stats.get('p95_ms', 0):>8.1f} ms "
+                f"p99 {stats.get('p99_ms', 0):>8.1f} ms "
+                f"{stats['errors']:>5} errors"
+            )
+
+    def compare(self, baseline: Dict[str, Any], report: Dict[str, Any]):
+        self.stdout.write(
+            f"\nCompared to {baseline.get('git_commit', '')[:12] or 'baseline'}:"
+        )
+        previous = {stage["concurrency"]: stage for stage in baseline["stages"]}
+        for stage in report["stages"]:
+            before = previous.get(stage["concurrency"])
+            if before is None:
+                continue
+            for name, stats in stage["endpoints"].items():
+                old = before["endpoints"].get(name)
+                if not old or "p95_ms" not in old or "p95_ms" not in stats:
+                    continue
+                self.stdout.write(
+                    f"  c={stage['concurrency']} {name:<14} "
+                    f"throughput {self.change(old['throughput_rps'], stats['throughput_rps'])} "
+                    f"p95 {self.change(old['p95_ms'], stats['p95_ms'])}"
+                )
+
+    @staticmethod
+    def change(before: float, after: float) -> str:
+        if not before:
+            return f"{after:.1f}"
+        return f"{after:.1f} ({(after - before) / before:+.0%})"
+
+    def server_env(self, directory: Path) -> Dict[str, str]:
+        return {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE,
+            "DB_ENGINE": "sqlite",
+            "SQLITE_PATH": str(directory / "loadtest.sqlite3"),
+            "DEBUG": "False",
+            "ALLOWED_HOSTS": "127.0.0.1,localhost",
+        }
+
+    def prepare_database(self, env: Dict[str, str], context_path: Path, options):
+        self.stdout.write(
+            f"Seeding {options['jobs']} job(s) with {options['orders']} order(s) each..."
+        )
+        commands = [
+            ["migrate", "--no-input", "-v", "0"],
+            [
+                "seed_load_test",
+                "--jobs",
+                str(options["jobs"]),
+                "--orders",
+                str(options["orders"]),
+                "--context",
+                str(context_path),
+                "--seed",
+                str(options["seed"]),
+            ],
+        ]
+        for command in commands:
+            result = subprocess.run(
+                [sys.executable, "manage.py", *command],
+                cwd=settings.BASE_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode != 0:
+                raise CommandError(f"{command[0]} failed:\n{result.stderr}")
+
+    @staticmethod
+    def git_commit() -> str:
+        try:
+            result = subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+            )
+        except OSError:
+            return ""
+        return result.stdout.strip() if result.returncode == 0 else ""
+
+
+class _Server:
+    """Runs the ASGI application with uvicorn on a free local port."""
+
+    STARTUP_TIMEOUT = 30
+
+    def __init__(self, env: Dict[str, str], workers: int):
+        self.env = env
+        self.workers = workers
+        self.process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> str:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "config.asgi:application",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                str(port),
+                "--workers",
+                str(self.workers),
+                "--no-access-log",
+                "--log-level",
+                "warning",
+            ],
+            cwd=settings.BASE_DIR,
+            env=self.env,
+        )
+        url = f"http://127.0.0.1:{port}"
+        self.wait_until_ready(url)
+        return url
+
+    def wait_until_ready(self, url: str):
+        client = Client(url, timeout=1)
+        deadline = time.monotonic() + self.STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError("The server exited during startup.")
+            try:
+                status, _ = client.get_json("/api/v1/shipping-providers/")
+                if status == 200:
+                    return
+            except (OSError, http.client.HTTPException):
+                pass
+            time.sleep(0.2)
+        raise CommandError("The server did not start in time.")
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.models import OrderChange
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the entries of the order change feed older than "
+        "ORDER_CHANGE_RETENTION. Processes recording changes also do so "
+        "periodically, every ORDER_CHANGE_PRUNE_INTERVAL seconds."
+    )
+
+    def handle(self, *args, **options):
+        deleted, _ = OrderChange.objects.expired().delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired order change(s).")
+        )
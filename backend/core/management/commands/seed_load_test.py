@@ -0,0 +1,111 @@
+import json
+import random
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.loadtest import SEARCH_TERMS
+from core.models import Job, ShippingProvider
+from core.services.order_import import OrderImporter
+
+FIXTURE = settings.BASE_DIR / "fixtures" / "0001_shipping_providers.json"
+
+CITIES = [
+    ("New York", "NY", "10001"),
+    ("Los Angeles", "CA", "90001"),
+    ("Chicago", "IL", "60601"),
+    ("Houston", "TX", "77001"),
+    ("Phoenix", "AZ", "85001"),
+]
+STREETS = ["Main St", "Oak Ave", "Pine Rd", "Elm St", "Maple Dr"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed the database with jobs and orders for load testing, and write a "
+        "context file describing them for the load_test command."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=10, help="Number of jobs.")
+        parser.add_argument(
+            "--orders", type=int, default=1000, help="Number of orders per job."
+        )
+        parser.add_argument(
+            "--context",
+            type=Path,
+            required=True,
+            help="Path of the context file to write.",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+
+    def handle(self, *args, **options):
+        if options["jobs"] < 1 or options["orders"] < 1:
+            raise CommandError("--jobs and --orders must be at least 1.")
+
+        if not ShippingProvider.objects.filter(id=2).exists():
+            call_command("loaddata", str(FIXTURE), verbosity=0)
+        default_provider = ShippingProvider.objects.get(id=2)
+
+        rng = random.Random(options["seed"])
+        jobs = {}
+        for _ in range(options["jobs"]):
+            with transaction.atomic():
+                job = Job.objects.create()
+                rows = [self.make_row(rng) for _ in range(options["orders"])]
+                orders = OrderImporter.for_connection(
+                    job, default_provider
+                ).import_rows(rows)
+            jobs[str(job.id)] = [order.id for order in orders]
+
+        context = {
+            "jobs": jobs,
+            "shipping_providers": list(
+                ShippingProvider.objects.order_by("id").values_list("id", flat=True)
+            ),
+        }
+        options["context"].parent.mkdir(parents=True, exist_ok=True)
+        with open(options["context"], "w") as f:
+            json.dump(context, f)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {options['jobs']} job(s) with {options['orders']} order(s) "
+                f"each. Context written to {options['context']}."
+            )
+        )
+
+    @staticmethod
+    def make_row(rng: random.Random) -> dict:
+        sender, recipient = rng.choice(SEARCH_TERMS), rng.choice(SEARCH_TERMS)
+        from_city, from_state, from_zip = rng.choice(CITIES)
+        to_city, to_state, to_zip = rng.choice(CITIES)
+        return {
+            "from_name": f"{sender} Sender",
+            "from_address": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}",
+            "from_address_2": "",
+            "from_city": from_city,
+            "from_state": from_state,
+            "from_zip_code": from_zip,
+            "to_name": f"{recipient} Recipient",
+            "to_address": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}",
+            "to_address_2": "",
+            "to_city": to_city,
+            "to_state": to_state,
+            "to_zip_code": to_zip,
+            "sender_first_name": sender,
+            "sender_last_name": "Sender",
+            "recipient_first_name": recipient,
+            "recipient_last_name": "Recipient",
+            "length": rng.randint(1, 24),
+            "width": rng.randint(1, 18),
+            "height": rng.randint(1, 12),
+            "weight": rng.randint(1, 800),
+            "item_sku": f"SKU-{rng.randint(1, 500)}",
+            "phone_number": "+12125551234",
+            "phone_number_2": "",
+            "order_number": "",
+        }
@@ -0,0 +1,137 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_BUDGET_FILE = settings.BASE_DIR / "benchmarks" / "startup_budget.json"
+
+# Runs in a fresh interpreter, so that nothing is already imported or cached
+PROBE = """
+import json, sys, time
+
+start = time.perf_counter()
+import django
+
+django.setup()
+setup_done = time.perf_counter()
+
+from django.urls import get_resolver
+
+get_resolver().url_patterns
+end = time.perf_counter()
+
+print(json.dumps({
+    "setup_ms": (setup_done - start) * 1000,
+    "urlconf_ms": (end - setup_done) * 1000,
+    "total_ms": (end - start) * 1000,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+TIMINGS = ["setup_ms", "urlconf_ms", "total_ms"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the time taken by django.setup() and importing the URLconf in a "
+        "fresh process, and fail if it exceeds the stored startup budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=5,
+            help="Number of fresh processes to measure. The median is used.",
+        )
+        parser.add_argument(
+            "--budget",
+            type=Path,
+            default=DEFAULT_BUDGET_FILE,
+            help="Path to the budget file.",
+        )
+        parser.add_argument(
+            "--update",
+            action="store_true",
+            help="Write the measured timings, plus headroom, to the budget file.",
+        )
+        parser.add_argument(
+            "--headroom",
+            type=float,
+            default=0.5,
+            help="Fraction added to the measured timings when updating the budget.",
+        )
+
+    def handle(self, *args, **options):
+        if options["runs"] < 1:
+            raise CommandError("--runs must be at least 1.")
+
+        budget = self.load_budget(options["budget"])
+        runs = [self.measure() for _ in range(options["runs"])]
+        timings = {key: statistics.median(run[key] for run in runs) for key in TIMINGS}
+        loaded = set().union(*(run["modules"] for run in runs))
+
+        for key in TIMINGS:
+            limit = budget.get(key)
+            limit_text = f" (budget {limit:.0f} ms)" if limit else ""
+            self.stdout.write(f"{key}: {timings[key]:.1f} ms{limit_text}")
+
+        if options["update"]:
+            self.save_budget(options["budget"], budget, timings, options["headroom"])
+            return
+
+        failures = [
+            f"{key} is {timings[key]:.1f} ms, over the budget of {budget[key]:.0f} ms"
+            for key in TIMINGS
+            if key in budget and timings[key] > budget[key]
+        ]
+        failures += [
+            f"{module} is imported at startup but should be deferred until first use"
+            for module in budget.get("deferred_modules", [])
+            if module in loaded
+        ]
+        if failures:
+            raise CommandError(
+                "Startup budget exceeded:\n" + "\n".join(f"- {f}" for f in failures)
+            )
+
+        self.stdout.write(self.style.SUCCESS("Startup is within budget."))
+
+    def measure(self) -> dict:
+        env = dict(os.environ)
+        # None while settings are overridden, e.g. in tests, which leaves the
+        # module from the environment
+        if settings.SETTINGS_MODULE:
+            env["DJANGO_SETTINGS_MODULE"] = settings.SETTINGS_MODULE
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup probe failed:\n{result.stderr}")
+        return json.loads(result.stdout.splitlines()[-1])
+
+    def load_budget(self, path: Path) -> dict:
+        if not path.exists():
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_budget(self, path: Path, budget: dict, timings: dict, headroom: float):
+        budget = {
+            **budget,
+            **{key: round(value * (1 + headroom)) for key, value in timings.items()},
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(budget, f, indent=2)
+            f.write("\n")
+        self.stdout.write(self.style.SUCCESS(f"Updated the startup budget in {path}."))
@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_job_remove_order_job_id_order_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="content_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="idempotency_key",
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+    ]
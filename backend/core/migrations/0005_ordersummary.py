@@ -0,0 +1,135 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:52
+
+import django.db.models.deletion
+import phonenumber_field.modelfields
+from django.db import migrations, models
+
+NESTED = (
+    "sender",
+    "recipient",
+    "from_address",
+    "to_address",
+    "package",
+    "shipping_provider",
+)
+
+
+def backfill_summaries(apps, schema_editor):
+    """Create the summaries of existing orders, as OrderSummary.sources() does."""
+    Order = apps.get_model("core", "Order")
+    OrderSummary = apps.get_model("core", "OrderSummary")
+
+    sources = {}
+    for field in OrderSummary._meta.concrete_fields:
+        source = {"order_id": "id"}.get(field.attname, field.attname)
+        for relation in NESTED:
+            prefix = f"{relation}_"
+            if field.attname.startswith(prefix) and field.attname != f"{prefix}id":
+                source = f"{relation}__{field.attname.removeprefix(prefix)}"
+        sources[field.column] = source
+
+    connection = schema_editor.connection
+    sql, params = (
+        Order.objects.using(connection.alias)
+        .order_by()
+        .values_list(*sources.values())
+        .query.sql_with_params()
+    )
+    columns = ", ".join(connection.ops.quote_name(column) for column in sources)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {OrderSummary._meta.db_table} ({columns}) {sql}", params
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_job_content_hash_job_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderSummary",
+            fields=[
+                (
+                    "order",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="core.order",
+                    ),
+                ),
+                ("sender_id", models.BigIntegerField()),
+                ("sender_first_name", models.CharField(max_length=100)),
+                ("sender_last_name", models.CharField(blank=True, max_length=100)),
+                ("recipient_id", models.BigIntegerField()),
+                ("recipient_first_name", models.CharField(max_length=100)),
+                ("recipient_last_name", models.CharField(blank=True, max_length=100)),
+                ("from_address_id", models.BigIntegerField()),
+                ("from_address_name", models.CharField(max_length=255)),
+                ("from_address_address", models.TextField()),
+                ("from_address_address_2", models.TextField(blank=True)),
+                ("from_address_city", models.CharField(max_length=100)),
+                ("from_address_state", models.CharField(max_length=100)),
+                ("from_address_zip_code", models.CharField(max_length=20)),
+                ("from_address_country", models.CharField(max_length=100)),
+                ("from_address_is_user_created", models.BooleanField()),
+                ("to_address_id", models.BigIntegerField()),
+                ("to_address_name", models.CharField(max_length=255)),
+                ("to_address_address", models.TextField()),
+                ("to_address_address_2", models.TextField(blank=True)),
+                ("to_address_city", models.CharField(max_length=100)),
+                ("to_address_state", models.CharField(max_length=100)),
+                ("to_address_zip_code", models.CharField(max_length=20)),
+                ("to_address_country", models.CharField(max_length=100)),
+                ("to_address_is_user_created", models.BooleanField()),
+                ("package_id", models.BigIntegerField()),
+                ("package_length", models.PositiveIntegerField()),
+                ("package_width", models.PositiveIntegerField()),
+                ("package_height", models.PositiveIntegerField()),
+                ("package_weight", models.PositiveIntegerField()),
+                ("package_item_sku", models.CharField(blank=True, max_length=255)),
+                ("package_is_user_created", models.BooleanField()),
+                ("shipping_provider_id", models.BigIntegerField(null=True)),
+                ("shipping_provider_name", models.CharField(max_length=255, null=True)),
+                ("shipping_provider_description", models.TextField(null=True)),
+                (
+                    "shipping_provider_cost_per_pound",
+                    models.DecimalField(decimal_places=2, max_digits=10, null=True),
+                ),
+                ("created_at", models.DateTimeField()),
+                (
+                    "phone_number",
+                    phonenumber_field.modelfields.PhoneNumberField(
+                        max_length=128, region=None
+                    ),
+                ),
+                (
+                    "phone_number_2",
+                    phonenumber_field.modelfields.PhoneNumberField(
+                        blank=True, max_length=128, region=None
+                    ),
+                ),
+                (
+                    "job",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.job",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["job", "order"], name="core_orders_job_id_29c704_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_ordersummary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="archived_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
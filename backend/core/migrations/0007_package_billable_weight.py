@@ -0,0 +1,78 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:13
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.math
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_billable_weights(apps, schema_editor):
+    """Copy the new package column into the summaries of existing orders."""
+    OrderSummary = apps.get_model("core", "OrderSummary")
+    Package = apps.get_model("core", "Package")
+    OrderSummary.objects.using(schema_editor.connection.alias).update(
+        package_billable_weight=Subquery(
+            Package.objects.filter(id=OuterRef("package_id")).values("billable_weight")
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_job_archived_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="package",
+            name="billable_weight",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.functions.math.Round(
+                    django.db.models.functions.comparison.Greatest(
+                        django.db.models.expressions.CombinedExpression(
+                            models.F("weight"), "/", models.Value(Decimal("16.0"))
+                        ),
+                        django.db.models.expressions.CombinedExpression(
+                            django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("length"), "*", models.F("width")
+                                ),
+                                "*",
+                                models.F("height"),
+                            ),
+                            "/",
+                            models.Value(Decimal("139.0")),
+                        ),
+                    ),
+                    precision=4,
+                ),
+                output_field=models.DecimalField(decimal_places=4, max_digits=12),
+            ),
+        ),
+        migrations.AddField(
+            model_name="ordersummary",
+            name="package_billable_weight",
+            field=models.DecimalField(decimal_places=4, max_digits=12, null=True),
+        ),
+        migrations.RunPython(backfill_billable_weights, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="ordersummary",
+            name="package_billable_weight",
+            field=models.DecimalField(decimal_places=4, max_digits=12),
+        ),
+        migrations.AddIndex(
+            model_name="ordersummary",
+            index=models.Index(
+                fields=[
+                    "job",
+                    "shipping_provider_cost_per_pound",
+                    "package_billable_weight",
+                ],
+                name="core_orders_job_id_c0000e_idx",
+            ),
+        ),
+    ]
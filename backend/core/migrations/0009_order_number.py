@@ -0,0 +1,34 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_errorreport"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="order_number",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="row_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="ordersummary",
+            name="order_number",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["job", "order_number"], name="core_order_job_id_21480a_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:33
+
+from django.db import migrations, models
+
+
+def backfill_rate_tables(apps, schema_editor):
+    """Existing providers have no rate table, which summaries store as blank."""
+    OrderSummary = apps.get_model("core", "OrderSummary")
+    OrderSummary.objects.using(schema_editor.connection.alias).filter(
+        shipping_provider_id__isnull=False
+    ).update(shipping_provider_rate_table="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_order_number"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="ordersummary",
+            name="core_orders_job_id_c0000e_idx",
+        ),
+        migrations.AddField(
+            model_name="ordersummary",
+            name="shipping_provider_rate_table",
+            field=models.CharField(max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name="shippingprovider",
+            name="rate_table",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(backfill_rate_tables, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="ordersummary",
+            index=models.Index(
+                fields=[
+                    "job",
+                    "shipping_provider_rate_table",
+                    "shipping_provider_cost_per_pound",
+                    "package_billable_weight",
+                ],
+                name="core_orders_job_id_8f0446_idx",
+            ),
+        ),
+    ]
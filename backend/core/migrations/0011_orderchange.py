@@ -0,0 +1,46 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_shipping_provider_rate_table"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderChange",
+            fields=[
+                ("seq", models.BigAutoField(primary_key=True, serialize=False)),
+                ("order_id", models.BigIntegerField()),
+                ("job_id", models.BigIntegerField(null=True)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("created", "Created"),
+                            ("updated", "Updated"),
+                            ("deleted", "Deleted"),
+                        ],
+                        max_length=7,
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["job_id", "seq"], name="core_orderc_job_id_5ce636_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_orderchange"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="archived_max_order_id",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="archived_min_order_id",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,10 +1,26 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Round
+from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
-from core.querysets import OrderQuerySet, AddressQuerySet, PackageQuerySet
+from core.querysets import (
+    OrderQuerySet,
+    AddressQuerySet,
+    PackageQuerySet,
+    OrderChangeQuerySet,
+    UploadClaimQuerySet,
+)
 from uuid import uuid4
 
 # Create your models here.
 
+# Cubic inches per pound of dimensional weight, as used by US domestic carriers.
+# Written with a decimal point so that SQLite doesn't divide as integers.
+DIM_WEIGHT_DIVISOR = Decimal("139.0")
+
 
 class Address(models.Model):
     name = models.CharField(max_length=255)
@@ -33,6 +49,19 @@ class Package(models.Model):
     is_user_created = models.BooleanField(
         default=False
     )  # Indicates if the package was manually saved by the user
+    # Weight charged for, in POUNDS: the greater of the actual weight and the
+    # dimensional weight. Computed and stored by the database on every write.
+    billable_weight = models.GeneratedField(
+        expression=Round(
+            Greatest(
+                F("weight") / Value(Decimal("16.0")),
+                F("length") * F("width") * F("height") / Value(DIM_WEIGHT_DIVISOR),
+            ),
+            precision=4,
+        ),
+        output_field=models.DecimalField(max_digits=12, decimal_places=4),
+        db_persist=True,
+    )
 
     def __str__(self):
         return f"Package {self.id} - {self.weight} oz"
@@ -49,10 +78,50 @@ class ShippingProvider(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     cost_per_pound = models.DecimalField(max_digits=10, decimal_places=2)
+    rate_table = models.CharField(
+        max_length=255, blank=True
+    )  # Directory in RATE_TABLE_DIR; priced by cost_per_pound when blank
+
+    def clean(self):
+        from core.rate_tables import load_rate_table
+
+        if self.rate_table:
+            try:
+                load_rate_table(self.rate_table)
+            except ValueError as e:
+                raise ValidationError({"rate_table": str(e)})
 
 
 class Job(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
+    content_hash = models.CharField(
+        max_length=64, blank=True, db_index=True
+    )  # SHA-256 of the uploaded file, used to detect retried uploads
+    idempotency_key = models.CharField(
+        max_length=255, blank=True, db_index=True
+    )  # Optional client-supplied Idempotency-Key header
+    archived_at = models.DateTimeField(
+        null=True, blank=True
+    )  # Set when the job's orders are moved to the Parquet archive
+    # Range of the IDs of the archived orders, to find an order's archive file
+    archived_min_order_id = models.BigIntegerField(null=True, blank=True)
+    archived_max_order_id = models.BigIntegerField(null=True, blank=True)
+
+
+class UploadClaim(models.Model):
+    """
+    Claim on an upload, by its Idempotency-Key header or the SHA-256 of its
+    contents, taken and committed before the upload is parsed so that requests
+    repeating it are caught even while it is still being processed: they get
+    its job once it has one, and a 409 until then. Claims of failed uploads are
+    deleted, and expired claims (see UPLOAD_IDEMPOTENCY_WINDOW) are replaced.
+    """
+
+    key = models.CharField(max_length=300, unique=True)  # "key:..." or "sha256:..."
+    job = models.ForeignKey("Job", on_delete=models.CASCADE, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = UploadClaimQuerySet.as_manager()
 
 
 class Order(models.Model):
@@ -78,5 +147,167 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     phone_number = PhoneNumberField()
     phone_number_2 = PhoneNumberField(blank=True)
+    order_number = models.CharField(max_length=255, blank=True)  # From the CSV
+    row_hash = models.CharField(
+        max_length=64, blank=True
+    )  # SHA-256 of the imported row, used by upserts to skip unchanged orders
 
     objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["job", "order_number"])]
+
+
+class OrderSummary(models.Model):
+    """
+    Denormalized read model of an order, holding everything the orders list shows
+    in a single row so that listing orders doesn't join six tables. The columns of
+    each related object are prefixed with the name of the relation on Order (see
+    NESTED), e.g. from_address_city is Order.from_address.city.
+
+    Rows are rewritten from the normalized tables, which remain the source of
+    truth, by OrderQuerySet.refresh_summaries() whenever orders are imported or
+    changed, and by the signal handlers in core.signals on single edits.
+    """
+
+    NESTED = (
+        "sender",
+        "recipient",
+        "from_address",
+        "to_address",
+        "package",
+        "shipping_provider",
+    )
+
+    order = models.OneToOneField(
+        "Order", primary_key=True, related_name="summary", on_delete=models.CASCADE
+    )
+    job = models.ForeignKey(
+        "Job", related_name="+", on_delete=models.CASCADE, null=True
+    )
+
+    sender_id = models.BigIntegerField()
+    sender_first_name = models.CharField(max_length=100)
+    sender_last_name = models.CharField(max_length=100, blank=True)
+
+    recipient_id = models.BigIntegerField()
+    recipient_first_name = models.CharField(max_length=100)
+    recipient_last_name = models.CharField(max_length=100, blank=True)
+
+    from_address_id = models.BigIntegerField()
+    from_address_name = models.CharField(max_length=255)
+    from_address_address = models.TextField()
+    from_address_address_2 = models.TextField(blank=True)
+    from_address_city = models.CharField(max_length=100)
+    from_address_state = models.CharField(max_length=100)
+    from_address_zip_code = models.CharField(max_length=20)
+    from_address_country = models.CharField(max_length=100)
+    from_address_is_user_created = models.BooleanField()
+
+    to_address_id = models.BigIntegerField()
+    to_address_name = models.CharField(max_length=255)
+    to_address_address = models.TextField()
+    to_address_address_2 = models.TextField(blank=True)
+    to_address_city = models.CharField(max_length=100)
+    to_address_state = models.CharField(max_length=100)
+    to_address_zip_code = models.CharField(max_length=20)
+    to_address_country = models.CharField(max_length=100)
+    to_address_is_user_created = models.BooleanField()
+
+    package_id = models.BigIntegerField()
+    package_length = models.PositiveIntegerField()
+    package_width = models.PositiveIntegerField()
+    package_height = models.PositiveIntegerField()
+    package_weight = models.PositiveIntegerField()  # weight in OUNCES
+    package_billable_weight = models.DecimalField(
+        max_digits=12, decimal_places=4
+    )  # in POUNDS
+    package_item_sku = models.CharField(max_length=255, blank=True)
+    package_is_user_created = models.BooleanField()
+
+    shipping_provider_id = models.BigIntegerField(null=True)
+    shipping_provider_name = models.CharField(max_length=255, null=True)
+    shipping_provider_description = models.TextField(null=True)
+    shipping_provider_cost_per_pound = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True
+    )
+    shipping_provider_rate_table = models.CharField(max_length=255, null=True)
+
+    created_at = models.DateTimeField()
+    phone_number = PhoneNumberField()
+    phone_number_2 = PhoneNumberField(blank=True)
+    order_number = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["job", "order"]),
+            # Covers JobService.get_total_cost(), which sums over a job's rows
+            # priced by cost per pound
+            models.Index(
+                fields=[
+                    "job",
+                    "shipping_provider_rate_table",
+                    "shipping_provider_cost_per_pound",
+                    "package_billable_weight",
+                ]
+            ),
+        ]
+
+    @classmethod
+    def sources(cls) -> dict[str, str]:
+        """Map each column to the Order field lookup it is copied from."""
+        sources = {}
+        for field in cls._meta.concrete_fields:
+            source = {"order_id": "id"}.get(field.attname, field.attname)
+            for relation in cls.NESTED:
+                prefix = f"{relation}_"
+                if field.attname.startswith(prefix) and field.attname != f"{prefix}id":
+                    source = f"{relation}__{field.attname.removeprefix(prefix)}"
+            sources[field.column] = source
+        return sources
+
+
+class OrderChange(models.Model):
+    """
+    An entry of the order change feed: an order was created, updated or deleted.
+    Entries are numbered in the order they are recorded, so that clients can
+    fetch the changes since the last one they saw (see OrderChangeService).
+    They are recorded by OrderQuerySet.record_changes(), which refreshing the
+    summaries of orders and deleting orders call, and by the signal handlers in
+    core.signals on single and cascading deletes. Expired entries are deleted
+    periodically (see OrderChangeQuerySet.prune_if_due).
+    """
+
+    class Kind(models.TextChoices):
+        CREATED = "created"
+        UPDATED = "updated"
+        DELETED = "deleted"
+
+    seq = models.BigAutoField(primary_key=True)
+    # Not foreign keys, as the changes of deleted orders are kept
+    order_id = models.BigIntegerField()
+    job_id = models.BigIntegerField(null=True)
+    kind = models.CharField(max_length=7, choices=Kind.choices)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    objects = OrderChangeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["job_id", "seq"])]
+
+
+class ErrorReport(models.Model):
+    """
+    The errors of an upload that failed validation. The errors of each row are
+    stored in a Parquet file next to a copy of the uploaded file, both named after
+    the report's ID (see ErrorReportService), so that large reports can be paged
+    through instead of being returned whole.
+    """
+
+    # Random IDs, since reports hold the uploaded file
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    file_name = models.CharField(max_length=255, blank=True)
+    general_errors = models.JSONField(default=list, blank=True)
+    row_count = models.PositiveIntegerField(default=0)  # Rows with errors
+    error_count = models.PositiveIntegerField(default=0)  # Errors across all rows
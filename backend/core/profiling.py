@@ -0,0 +1,216 @@
+"""
+On-demand profiling of individual requests.
+
+A profiled request is sampled by a background thread that records the call stack
+of every thread doing work for the request, and every SQL statement it runs is
+recorded with its duration. The results are written to REQUEST_PROFILING_DIR as:
+
+- <id>.json: the request, its SQL statements with timings, and a summary
+- <id>.speedscope.json: the sampled stacks, which can be opened as a flame graph
+  in https://www.speedscope.app (or `npx speedscope <file>`)
+
+Nothing here runs unless a request is being profiled (see ProfilingMiddleware).
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from types import FrameType
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# (function name, file name, first line number)
+Frame = Tuple[str, str, int]
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "request_profile", default=None
+)
+
+
+def record_sql(execute, sql, params, many, context):
+    """
+    Database execute wrapper that records statements run while a request is being
+    profiled. Other statements only pay for a context variable lookup.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+
+    profile.add_thread(threading.get_ident())
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(
+            sql=sql,
+            params=params,
+            many=many,
+            alias=context["connection"].alias,
+            duration_ms=(time.perf_counter() - start) * 1000,
+        )
+
+
+def _install_sql_recorder(sender=None, connection=None, **kwargs):
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+def install_sql_recorder():
+    """Record SQL for profiled requests on every database connection."""
+    connection_created.connect(_install_sql_recorder, dispatch_uid="request_profiling")
+    for connection in connections.all(initialized_only=True):
+        _install_sql_recorder(connection=connection)
+
+
+class StackSampler(threading.Thread):
+    """Periodically records the call stacks of a set of threads."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        self.thread_ids: set[int] = set()
+        self.samples: Dict[str, Counter] = {}
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id in list(self.thread_ids):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                name = names.get(thread_id, str(thread_id))
+                self.samples.setdefault(name, Counter())[self._stack(frame)] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    @staticmethod
+    def _stack(frame: Optional[FrameType]) -> Tuple[Frame, ...]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+
+class RequestProfile:
+    def __init__(self, request):
+        self.id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid4().hex[:8]}"
+        self.method = request.method
+        self.path = request.path
+        self.query_string = request.META.get("QUERY_STRING", "")
+        self.interval_ms = settings.REQUEST_PROFILING_INTERVAL_MS
+        self.queries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._sampler = StackSampler(self.interval_ms / 1000)
+        self._token = None
+
+    def add_thread(self, thread_id: int):
+        self._sampler.thread_ids.add(thread_id)
+
+    def add_query(self, **query):
+        query["params"] = [str(param) for param in query["params"] or []]
+        query["thread"] = threading.current_thread().name
+        with self._lock:
+            self.queries.append(query)
+
+    def start(self):
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._token = _current_profile.set(self)
+        self.add_thread(threading.get_ident())
+        self._sampler.start()
+
+    def stop(self):
+        self._sampler.stop()
+        _current_profile.reset(self._token)
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+
+    @property
+    def sql_time_ms(self) -> float:
+        return sum(query["duration_ms"] for query in self.queries)
+
+    def summary(self, status_code: int) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "query_string": self.query_string,
+            "status_code": status_code,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self.duration_ms,
+            "sample_interval_ms": self.interval_ms,
+            "sample_count": sum(
+                sum(samples.values()) for samples in self._sampler.samples.values()
+            ),
+            "flame_graph": f"{self.id}.speedscope.json",
+            "sql": {
+                "count": len(self.queries),
+                "total_ms": self.sql_time_ms,
+                "queries": self.queries,
+            },
+        }
+
+    def speedscope(self) -> Dict[str, Any]:
+        """The sampled stacks in speedscope's file format, one profile per thread."""
+        frames: List[Dict[str, Any]] = []
+        frame_index: Dict[Frame, int] = {}
+
+        def index(frame: Frame) -> int:
+            if frame not in frame_index:
+                name, file, line = frame
+                frame_index[frame] = len(frames)
+                frames.append({"name": name, "file": file, "line": line})
+            return frame_index[frame]
+
+        profiles = []
+        for thread_name, samples in self._sampler.samples.items():
+            stacks = [[index(frame) for frame in stack] for stack in samples]
+            weights = [count * self.interval_ms for count in samples.values()]
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": f"{self.method} {self.path} ({thread_name})",
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": stacks,
+                    "weights": weights,
+                }
+            )
+
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": f"{self.method} {self.path}",
+            "exporter": "labelstack",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def save(self, status_code: int) -> Path:
+        """Write the profile artifacts and return the path of the summary."""
+        directory = Path(settings.REQUEST_PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        with open(directory / f"{self.id}.speedscope.json", "w") as f:
+            json.dump(self.speedscope(), f)
+
+        path = directory / f"{self.id}.json"
+        with open(path, "w") as f:
+            json.dump(self.summary(status_code), f, indent=2)
+        return path
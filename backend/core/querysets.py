@@ -1,19 +1,227 @@
-from django.db import models
-from typing import TYPE_CHECKING
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import Case, DateTimeField, Q, Value, When
+from django.utils import timezone
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
 
 if TYPE_CHECKING:
-    from core.models import Address, Package, ShippingProvider
+    from core.models import Address, Package, ShippingProvider, UploadClaim
+
+# Rows deleted per statement, to stay within database parameter limits
+DELETE_BATCH_SIZE = 500
+
+# Key of the PostgreSQL advisory lock taken to record order changes
+CHANGE_FEED_LOCK_ID = 0x6F726465
+
+# When this process last deleted the expired entries of the order change feed
+_changes_pruned_at: Optional[float] = None
+
+
+def _batches(ids: Iterable[int]) -> Iterator[List[int]]:
+    ids = sorted(ids)
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        yield ids[start : start + DELETE_BATCH_SIZE]
+
+
+def delete_unused_related(
+    addresses: Iterable[int], parties: Iterable[int], packages: Iterable[int]
+):
+    """
+    Delete the given addresses, parties and packages unless orders use them.
+    Saved addresses and packages (is_user_created) are always kept.
+    """
+    from core.models import Address, OrderParty, Package
+
+    for ids in _batches(addresses):
+        Address.objects.filter(id__in=ids, is_user_created=False).exclude(
+            Q(sent_orders__isnull=False) | Q(received_orders__isnull=False)
+        ).delete()
+    for ids in _batches(parties):
+        OrderParty.objects.filter(id__in=ids).exclude(
+            Q(sent_orders__isnull=False) | Q(received_orders__isnull=False)
+        ).delete()
+    for ids in _batches(packages):
+        Package.objects.filter(id__in=ids, is_user_created=False).exclude(
+            order__isnull=False
+        ).delete()
 
 
 class OrderQuerySet(models.QuerySet):
     def update_package(self, package: "Package") -> int:
-        return self.update(package=package)
+        return self._update_with_summaries(package=package)
 
     def update_from_address(self, address: "Address") -> int:
-        return self.update(from_address=address)
+        return self._update_with_summaries(from_address=address)
 
     def update_shipping_provider(self, provider: "ShippingProvider") -> int:
-        return self.update(shipping_provider=provider)
+        return self._update_with_summaries(shipping_provider=provider)
+
+    def _update_with_summaries(self, **kwargs) -> int:
+        # The queryset is evaluated again to refresh the summaries, so it must
+        # not filter on the fields being updated.
+        with transaction.atomic(using=self.db):
+            count = self.update(**kwargs)
+            self.refresh_summaries()
+        return count
+
+    def delete(self):
+        from core.models import OrderChange
+
+        with transaction.atomic(using=self.db):
+            self.record_changes(OrderChange.Kind.DELETED)
+            return super().delete()
+
+    def delete_with_related(self) -> int:
+        """
+        Delete the orders in this queryset, along with the addresses, parties and
+        packages that imports created for them, unless other orders use them.
+        Returns the number of orders deleted.
+        """
+        addresses, parties, packages = set(), set(), set()
+        for from_address, to_address, sender, recipient, package in self.values_list(
+            "from_address_id",
+            "to_address_id",
+            "sender_id",
+            "recipient_id",
+            "package_id",
+        ):
+            addresses.update((from_address, to_address))
+            parties.update((sender, recipient))
+            packages.add(package)
+
+        with transaction.atomic(using=self.db):
+            _, deleted = self.delete()
+            delete_unused_related(addresses, parties, packages)
+        return deleted.get(self.model._meta.label, 0)
+
+    def refresh_summaries(self):
+        """
+        Rewrite the OrderSummary rows of the orders in this queryset from the
+        normalized tables, with a DELETE and a single INSERT ... SELECT, and
+        record the orders as created or updated in the order change feed. The
+        queryset is evaluated by each of them, so it must not filter on the
+        summaries.
+        """
+        from core.models import OrderSummary
+
+        sources = OrderSummary.sources()
+        orders = self.order_by()
+        select_sql, params = orders.values_list(
+            *sources.values()
+        ).query.sql_with_params()
+        columns = ", ".join(
+            connections[self.db].ops.quote_name(column) for column in sources
+        )
+
+        with transaction.atomic(using=self.db):
+            orders.record_changes()
+            OrderSummary.objects.using(self.db).filter(
+                order__in=orders.values("id")
+            ).delete()
+            with connections[self.db].cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {OrderSummary._meta.db_table} ({columns}) {select_sql}",
+                    params,
+                )
+
+    def record_changes(self, kind: Optional[str] = None):
+        """
+        Add an entry for each order in this queryset to the order change feed
+        (see OrderChange), with a single INSERT ... SELECT. Unless a kind is
+        given, orders that have a summary are recorded as updated and the others
+        as created, so this must run before their summaries are refreshed.
+        """
+        from core.models import OrderChange
+
+        if kind is None:
+            kind = Case(
+                When(summary__isnull=True, then=Value(OrderChange.Kind.CREATED)),
+                default=Value(OrderChange.Kind.UPDATED),
+            )
+        else:
+            kind = Value(kind)
+        select_sql, params = (
+            self.order_by()
+            .values_list(
+                "id",
+                "job_id",
+                kind,
+                Value(timezone.now(), output_field=DateTimeField()),
+            )
+            .query.sql_with_params()
+        )
+        connection = connections[self.db]
+        columns = ", ".join(
+            connection.ops.quote_name(column)
+            for column in ("order_id", "job_id", "kind", "created_at")
+        )
+
+        changes = OrderChange.objects.using(self.db)
+        with transaction.atomic(using=self.db), connection.cursor() as cursor:
+            changes.lock()
+            cursor.execute(
+                f"INSERT INTO {OrderChange._meta.db_table} ({columns}) {select_sql}",
+                params,
+            )
+        changes.prune_if_due()
+
+
+class OrderChangeQuerySet(models.QuerySet):
+    def lock(self):
+        """
+        On PostgreSQL, take the lock that transactions recording order changes
+        hold until they commit. Entries are numbered when they are inserted, so
+        transactions recording changes concurrently could commit them out of
+        order, and clients that already fetched the later entries would skip the
+        earlier ones. On SQLite, transactions already write one at a time.
+        """
+        connection = connections[self.db]
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_advisory_xact_lock(%s)", [CHANGE_FEED_LOCK_ID]
+                )
+
+    def record(self, orders: Iterable[Tuple[int, Optional[int]]], kind: str):
+        """
+        Add an entry of the given kind for each (order ID, job ID) pair to the
+        order change feed, with a single INSERT, e.g. for orders that have been
+        deleted already.
+        """
+        now = timezone.now()
+        with transaction.atomic(using=self.db):
+            self.lock()
+            self.bulk_create(
+                [
+                    self.model(
+                        order_id=order_id, job_id=job_id, kind=kind, created_at=now
+                    )
+                    for order_id, job_id in orders
+                ]
+            )
+        self.prune_if_due()
+
+    def expired(self) -> "OrderChangeQuerySet":
+        """The entries older than ORDER_CHANGE_RETENTION."""
+        cutoff = timezone.now() - timedelta(seconds=settings.ORDER_CHANGE_RETENTION)
+        return self.filter(created_at__lt=cutoff)
+
+    def prune_if_due(self) -> int:
+        """
+        Delete the expired entries, if this process hasn't done so in the last
+        ORDER_CHANGE_PRUNE_INTERVAL seconds, rather than on every write. Returns
+        the number of entries deleted.
+        """
+        global _changes_pruned_at
+        now = time.monotonic()
+        interval = settings.ORDER_CHANGE_PRUNE_INTERVAL
+        if _changes_pruned_at is not None and now - _changes_pruned_at < interval:
+            return 0
+        _changes_pruned_at = now
+        deleted, _ = self.expired().delete()
+        return deleted
 
 
 class AddressQuerySet(models.QuerySet):
@@ -24,3 +232,27 @@ class AddressQuerySet(models.QuerySet):
 class PackageQuerySet(models.QuerySet):
     def user_created(self):
         return self.filter(is_user_created=True)
+
+
+class UploadClaimQuerySet(models.QuerySet):
+    def claim(self, key: str, window: int) -> Tuple["UploadClaim", bool]:
+        """
+        Claim an upload by its key before processing it, committing the claim
+        right away so that concurrent requests see it. Returns the claim and
+        whether it was created, or else the existing one, which has no job while
+        the upload it belongs to is still being processed. Claims older than
+        `window` seconds are released first.
+        """
+        cutoff = timezone.now() - timedelta(seconds=window)
+        while True:
+            with transaction.atomic():
+                self.filter(key=key, created_at__lt=cutoff).delete()
+            try:
+                with transaction.atomic():
+                    return self.create(key=key), True
+            except IntegrityError:
+                pass
+            existing = self.filter(key=key).first()
+            if existing is not None:
+                return existing, False
+            # Released in between, by the upload that held it failing
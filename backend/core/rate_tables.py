@@ -0,0 +1,204 @@
+"""
+Zone-based rate tables for shipping providers. A rate table is a directory in
+RATE_TABLE_DIR holding two CSV files:
+
+- zones.csv maps ranges of origin and destination ZIP prefixes (the first three
+  digits of a ZIP code) to a zone, with the columns
+  origin_first,origin_last,destination_first,destination_last,zone
+- rates.csv holds the price of a shipment by weight break and zone: a max_weight
+  column (in pounds, increasing) followed by one column per zone, named after it
+
+Tables are loaded into flat Polars series that are indexed by position, so that
+the costs of a whole job are computed in one vectorized pass (see cost_cents()).
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable
+
+from django.conf import settings
+
+if TYPE_CHECKING:
+    import polars as pl
+
+# Number of distinct ZIP prefixes, 000 to 999
+PREFIX_COUNT = 1000
+
+# Zones are stored as UInt8
+MAX_ZONE = 255
+
+# Distinct tables (and versions of them) kept loaded
+RATE_TABLE_CACHE_SIZE = 32
+
+
+@dataclass(frozen=True)
+class RateTable:
+    name: str
+    # Zone of each (origin prefix * PREFIX_COUNT + destination prefix), or null
+    zones: "pl.Series"
+    # Column of each zone in rates, or null for zones without rates
+    zone_columns: "pl.Series"
+    # Increasing max weights of the weight breaks, in pounds
+    weight_breaks: "pl.Series"
+    # Price in cents of each (weight break * zone count + zone column)
+    rates: "pl.Series"
+    zone_count: int
+
+    def cost_cents(
+        self, weight: "pl.Expr", origin_zip: "pl.Expr", destination_zip: "pl.Expr"
+    ) -> "pl.Expr":
+        """
+        The price in cents of shipping packages of a billable weight (in pounds)
+        between two ZIP codes, or null if there is no zone between the ZIP codes,
+        no rate for the zone or the package is over the heaviest weight break.
+        """
+        import polars as pl
+
+        zone = pl.lit(self.zones).gather(
+            zip_prefix(origin_zip) * PREFIX_COUNT + zip_prefix(destination_zip)
+        )
+        column = pl.lit(self.zone_columns).gather(zone)
+        weight_break = pl.lit(self.weight_breaks).search_sorted(weight, side="left")
+        weight_break = pl.when(weight_break < self.weight_breaks.len()).then(
+            weight_break
+        )
+        return pl.lit(self.rates).gather(
+            weight_break.cast(pl.UInt32) * self.zone_count + column
+        )
+
+
+def table_cost_cents(tables: Dict[str, RateTable]) -> "pl.Expr":
+    """
+    The price in cents of orders (rows with the columns of OrderSummary) under
+    the rate table of their provider, or null for orders of providers without one.
+    The billable weight must be a float.
+    """
+    import polars as pl
+
+    cost = pl.lit(None, dtype=pl.Int64)
+    for name, table in tables.items():
+        cost = (
+            pl.when(pl.col("shipping_provider_rate_table") == name)
+            .then(
+                table.cost_cents(
+                    pl.col("package_billable_weight"),
+                    pl.col("from_address_zip_code"),
+                    pl.col("to_address_zip_code"),
+                )
+            )
+            .otherwise(cost)
+        )
+    return cost
+
+
+def zip_prefix(zip_code: "pl.Expr") -> "pl.Expr":
+    """The first three digits of ZIP codes as numbers, or null if not digits."""
+    import polars as pl
+
+    return zip_code.str.slice(0, 3).cast(pl.UInt32, strict=False)
+
+
+def rate_table_path(name: str) -> Path:
+    if not name or Path(name).name != name or name.startswith("."):
+        raise ValueError(f"Invalid rate table name: {name!r}.")
+    return Path(settings.RATE_TABLE_DIR) / name
+
+
+def load_rate_table(name: str) -> RateTable:
+    """
+    Load a rate table from RATE_TABLE_DIR. Tables are kept loaded until their
+    files change. Raises ValueError if the table is missing or invalid.
+    """
+    path = rate_table_path(name)
+    zones_path, rates_path = path / "zones.csv", path / "rates.csv"
+    try:
+        versions = (zones_path.stat().st_mtime_ns, rates_path.stat().st_mtime_ns)
+    except FileNotFoundError:
+        raise ValueError(f"Rate table {name!r} not found in {path.parent}.")
+    return _load_rate_table(name, zones_path, rates_path, versions)
+
+
+def load_rate_tables(names: Iterable[str]) -> Dict[str, RateTable]:
+    return {name: load_rate_table(name) for name in set(names) if name}
+
+
+@lru_cache(maxsize=RATE_TABLE_CACHE_SIZE)
+def _load_rate_table(
+    name: str, zones_path: Path, rates_path: Path, versions: tuple
+) -> RateTable:
+    import polars as pl
+
+    try:
+        zones = pl.read_csv(
+            zones_path,
+            schema={
+                "origin_first": pl.UInt32,
+                "origin_last": pl.UInt32,
+                "destination_first": pl.UInt32,
+                "destination_last": pl.UInt32,
+                "zone": pl.UInt8,
+            },
+        )
+        rates = pl.read_csv(rates_path, infer_schema=False)
+    except (pl.exceptions.PolarsError, OSError) as e:
+        raise ValueError(f"Rate table {name!r} can't be read: {e}")
+
+    bounds = ["origin_first", "origin_last", "destination_first", "destination_last"]
+    if zones.select(pl.any_horizontal(pl.col(bounds) >= PREFIX_COUNT).any()).item():
+        raise ValueError(f"Rate table {name!r} has ZIP prefixes over 999.")
+
+    # Expand the ranges into one row per (origin, destination) pair, then write
+    # their zones into a flat array with an entry for every pair
+    pairs = (
+        zones.with_columns(
+            origin=pl.int_ranges("origin_first", pl.col("origin_last") + 1),
+            destination=pl.int_ranges(
+                "destination_first", pl.col("destination_last") + 1
+            ),
+        )
+        .explode("origin")
+        .explode("destination")
+        .select(
+            index=pl.col("origin").cast(pl.UInt32) * PREFIX_COUNT
+            + pl.col("destination"),
+            zone="zone",
+        )
+    )
+    zone_array = pl.repeat(
+        None, PREFIX_COUNT * PREFIX_COUNT, dtype=pl.UInt8, eager=True
+    ).scatter(pairs["index"], pairs["zone"])
+
+    if "max_weight" not in rates.columns or rates.width < 2:
+        raise ValueError(
+            f"Rate table {name!r} needs a max_weight column and a column per zone."
+        )
+    zone_names = [column for column in rates.columns if column != "max_weight"]
+    if not all(column.isdigit() and int(column) <= MAX_ZONE for column in zone_names):
+        raise ValueError(f"Rate table {name!r} has invalid zone columns.")
+    try:
+        weight_breaks = rates["max_weight"].cast(pl.Float64)
+        # Exact cents, from prices such as 12.5 or 12.50
+        cents = rates.select(
+            (pl.col(zone_names).cast(pl.Decimal(12, 2)) * 100).cast(pl.Int64)
+        )
+    except pl.exceptions.PolarsError as e:
+        raise ValueError(f"Rate table {name!r} has invalid rates: {e}")
+    if (
+        weight_breaks.is_null().any()
+        or not (weight_breaks.diff().drop_nulls() > 0).all()
+    ):
+        raise ValueError(f"Rate table {name!r} max weights must be increasing.")
+
+    zone_columns = pl.repeat(None, MAX_ZONE + 1, dtype=pl.UInt32, eager=True).scatter(
+        [int(zone) for zone in zone_names], list(range(len(zone_names)))
+    )
+    return RateTable(
+        name=name,
+        zones=zone_array,
+        zone_columns=zone_columns,
+        weight_breaks=weight_breaks,
+        # Row-major: all the zones of the first weight break, then the next one
+        rates=cents.select(pl.concat_list(pl.all()).explode()).to_series(),
+        zone_count=len(zone_names),
+    )
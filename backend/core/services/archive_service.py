@@ -0,0 +1,327 @@
+import os
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+from phonenumber_field.modelfields import PhoneNumberField
+
+from core.models import Job, Order, OrderSummary
+from core.rate_tables import load_rate_tables, table_cost_cents
+
+if TYPE_CHECKING:
+    import polars as pl
+
+    from core.services.job_service import JobCost
+
+# Rows read from the database per batch while exporting a job
+EXPORT_BATCH_SIZE = 5000
+
+
+def _polars_dtype(field: models.Field):
+    import polars as pl
+
+    if isinstance(field, (models.ForeignKey, models.IntegerField)):
+        return pl.Int64
+    if isinstance(field, models.BooleanField):
+        return pl.Boolean
+    if isinstance(field, models.DecimalField):
+        return pl.Decimal(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pl.Datetime("us", "UTC")
+    return pl.String
+
+
+class ArchivedOrders:
+    """
+    The archived orders matching a lazy Polars query, as a sequence of unsaved
+    OrderSummary instances. Supports count() and slicing, so it can be paginated
+    like a queryset: only the rows of the requested page are read.
+    """
+
+    def __init__(self, frame: "pl.LazyFrame"):
+        self.frame = frame
+
+    def count(self) -> int:
+        import polars as pl
+
+        return self.frame.select(pl.len()).collect().item()
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, index: slice) -> List[OrderSummary]:
+        start = index.start or 0
+        length = None if index.stop is None else max(0, index.stop - start)
+        rows = self.frame.slice(start, length).collect().iter_rows(named=True)
+        return [OrderSummary(**row) for row in rows]
+
+
+class ArchiveError(Exception):
+    """A job could not be archived consistently."""
+
+
+class ArchiveService:
+    """
+    Moves old jobs out of the order tables into one compressed Parquet file per
+    job, and reads archived orders back from those files.
+
+    Each file holds the OrderSummary rows of a job, which include everything about
+    its orders. Archived orders can be read but not changed. Reads use lazy Polars
+    scans, so filters are pushed down to the Parquet reader and row groups that
+    cannot match (e.g. by order ID) are skipped.
+    """
+
+    def __init__(self, directory: Optional[str | Path] = None):
+        self.directory = Path(directory or settings.ORDER_ARCHIVE_DIR)
+
+    def path_for(self, job_id: int) -> Path:
+        return self.directory / f"job-{job_id}.parquet"
+
+    @staticmethod
+    def columns() -> Dict[str, models.Field]:
+        return {field.attname: field for field in OrderSummary._meta.concrete_fields}
+
+    def schema(self) -> Dict[str, object]:
+        return {name: _polars_dtype(field) for name, field in self.columns().items()}
+
+    # Archiving
+
+    def archivable_jobs(self, before: datetime):
+        return Job.objects.filter(archived_at__isnull=True, created_at__lt=before)
+
+    def archive_job(self, job: Job) -> int:
+        """
+        Export the orders of a job to Parquet and delete them, along with the
+        addresses, parties and packages only they refer to. The job itself is kept
+        and marked as archived. Returns the number of orders archived.
+
+        The export and the delete run in one transaction that first locks the job
+        and its orders, so that no order can be added to the job or changed
+        between being exported and being deleted. On SQLite, the transaction
+        holds the database's write lock from the start (transaction_mode
+        IMMEDIATE). Raises ArchiveError if a different number of orders than
+        were exported would be deleted.
+        """
+        path = self.path_for(job.id)
+        partial = path.with_suffix(".parquet.partial")
+        try:
+            with transaction.atomic():
+                # Locking the job blocks inserts of orders that refer to it
+                Job.objects.select_for_update().get(id=job.id)
+                list(
+                    Order.objects.select_for_update()
+                    .filter(job=job)
+                    .values_list("id", flat=True)
+                )
+                frame = self.export_job(job)
+                self.directory.mkdir(parents=True, exist_ok=True)
+                frame.write_parquet(
+                    partial,
+                    compression=settings.ORDER_ARCHIVE_COMPRESSION,
+                    statistics=True,
+                )
+                os.replace(partial, path)
+
+                deleted = self.delete_orders(job)
+                if deleted != frame.height:
+                    raise ArchiveError(
+                        f"Job {job.id}: exported {frame.height} order(s) but "
+                        f"{deleted} would be deleted."
+                    )
+                order_ids = frame["order_id"]
+                job.archived_at = timezone.now()
+                job.archived_min_order_id = order_ids.min()
+                job.archived_max_order_id = order_ids.max()
+                job.save(
+                    update_fields=[
+                        "archived_at",
+                        "archived_min_order_id",
+                        "archived_max_order_id",
+                    ]
+                )
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            path.unlink(missing_ok=True)
+            raise
+        return frame.height
+
+    def export_job(self, job: Job) -> "pl.DataFrame":
+        import polars as pl
+
+        columns = self.columns()
+        schema = self.schema()
+        rows = (
+            OrderSummary.objects.filter(job=job)
+            .order_by("order")
+            .values_list(*columns)
+            .iterator(chunk_size=EXPORT_BATCH_SIZE)
+        )
+        phone_columns = [
+            index
+            for index, field in enumerate(columns.values())
+            if isinstance(field, PhoneNumberField)
+        ]
+
+        batches, batch = [], []
+        for row in rows:
+            if phone_columns:
+                row = list(row)
+                for index in phone_columns:
+                    row[index] = str(row[index]) if row[index] else ""
+            batch.append(row)
+            if len(batch) == EXPORT_BATCH_SIZE:
+                batches.append(pl.DataFrame(batch, schema=schema, orient="row"))
+                batch = []
+        batches.append(pl.DataFrame(batch, schema=schema, orient="row"))
+        return pl.concat(batches)
+
+    def delete_orders(self, job: Job) -> int:
+        return Order.objects.filter(job=job).delete_with_related()
+
+    # Reading
+
+    def scan(self, job_id: int) -> Optional["pl.LazyFrame"]:
+        """Lazily scan the archive of a job. Returns None if it has none."""
+        return self.scan_files([self.path_for(job_id)])
+
+    def scan_files(self, paths: Iterable[Path]) -> Optional["pl.LazyFrame"]:
+        import polars as pl
+
+        paths = [path for path in paths if path.exists()]
+        if not paths:
+            return None
+        # Files written before a column was added to OrderSummary read it as null
+        return pl.scan_parquet(paths, schema=self.schema(), missing_columns="insert")
+
+    def jobs_holding(self, order_id: int) -> List[int]:
+        """
+        The archived jobs whose range of order IDs includes an order: usually
+        only one, as the orders of a job are created together.
+        """
+        return list(
+            Job.objects.filter(archived_at__isnull=False)
+            .filter(
+                # Jobs archived before the ranges were stored may hold any order
+                Q(archived_min_order_id__isnull=True)
+                | Q(
+                    archived_min_order_id__lte=order_id,
+                    archived_max_order_id__gte=order_id,
+                )
+            )
+            .values_list("id", flat=True)
+        )
+
+    def get_order(
+        self, order_id: int, job_ids: Optional[Iterable[int]] = None
+    ) -> Optional[OrderSummary]:
+        """
+        An archived order, read from the archives of the given jobs, by default
+        those of jobs_holding() the order, rather than from every archive file.
+        """
+        import polars as pl
+
+        if job_ids is None:
+            job_ids = self.jobs_holding(order_id)
+        frame = self.scan_files(self.path_for(job_id) for job_id in job_ids)
+        if frame is None:
+            return None
+        orders = ArchivedOrders(frame.filter(pl.col("order_id") == order_id))[:1]
+        return orders[0] if orders else None
+
+    def find_orders(
+        self,
+        job_id: int,
+        contains: Optional[Dict[str, str]] = None,
+        search_terms: Iterable[str] = (),
+        search_columns: Iterable[str] = (),
+    ) -> ArchivedOrders:
+        """
+        The archived orders of a job, ordered by ID. `contains` maps columns to
+        values they must contain, and every search term must be contained in at
+        least one of `search_columns`. Matching is case-insensitive, like icontains.
+        """
+        import polars as pl
+
+        frame = self.scan(job_id)
+        if frame is None:
+            return ArchivedOrders(pl.DataFrame(schema=self.schema()).lazy())
+
+        def icontains(column: str, value: str) -> "pl.Expr":
+            return (
+                pl.col(column)
+                .cast(pl.String)
+                .str.to_lowercase()
+                .str.contains(value.lower(), literal=True)
+            )
+
+        for column, value in (contains or {}).items():
+            frame = frame.filter(icontains(column, value))
+        search_columns = list(search_columns)
+        for term in search_terms:
+            frame = frame.filter(
+                pl.any_horizontal(icontains(column, term) for column in search_columns)
+            )
+        return ArchivedOrders(frame.sort("order_id"))
+
+    def get_order_ids(self, job_id: int) -> List[int]:
+        frame = self.scan(job_id)
+        if frame is None:
+            return []
+        return frame.select("order_id").sort("order_id").collect()["order_id"].to_list()
+
+    def get_total_cost(self, job_id: int) -> Decimal:
+        """Same as JobService.get_total_cost(), from the archive."""
+        return self.get_cost(job_id).total
+
+    def get_cost(self, job_id: int) -> "JobCost":
+        """Same as JobService.get_cost(), from the archive."""
+        import polars as pl
+
+        from core.services.job_service import JobCost
+
+        frame = self.scan(job_id)
+        if frame is None:
+            return JobCost(total=Decimal("0"), unpriced_order_ids=[])
+        # Archives written before billable weights were stored are costed by
+        # actual weight, as they were at the time. Exact integer arithmetic:
+        # ten-thousandths of a pound times cents per pound.
+        billable_weight = pl.col("package_billable_weight").fill_null(
+            pl.col("package_weight").cast(pl.Decimal(12, 4)) / 16
+        )
+        # Archives written before rate tables were stored have none
+        rate_table = pl.col("shipping_provider_rate_table").fill_null("")
+        total = (
+            frame.filter(
+                pl.col("shipping_provider_cost_per_pound").is_not_null(),
+                rate_table == "",
+            )
+            .select(
+                (
+                    (billable_weight * 10_000).cast(pl.Int64)
+                    * (pl.col("shipping_provider_cost_per_pound") * 100).cast(pl.Int64)
+                ).sum()
+            )
+            .collect()
+            .item()
+        )
+        table_priced = (
+            frame.filter(rate_table != "")
+            .select(
+                "order_id",
+                "shipping_provider_rate_table",
+                pl.col("package_billable_weight").cast(pl.Float64),
+                "from_address_zip_code",
+                "to_address_zip_code",
+            )
+            .collect()
+        )
+        tables = load_rate_tables(table_priced["shipping_provider_rate_table"].unique())
+        table_cost = JobCost.from_cents(
+            table_priced.select("order_id", cents=table_cost_cents(tables))
+        )
+        return table_cost.plus(Decimal(total or 0) / Decimal(10_000 * 100))
@@ -0,0 +1,246 @@
+import csv
+import io
+import json
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Type
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import models, transaction
+from djangorestframework_camel_case.util import camelize
+
+from core.compression import DecompressionError, decompressed
+from core.models import Address, Package
+
+if TYPE_CHECKING:
+    import polars as pl
+
+# Largest value of a PositiveIntegerField on every database backend
+MAX_POSITIVE_INTEGER = 2_147_483_647
+
+# Rows read from the database per batch while exporting
+EXPORT_CHUNK_SIZE = 2000
+
+
+class BulkService:
+    """
+    Imports and exports a user's saved records (the address book or the package
+    presets) in bulk, as CSV files or JSON arrays with one column or key per
+    field in FIELDS. Imported rows are validated column by column with Polars and
+    saved with batched bulk_create in a single transaction, all or nothing. Rows
+    are numbered as in the file: from 2 for CSV (after the header), from 0 for
+    JSON (their index in the array).
+    """
+
+    model: Type[models.Model]
+    FIELDS: Sequence[str] = ()
+
+    def __init__(self):
+        self.errors: Dict[str | int, List[str]] = {}
+        self.df: Optional["pl.DataFrame"] = None
+        self.first_row = 0
+
+    @property
+    def is_valid(self) -> bool:
+        return len(self.errors) == 0
+
+    def _add_general_error(self, error: str):
+        self.errors.setdefault("general", []).append(error)
+
+    def read_csv(self, uploaded_file: UploadedFile):
+        import polars as pl
+
+        try:
+            uploaded_file.seek(0)
+            with decompressed(
+                uploaded_file.file,
+                max_size=settings.UPLOAD_MAX_DECOMPRESSED_SIZE,
+                max_ratio=settings.UPLOAD_MAX_COMPRESSION_RATIO,
+            ) as csv_file:
+                df = pl.read_csv(csv_file, infer_schema=False)
+        except DecompressionError as e:
+            self._add_general_error(str(e))
+            return
+        except Exception:
+            self._add_general_error("The file could not be read as a CSV.")
+            return
+
+        self.first_row = 2
+        self.validate(df.rename(lambda column: column.strip().lower()))
+
+    def read_json(self, items: Any):
+        import polars as pl
+
+        if not isinstance(items, list) or not all(
+            isinstance(item, dict) for item in items
+        ):
+            self._add_general_error("Expected a JSON array of objects.")
+            return
+
+        columns = {key for item in items for key in item}
+        self.first_row = 0
+        self.validate(
+            pl.DataFrame(
+                {
+                    column: [
+                        None if item.get(column) is None else str(item[column])
+                        for item in items
+                    ]
+                    for column in sorted(columns)
+                },
+                schema={column: pl.Utf8 for column in sorted(columns)},
+            )
+        )
+
+    def validate(self, df: "pl.DataFrame"):
+        """Check the columns, then every row, of a frame of strings."""
+        import polars as pl
+
+        unknown = [column for column in df.columns if column not in self.FIELDS]
+        if unknown:
+            self._add_general_error(f"Unknown column(s): {', '.join(unknown)}.")
+        missing = [
+            name
+            for name in self.FIELDS
+            if name not in df.columns and self._required(name)
+        ]
+        if missing:
+            self._add_general_error(f"Missing column(s): {', '.join(missing)}.")
+        if df.height == 0:
+            self._add_general_error("There are no rows to import.")
+        if df.height > settings.BULK_IMPORT_MAX_ROWS:
+            self._add_general_error(
+                f"At most {settings.BULK_IMPORT_MAX_ROWS} rows can be imported at once."
+            )
+        if not self.is_valid:
+            return
+
+        df = df.with_columns(
+            pl.lit(None, dtype=pl.Utf8).alias(name)
+            for name in self.FIELDS
+            if name not in df.columns
+        ).select(pl.col(name).str.strip_chars() for name in self.FIELDS)
+
+        # One column of messages per check, null where the check passes
+        messages = []
+        for name in self.FIELDS:
+            field = self._field(name)
+            column = pl.col(name)
+            if self._required(name):
+                messages.append(
+                    pl.when(column.is_null() | (column == "")).then(
+                        pl.lit(f"{name} is required")
+                    )
+                )
+            if isinstance(field, models.PositiveIntegerField):
+                number = column.cast(pl.Int64, strict=False)
+                messages.append(
+                    pl.when(
+                        (column != "")
+                        & (
+                            number.is_null()
+                            | (number < 0)
+                            | (number > MAX_POSITIVE_INTEGER)
+                        )
+                    ).then(
+                        pl.format(f"{name} must be a whole number, not {{}}", column)
+                    )
+                )
+            elif field.max_length:
+                messages.append(
+                    pl.when(column.str.len_chars() > field.max_length).then(
+                        pl.lit(f"{name} is longer than {field.max_length} characters")
+                    )
+                )
+
+        errors = (
+            df.with_row_index("row", offset=self.first_row)
+            .select("row", errors=pl.concat_list(messages).list.drop_nulls())
+            .filter(pl.col("errors").list.len() > 0)
+        )
+        for row, row_errors in errors.iter_rows():
+            self.errors[row] = row_errors
+
+        if self.is_valid:
+            self.df = df
+
+    def save(self) -> int:
+        """Create the validated records. Returns the number created."""
+        if self.df is None or not self.is_valid:
+            return 0
+
+        import polars as pl
+
+        defaults = {name: self._field(name).get_default() or "" for name in self.FIELDS}
+        df = self.df.with_columns(
+            (
+                pl.col(name).cast(pl.Int64)
+                if isinstance(self._field(name), models.PositiveIntegerField)
+                else pl.when(pl.col(name) != "")
+                .then(pl.col(name))
+                .otherwise(pl.lit(defaults[name]))
+            )
+            for name in self.FIELDS
+        )
+        records = [
+            self.model(**row, is_user_created=True) for row in df.iter_rows(named=True)
+        ]
+        with transaction.atomic():
+            created = self.model.objects.bulk_create(
+                records, batch_size=settings.BULK_IMPORT_BATCH_SIZE
+            )
+        return len(created)
+
+    def export_csv(self, queryset: models.QuerySet) -> Iterator[str]:
+        """Stream the records as CSV, in the format that imports accept."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush() -> str:
+            line = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return line
+
+        writer.writerow(self.FIELDS)
+        yield flush()
+        for row in queryset.values_list(*self.FIELDS).iterator(
+            chunk_size=EXPORT_CHUNK_SIZE
+        ):
+            writer.writerow(row)
+            yield flush()
+
+    def export_json(self, queryset: models.QuerySet) -> Iterator[str]:
+        """
+        Stream the records as a JSON array, with camelCase keys like the rest of
+        the API, in the format that imports accept.
+        """
+        yield "["
+        rows = queryset.values(*self.FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        for index, row in enumerate(rows):
+            yield ("," if index else "") + json.dumps(camelize(row))
+        yield "]"
+
+    def _field(self, name: str) -> models.Field:
+        return self.model._meta.get_field(name)
+
+    def _required(self, name: str) -> bool:
+        field = self._field(name)
+        return not field.blank and not field.has_default()
+
+
+class AddressBulkService(BulkService):
+    model = Address
+    FIELDS = (
+        "name",
+        "address",
+        "address_2",
+        "city",
+        "state",
+        "zip_code",
+        "country",
+    )
+
+
+class PackageBulkService(BulkService):
+    model = Package
+    FIELDS = ("length", "width", "height", "weight", "item_sku")
@@ -0,0 +1,85 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Max
+
+from core.models import OrderChange
+
+
+class ChangesExpired(Exception):
+    """The changes since a sequence number are no longer all kept."""
+
+
+@dataclass
+class OrderChanges:
+    # Sequence number to fetch the next changes from
+    next: int
+    has_more: bool = False
+    created: List[int] = field(default_factory=list)
+    updated: List[int] = field(default_factory=list)
+    deleted: List[int] = field(default_factory=list)
+
+
+class OrderChangeService:
+    """
+    Reads the order change feed (see OrderChange), so that clients showing orders
+    can stay in sync by fetching what changed since the last sequence number they
+    saw instead of refetching whole pages. The changes of an order are collapsed
+    into one: an order that was created and then updated is reported as created,
+    and an order that was created and then deleted isn't reported at all.
+    """
+
+    def __init__(self, job_id: Optional[int] = None):
+        self.changes = OrderChange.objects.all()
+        if job_id is not None:
+            self.changes = self.changes.filter(job_id=job_id)
+
+    def latest(self) -> int:
+        """The sequence number of the latest change, of any job."""
+        return OrderChange.objects.aggregate(seq=Max("seq"))["seq"] or 0
+
+    def get_changes(self, since: int, limit: Optional[int] = None) -> OrderChanges:
+        """
+        The orders created, updated and deleted after the change numbered
+        `since`, read from at most `limit` changes (ORDER_CHANGES_PAGE_SIZE by
+        default). Raises ChangesExpired if some of those changes are no longer
+        kept (see ORDER_CHANGE_RETENTION), in which case clients should refetch
+        the orders instead.
+        """
+        limit = limit or settings.ORDER_CHANGES_PAGE_SIZE
+        latest = self.latest()
+        # Older changes are deleted first, so the change numbered `since` is only
+        # gone if changes after it may be too
+        if since and not OrderChange.objects.filter(seq=since).exists():
+            if since <= latest:
+                raise ChangesExpired()
+            return OrderChanges(next=since)
+
+        # Bounded by the latest change, so that when there are no more changes
+        # the next fetch starts after it, even if none of them were of the job
+        rows = list(
+            self.changes.filter(seq__gt=since, seq__lte=latest)
+            .order_by("seq")
+            .values_list("seq", "order_id", "kind")[: limit + 1]
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        # Order -> (first kind, last kind)
+        kinds: Dict[int, Tuple[str, str]] = {}
+        for _, order_id, kind in rows:
+            kinds[order_id] = (kinds.get(order_id, (kind,))[0], kind)
+
+        changes = OrderChanges(
+            next=rows[-1][0] if has_more else latest, has_more=has_more
+        )
+        for order_id, (first, last) in kinds.items():
+            if last == OrderChange.Kind.DELETED:
+                if first != OrderChange.Kind.CREATED:
+                    changes.deleted.append(order_id)
+            elif first == OrderChange.Kind.CREATED:
+                changes.created.append(order_id)
+            else:
+                changes.updated.append(order_id)
+        return changes
@@ -0,0 +1,163 @@
+from typing import Dict, Type
+from uuid import uuid4
+
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from core.models import Address, Job, Order, OrderParty, Package
+
+
+class JobCloneService:
+    """
+    Copies a job and all of its orders into a new job, entirely in the database:
+    every table is copied with a set-based INSERT ... SELECT in one transaction,
+    without loading any order into Python, so that re-shipping a batch doesn't
+    mean uploading, parsing and validating the same file again.
+
+    The addresses, parties and packages of the orders are copied too, unless
+    they are configured to be shared with the original orders. Saved addresses
+    and packages (is_user_created) are always shared, so that the address book
+    and package presets don't fill up with copies.
+
+    New IDs of copied rows are assigned up front into a temporary table mapping
+    each original ID to its copy's, which the orders are then copied through.
+    On PostgreSQL they are drawn from the tables' sequences. On SQLite, they
+    follow the table's largest ID, which is safe as transactions take the write
+    lock when they begin (transaction_mode IMMEDIATE).
+    """
+
+    # Related models, by the Order columns that refer to them
+    RELATED = {
+        Address: ("from_address_id", "to_address_id"),
+        OrderParty: ("sender_id", "recipient_id"),
+        Package: ("package_id",),
+    }
+
+    def __init__(
+        self,
+        job: Job,
+        share_addresses: bool = False,
+        share_parties: bool = False,
+        share_packages: bool = False,
+    ):
+        self.job = job
+        self.shared = {
+            Address: share_addresses,
+            OrderParty: share_parties,
+            Package: share_packages,
+        }
+
+    def clone(self) -> Job:
+        """Copy the job and its orders. Returns the new job."""
+        # Temporary tables are named per call, so that clones run on the same
+        # connection (e.g. nested in one transaction) never share them
+        self.table_suffix = uuid4().hex
+        with transaction.atomic(), connection.cursor() as cursor:
+            new_job = Job.objects.create()
+            id_maps = {
+                model: self._copy_related(cursor, model, columns)
+                for model, columns in self.RELATED.items()
+                if not self.shared[model]
+            }
+            self._copy_orders(cursor, new_job, id_maps)
+            # Dropped now rather than at the end of the session
+            for id_map in id_maps.values():
+                cursor.execute(f"DROP TABLE {id_map}")
+            new_job.orders.refresh_summaries()
+        return new_job
+
+    def _copy_related(self, cursor, model: Type[models.Model], columns) -> str:
+        """
+        Copy the rows of a related model that the job's orders refer to. Returns
+        the name of the temporary table mapping their IDs to their copies'.
+        """
+        table = model._meta.db_table
+        id_map = f"job_clone_{model._meta.model_name}_ids_{self.table_suffix}"
+        referenced = " UNION ".join(
+            f"SELECT {column} FROM {Order._meta.db_table} WHERE job_id = %s"
+            for column in columns
+        )
+        shared = ""
+        if hasattr(model, "is_user_created"):
+            shared = "AND NOT is_user_created"
+        cursor.execute(
+            f"""
+            CREATE TEMPORARY TABLE {id_map} AS
+            SELECT id AS old_id, {self._new_ids(table)} AS new_id
+            FROM {table}
+            WHERE id IN ({referenced}) {shared}
+            """,
+            [self.job.id] * len(columns),
+        )
+
+        # Columns computed by the database aren't copied
+        fields = ", ".join(
+            field.column
+            for field in model._meta.concrete_fields
+            if not field.primary_key and not field.generated
+        )
+        cursor.execute(f"""
+            INSERT INTO {table} (id, {fields})
+            SELECT id_map.new_id, {fields}
+            FROM {id_map} id_map JOIN {table} ON {table}.id = id_map.old_id
+            ORDER BY id_map.new_id
+            """)
+        return id_map
+
+    @staticmethod
+    def _new_ids(table: str) -> str:
+        """SQL expression of a new ID for each row of a SELECT from the table."""
+        if connection.vendor == "postgresql":
+            return f"nextval(pg_get_serial_sequence('{table}', 'id'))"
+        # The largest ID ever used, as AUTOINCREMENT doesn't reuse deleted IDs
+        return f"""(
+            SELECT MAX(id) FROM (
+                SELECT MAX(id) AS id FROM {table}
+                UNION ALL SELECT seq FROM sqlite_sequence WHERE name = '{table}'
+            )
+        ) + ROW_NUMBER() OVER (ORDER BY id)"""
+
+    def _copy_orders(self, cursor, new_job: Job, id_maps: Dict[type, str]):
+        order_table = Order._meta.db_table
+        values, joins = {}, []
+        for model, columns in self.RELATED.items():
+            if model not in id_maps:
+                continue
+            for column in columns:
+                # Rows that weren't copied (shared ones) are kept
+                joins.append(
+                    f"LEFT JOIN {id_maps[model]} {column}_map "
+                    f"ON {column}_map.old_id = {order_table}.{column}"
+                )
+                values[column] = (
+                    f"COALESCE({column}_map.new_id, {order_table}.{column})"
+                )
+
+        select, params = [], []
+        for field in Order._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            if field.column == "job_id":
+                select.append("%s")
+                params.append(new_job.id)
+            elif field.column == "created_at":
+                select.append("%s")
+                params.append(connection.ops.adapt_datetimefield_value(timezone.now()))
+            else:
+                select.append(values.get(field.column, f"{order_table}.{field.column}"))
+        columns = ", ".join(
+            field.column
+            for field in Order._meta.concrete_fields
+            if not field.primary_key
+        )
+        select, joins = ", ".join(select), " ".join(joins)
+        cursor.execute(
+            f"""
+            INSERT INTO {order_table} ({columns})
+            SELECT {select}
+            FROM {order_table} {joins}
+            WHERE {order_table}.job_id = %s
+            ORDER BY {order_table}.id
+            """,
+            params + [self.job.id],
+        )
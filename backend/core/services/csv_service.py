@@ -1,9 +1,18 @@
 import abc
-import polars as pl
-from typing import List, Tuple, Dict, Any
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple, Dict, Any
+from django.conf import settings
 from django.core.files.uploadedfile import UploadedFile
-from core.models import Order, OrderParty, Package, Address, Job, ShippingProvider
-from core.utils import lbs_oz_to_oz
+from django.db import transaction
+from core.compression import DecompressionError, decompressed
+from core.models import Order, Job, ShippingProvider
+from core.services.order_import import OrderImporter, UpsertResult
+from core.utils import lbs_oz_to_oz, parse_phone_number
+
+if TYPE_CHECKING:
+    import polars as pl
+    from phonenumber_field.phonenumber import PhoneNumber
 
 VALID_CSV_HEADERS = [
     "from_first_name",
@@ -31,12 +40,17 @@ VALID_CSV_HEADERS = [
     "item_sku",
 ]
 
+ORDER_NUMBER_MAX_LENGTH = Order._meta.get_field("order_number").max_length
+
+# First three digits of a US ZIP code -> the states (or territories) it belongs to
+ZIP_PREFIXES_PATH = Path(__file__).resolve().parent.parent / "data" / "zip_prefixes.csv"
+
 
 class ValidationGate(abc.ABC):
     """Base class for all CSV validation rules."""
 
     @abc.abstractmethod
-    def validate(self, data: pl.DataFrame) -> None:
+    def validate(self, data: "pl.DataFrame") -> None:
         """
         Should raise a ValueError with a specific message if validation fails.
         """
@@ -49,6 +63,14 @@ class ValidationGate(abc.ABC):
         """
         return []
 
+    def validate_frame(self, data: "pl.DataFrame") -> Dict[int, List[str]]:
+        """
+        Validate all rows at once. Returns a dict of row_index -> error messages.
+        Override this method for row-level validation that is faster as a
+        vectorized query than row by row.
+        """
+        return {}
+
 
 class DataCompletenessGate(ValidationGate):
     """Validates that required fields have values in each row."""
@@ -69,7 +91,7 @@ class DataCompletenessGate(ValidationGate):
         "height",
     ]
 
-    def validate(self, data: pl.DataFrame) -> None:
+    def validate(self, data: "pl.DataFrame") -> None:
         pass
 
     def validate_row(self, row: Dict[str, Any], row_index: int) -> List[str]:
@@ -88,6 +110,72 @@ class DataCompletenessGate(ValidationGate):
         return errors
 
 
+@lru_cache(maxsize=1)
+def load_zip_prefixes() -> "pl.DataFrame":
+    """
+    The bundled ZIP prefix table, with one row per prefix and the list of states
+    it belongs to. Loaded once per process.
+    """
+    import polars as pl
+
+    ranges = pl.read_csv(ZIP_PREFIXES_PATH, schema_overrides={"state": pl.Utf8})
+    return (
+        ranges.select(
+            pl.int_ranges(pl.col("first"), pl.col("last") + 1).alias("prefix"),
+            "state",
+        )
+        .explode("prefix")
+        .group_by(pl.col("prefix").cast(pl.Utf8).str.zfill(3))
+        .agg(pl.col("state").alias("states"))
+    )
+
+
+class ZipStateGate(ValidationGate):
+    """
+    Validates that the from and to ZIP codes belong to their states, using the
+    bundled ZIP prefix table. ZIP codes that are not 5 digits (optionally with a
+    +4 suffix), or whose prefix is not in the table, are not checked.
+    """
+
+    SIDES = ["from", "to"]
+
+    def validate(self, data: "pl.DataFrame") -> None:
+        pass
+
+    def validate_frame(self, data: "pl.DataFrame") -> Dict[int, List[str]]:
+        import polars as pl
+
+        # One row per (CSV row, side), so that both sides are checked by one join
+        pairs = pl.concat(
+            data.select(
+                (pl.int_range(pl.len()) + 2).alias("row_index"),
+                pl.lit(side).alias("side"),
+                pl.col(f"{side}_zip_code").cast(pl.Utf8).str.strip_chars().alias("zip"),
+                pl.col(f"{side}_state").cast(pl.Utf8).str.strip_chars().alias("state"),
+            )
+            for side in self.SIDES
+        )
+        mismatches = (
+            pairs.filter(pl.col("zip").str.contains(r"^\d{5}(-?\d{4})?$"))
+            .with_columns(pl.col("zip").str.slice(0, 3).alias("prefix"))
+            .join(load_zip_prefixes(), on="prefix")
+            .filter(
+                pl.col("state").is_not_null()
+                & (pl.col("state") != "")
+                & ~pl.col("states").list.contains(pl.col("state").str.to_uppercase())
+            )
+            .sort("row_index", "side")
+        )
+
+        errors: Dict[int, List[str]] = {}
+        for row in mismatches.iter_rows(named=True):
+            errors.setdefault(row["row_index"], []).append(
+                f"ZIP code {row['zip']} ({row['side']}_zip_code) is not in "
+                f"{row['state']} ({row['side']}_state)"
+            )
+        return errors
+
+
 class CSVStructureGate(ValidationGate):
     # EXACT snapshot of columns (from the template CSV) to validate against
     # The 'duplicated_0' suffix is automatically added by Polars when there are duplicate column names
@@ -118,7 +206,7 @@ class CSVStructureGate(ValidationGate):
         "item-sku",
     ]
 
-    def validate(self, df: pl.DataFrame):
+    def validate(self, df: "pl.DataFrame"):
         if len(df.columns) < len(self.REQUIRED_COLUMN_SNAPSHOT):
             raise ValueError(
                 "Invalid Structure: CSV has fewer columns than the required template."
@@ -135,7 +223,7 @@ class CSVValidator:
     def __init__(self, gates: List[ValidationGate]):
         self.gates = gates
 
-    def validate(self, data: pl.DataFrame) -> Tuple[bool, Dict[str, List[str]]]:
+    def validate(self, data: "pl.DataFrame") -> Tuple[bool, Dict[str, List[str]]]:
         errors: Dict[str, List[str]] = {}
 
         for gate in self.gates:
@@ -148,14 +236,17 @@ class CSVValidator:
 
         return len(errors) == 0, errors
 
-    def validate_rows(self, data: pl.DataFrame) -> Dict[int, List[str]]:
+    def validate_rows(self, data: "pl.DataFrame") -> Dict[int, List[str]]:
         """Validate all rows and return a dict of row_index -> errors."""
         errors: Dict[int, List[str]] = {}
         for row_index, row in enumerate(data.iter_rows(named=True), start=2):
             row_errors = self.validate_row(row, row_index)
             if row_errors:
                 errors[row_index] = row_errors
-        return errors
+        for gate in self.gates:
+            for row_index, row_errors in gate.validate_frame(data).items():
+                errors.setdefault(row_index, []).extend(row_errors)
+        return dict(sorted(errors.items()))
 
     def validate_row(self, row: Dict[str, Any], row_index: int) -> List[str]:
         """Validate a single row using all gates."""
@@ -170,6 +261,10 @@ class CSVService:
     def __init__(self, uploaded_csv_file: UploadedFile):
         self.errors: Dict[str | int, List[str]] = {}
         self.df = None
+        self.phone_numbers: Dict[str, "PhoneNumber"] = {}
+
+        # Polars is slow to import, so it is only loaded once a CSV is processed
+        import polars as pl
 
         try:
             uploaded_csv_file.seek(0)
@@ -181,14 +276,23 @@ class CSVService:
                 "order no": pl.Utf8,
                 "item-sku": pl.Utf8,
             }
-            self.df = pl.read_csv(
+            # gzip and zstd compressed uploads are inflated to a temporary file
+            with decompressed(
                 uploaded_csv_file.file,
-                skip_rows=1,
-                schema_overrides=schema_overrides,
-            )
+                max_size=settings.UPLOAD_MAX_DECOMPRESSED_SIZE,
+                max_ratio=settings.UPLOAD_MAX_COMPRESSION_RATIO,
+            ) as csv_file:
+                self.df = pl.read_csv(
+                    csv_file,
+                    skip_rows=1,
+                    schema_overrides=schema_overrides,
+                )
             self.df.columns = [
                 col.strip().lower().replace("*", "") for col in self.df.columns
             ]
+        except DecompressionError as e:
+            self._add_general_error(str(e))
+            return
         except Exception:
             self._add_general_error("The file could not be read as a CSV.")
             return
@@ -203,9 +307,56 @@ class CSVService:
         mapping = {old: new for old, new in zip(self.df.columns, new_names)}
         self.df = self.df.rename(mapping)
 
+        self.validate_rows()
+
+    @classmethod
+    def from_rows(cls, rows: Dict[int, Dict[str, Any]]) -> "CSVService":
+        """
+        Validate rows of an upload that were edited after it failed, without the
+        rest of the file. `rows` maps the row number in the file to the row's values,
+        keyed by VALID_CSV_HEADERS (missing keys are empty). The rows go through the
+        same row-level checks as an uploaded file, and their errors are keyed by the
+        given row numbers.
+        """
+        import polars as pl
+
+        # The file-reading constructor doesn't apply, only the state it sets up
+        service = cls.__new__(cls)
+        service.errors = {}
+        service.phone_numbers = {}
+        service.df = pl.DataFrame(
+            [
+                [
+                    None if row.get(header) is None else str(row[header])
+                    for header in VALID_CSV_HEADERS
+                ]
+                for row in rows.values()
+            ],
+            schema={header: pl.Utf8 for header in VALID_CSV_HEADERS},
+            orient="row",
+        )
+
+        service.validate_rows()
+        # Rows that pass validation can still fail conversion (e.g. a length of
+        # "ten"). Don't repeat that for rows that already have errors.
+        errors = dict(service.errors)
+        service.normalize_rows()
+        service.errors.update(errors)
+
+        row_numbers = list(rows)
+        service.errors = {
+            row_numbers[index - 2]: row_errors
+            for index, row_errors in sorted(service.errors.items())
+        }
+        return service
+
+    def validate_rows(self):
+        """Run the row-level checks on the CSV, and record the errors found."""
         row_errors = self.post_validate()
+        for row_index, errors in self.normalize_phone_numbers().items():
+            row_errors.setdefault(row_index, []).extend(errors)
         if row_errors:
-            self.errors.update(row_errors)
+            self.errors.update(dict(sorted(row_errors.items())))
 
     def _add_general_error(self, error: str):
         if "general" not in self.errors:
@@ -227,13 +378,127 @@ class CSVService:
         """
         Post-validation step to check row-level data integrity.
         """
-        csv_validator = CSVValidator([DataCompletenessGate()])
+        gates: List[ValidationGate] = [DataCompletenessGate()]
+        if settings.CSV_VALIDATE_ZIP_STATE:
+            gates.append(ZipStateGate())
+        csv_validator = CSVValidator(gates)
         return csv_validator.validate_rows(self.df)
 
-    def create_orders(self) -> List[Order]:
+    def normalize_phone_numbers(self) -> Dict[int, List[str]]:
+        """
+        Replace the phone numbers in the CSV with their E.164 form, and return the
+        row errors for invalid ones. Each distinct number is parsed once (see
+        parse_phone_number), and the parsed numbers are kept in `phone_numbers` so
+        that the imported orders don't parse them again.
+        """
+        import polars as pl
+
+        region = settings.PHONENUMBER_DEFAULT_REGION
+        columns = ["phone_number", "phone_number_2"]
+        self.df = self.df.with_columns(
+            pl.col(column).cast(pl.Utf8).str.strip_chars().fill_null("")
+            for column in columns
+        )
+
+        # Distinct value -> E.164 form, or None if invalid
+        e164: Dict[str, Optional[str]] = {"": ""}
+        distinct = pl.concat([self.df[column] for column in columns]).unique()
+        for value in distinct:
+            if not value:
+                continue
+            phone_number = parse_phone_number(value, region)
+            if phone_number is None:
+                e164[value] = None
+            else:
+                e164[value] = phone_number.as_e164
+                self.phone_numbers[phone_number.as_e164] = phone_number
+
+        normalized = self.df.select(
+            pl.col(column).replace_strict(e164, return_dtype=pl.Utf8)
+            for column in columns
+        )
+        invalid = (
+            self.df.select(columns)
+            .with_row_index("row_index", offset=2)
+            .filter(
+                pl.any_horizontal(normalized[column].is_null() for column in columns)
+            )
+        )
+        self.df = self.df.with_columns(
+            pl.coalesce(normalized[column], pl.col(column)).alias(column)
+            for column in columns
+        )
+
+        errors: Dict[int, List[str]] = {}
+        for row in invalid.iter_rows(named=True):
+            for column in columns:
+                if e164[row[column]] is None:
+                    errors.setdefault(row["row_index"], []).append(
+                        f"Invalid phone number {row[column]} ({column})"
+                    )
+        return errors
+
+    def normalize_rows(self) -> List[Dict[str, Any]]:
+        """
+        Convert the validated CSV rows into flat dicts of model field values (see
+        ORDER_ROW_FIELDS). Rows that cannot be converted are recorded as row errors.
+        """
+        rows = []
+        for row_index, row in enumerate(self.df.iter_rows(named=True), start=2):
+            try:
+                weight_lbs = int(row["weight_lbs"]) if row["weight_lbs"] else 0
+                weight_oz = int(row["weight_oz"]) if row["weight_oz"] else 0
+                order_number = (row["order_number"] or "").strip()
+                if len(order_number) > ORDER_NUMBER_MAX_LENGTH:
+                    raise ValueError(
+                        f"order_number is longer than {ORDER_NUMBER_MAX_LENGTH} characters"
+                    )
+
+                rows.append(
+                    {
+                        "from_name": f"{row['from_first_name'] or ''} {row['from_last_name'] or ''}".strip(),
+                        "from_address": row["from_address"],
+                        "from_address_2": row["from_address_2"] or "",
+                        "from_city": row["from_city"],
+                        "from_state": row["from_state"],
+                        "from_zip_code": row["from_zip_code"],
+                        "to_name": f"{row['to_first_name'] or ''} {row['to_last_name'] or ''}".strip(),
+                        "to_address": row["to_address"],
+                        "to_address_2": row["to_address_2"] or "",
+                        "to_city": row["to_city"],
+                        "to_state": row["to_state"],
+                        "to_zip_code": row["to_zip_code"],
+                        "sender_first_name": row["from_first_name"],
+                        "sender_last_name": row["from_last_name"] or "",
+                        "recipient_first_name": row["to_first_name"],
+                        "recipient_last_name": row["to_last_name"] or "",
+                        "length": int(row["length"]),
+                        "width": int(row["width"]),
+                        "height": int(row["height"]),
+                        "weight": lbs_oz_to_oz(weight_lbs, weight_oz),
+                        "item_sku": row["item_sku"] or "",
+                        "phone_number": self.phone_numbers.get(row["phone_number"], ""),
+                        "phone_number_2": self.phone_numbers.get(
+                            row["phone_number_2"], ""
+                        ),
+                        "order_number": order_number,
+                    }
+                )
+            except (ValueError, TypeError, KeyError) as e:
+                if row_index not in self.errors:
+                    self.errors[row_index] = []
+                self.errors[row_index].append(f"Invalid data - {e}")
+        return rows
+
+    def create_orders(
+        self, content_hash: str = "", idempotency_key: str = ""
+    ) -> List[Order]:
         """
         Create Order instances from the validated CSV data.
         Returns an empty list if there are any errors.
+
+        The content hash and idempotency key are stored on the created Job so
+        that retried uploads can be matched to it later.
         """
         if not self.is_valid:
             return []
@@ -244,104 +509,61 @@ class CSVService:
             self._add_general_error("Default shipping provider not found.")
             return []
 
-        from_addresses = []
-        to_addresses = []
-        senders = []
-        recipients = []
-        packages = []
-
-        for row_index, row in enumerate(self.df.iter_rows(named=True), start=2):
-            try:
-                from_name = f"{row['from_first_name'] or ''} {row['from_last_name'] or ''}".strip()
-                from_addresses.append(
-                    Address(
-                        name=from_name,
-                        address=row["from_address"],
-                        address_2=row["from_address_2"] or "",
-                        city=row["from_city"],
-                        state=row["from_state"],
-                        zip_code=row["from_zip_code"],
-                        is_user_created=False,
-                    )
-                )
+        rows = self.normalize_rows()
+        if not self.is_valid:
+            return []
 
-                to_name = (
-                    f"{row['to_first_name'] or ''} {row['to_last_name'] or ''}".strip()
-                )
-                to_addresses.append(
-                    Address(
-                        name=to_name,
-                        address=row["to_address"],
-                        address_2=row["to_address_2"] or "",
-                        city=row["to_city"],
-                        state=row["to_state"],
-                        zip_code=row["to_zip_code"],
-                        is_user_created=False,
-                    )
+        try:
+            with transaction.atomic():
+                job = Job.objects.create(
+                    content_hash=content_hash, idempotency_key=idempotency_key
                 )
+                importer = OrderImporter.for_connection(job, shipping_provider)
+                return importer.import_rows(rows)
+        except Exception as e:
+            self._add_general_error(f"Failed to save orders to database: {e}")
+            return []
 
-                senders.append(
-                    OrderParty(
-                        first_name=row["from_first_name"],
-                        last_name=row["from_last_name"] or "",
-                    )
-                )
+    def upsert_orders(self, job: Job) -> Optional[UpsertResult]:
+        """
+        Import the validated CSV data into an existing job, matching rows to its
+        orders by order number (see OrderImporter.upsert_rows). Every row must have
+        an order number, unique within the file. Returns None if there are any
+        errors.
+        """
+        if not self.is_valid:
+            return None
 
-                recipients.append(
-                    OrderParty(
-                        first_name=row["to_first_name"],
-                        last_name=row["to_last_name"] or "",
+        try:
+            shipping_provider = ShippingProvider.objects.get(id=2)
+        except ShippingProvider.DoesNotExist:
+            self._add_general_error("Default shipping provider not found.")
+            return None
+
+        rows = self.normalize_rows()
+        seen: Dict[str, int] = {}
+        # Rows that failed to normalize are missing from rows, so the row numbers
+        # are only meaningful when there were no such errors
+        if self.is_valid:
+            for row_index, row in enumerate(rows, start=2):
+                order_number = row["order_number"]
+                if not order_number:
+                    self.errors.setdefault(row_index, []).append(
+                        "order_number is required when updating a job"
                     )
-                )
-
-                weight_lbs = int(row["weight_lbs"]) if row["weight_lbs"] else 0
-                weight_oz = int(row["weight_oz"]) if row["weight_oz"] else 0
-                total_weight_oz = lbs_oz_to_oz(weight_lbs, weight_oz)
-
-                packages.append(
-                    Package(
-                        length=int(row["length"]),
-                        width=int(row["width"]),
-                        height=int(row["height"]),
-                        weight=total_weight_oz,
-                        item_sku=row["item_sku"] or "",
-                        is_user_created=False,
+                elif order_number in seen:
+                    self.errors.setdefault(row_index, []).append(
+                        f"Duplicate order_number {order_number} (also on row "
+                        f"{seen[order_number]})"
                     )
-                )
-            except (ValueError, TypeError, KeyError) as e:
-                if row_index not in self.errors:
-                    self.errors[row_index] = []
-                self.errors[row_index].append(f"Invalid data - {e}")
-
+                else:
+                    seen[order_number] = row_index
         if not self.is_valid:
-            return []
+            return None
 
         try:
-            job = Job.objects.create()
-            from_addresses = Address.objects.bulk_create(from_addresses)
-            to_addresses = Address.objects.bulk_create(to_addresses)
-            senders = OrderParty.objects.bulk_create(senders)
-            recipients = OrderParty.objects.bulk_create(recipients)
-            packages = Package.objects.bulk_create(packages)
-
-            orders = []
-            for i, row in enumerate(self.df.iter_rows(named=True)):
-                orders.append(
-                    Order(
-                        job=job,
-                        shipping_provider=shipping_provider,
-                        sender=senders[i],
-                        recipient=recipients[i],
-                        from_address=from_addresses[i],
-                        to_address=to_addresses[i],
-                        package=packages[i],
-                        phone_number=row["phone_number"] or "",
-                        phone_number_2=row["phone_number_2"] or "",
-                    )
-                )
-
-            order_instances = Order.objects.bulk_create(orders)
-            return order_instances
+            importer = OrderImporter.for_connection(job, shipping_provider)
+            return importer.upsert_rows(rows)
         except Exception as e:
             self._add_general_error(f"Failed to save orders to database: {e}")
-            return []
+            return None
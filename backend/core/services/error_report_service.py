@@ -0,0 +1,175 @@
+import csv
+import io
+from datetime import timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.utils import timezone
+
+from core.compression import decompressed
+from core.models import ErrorReport
+
+if TYPE_CHECKING:
+    import polars as pl
+
+# Name of the column added to annotated copies of uploads
+ERRORS_COLUMN = "errors"
+
+
+class ErrorReportRows:
+    """
+    The rows of an error report, as dicts of a row number and its errors. Supports
+    count() and slicing, so it can be paginated like a queryset: only the rows of
+    the requested page are read.
+    """
+
+    def __init__(self, frame: "pl.LazyFrame"):
+        self.frame = frame
+
+    def count(self) -> int:
+        import polars as pl
+
+        return self.frame.select(pl.len()).collect().item()
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, index: slice) -> List[Dict[str, Any]]:
+        start = index.start or 0
+        length = None if index.stop is None else max(0, index.stop - start)
+        return self.frame.slice(start, length).collect().to_dicts()
+
+
+class ErrorReportService:
+    """
+    Stores the errors of uploads that failed validation, so that responses only
+    have to include the first few. Each report is a Parquet file with one row per
+    CSV row with errors, sorted by row number, and a copy of the uploaded file (as
+    uploaded, e.g. still compressed) for downloading it annotated with its errors.
+    """
+
+    def __init__(self, directory: Optional[str | Path] = None):
+        self.directory = Path(directory or settings.UPLOAD_ERROR_REPORT_DIR)
+
+    def path_for(self, report: ErrorReport) -> Path:
+        return self.directory / f"{report.id}.parquet"
+
+    def upload_path_for(self, report: ErrorReport) -> Path:
+        return self.directory / f"{report.id}.upload"
+
+    def summarize(
+        self, errors: Dict[str | int, List[str]], uploaded_file: UploadedFile
+    ) -> Dict[str, Any]:
+        """
+        The error payload for a failed upload: its general errors and the errors
+        of its first UPLOAD_ERRORS_IN_RESPONSE rows, with the total number of rows
+        with errors. If any row has errors, all of them are stored in a report,
+        whose ID is included.
+        """
+        row_errors = {key: value for key, value in errors.items() if key != "general"}
+        report = self.create(errors, uploaded_file) if row_errors else None
+
+        shown = sorted(row_errors.items())[: settings.UPLOAD_ERRORS_IN_RESPONSE]
+        general = {"general": errors["general"]} if "general" in errors else {}
+        return {
+            "errors": {**general, **dict(shown)},
+            "error_row_count": len(row_errors),
+            "truncated": len(shown) < len(row_errors),
+            "report": str(report.id) if report is not None else None,
+        }
+
+    def create(
+        self, errors: Dict[str | int, List[str]], uploaded_file: UploadedFile
+    ) -> ErrorReport:
+        import polars as pl
+
+        self.delete_expired()
+
+        row_errors = sorted(
+            (key, value) for key, value in errors.items() if key != "general"
+        )
+        frame = pl.DataFrame(
+            {
+                "row": [row for row, _ in row_errors],
+                "errors": [messages for _, messages in row_errors],
+            },
+            schema={"row": pl.Int64, "errors": pl.List(pl.Utf8)},
+        )
+        report = ErrorReport(
+            file_name=Path(uploaded_file.name or "").name[:255],
+            general_errors=errors.get("general", []),
+            row_count=frame.height,
+            error_count=sum(len(messages) for _, messages in row_errors),
+        )
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        frame.write_parquet(self.path_for(report), compression="zstd")
+        with open(self.upload_path_for(report), "wb") as copy:
+            uploaded_file.seek(0)
+            for chunk in uploaded_file.chunks():
+                copy.write(chunk)
+            uploaded_file.seek(0)
+        report.save()
+        return report
+
+    def rows(self, report: ErrorReport) -> ErrorReportRows:
+        import polars as pl
+
+        return ErrorReportRows(pl.scan_parquet(self.path_for(report)))
+
+    def annotated(self, report: ErrorReport) -> Iterator[str]:
+        """
+        Stream the uploaded file as CSV with an extra column holding the errors of
+        each row, so that it can be fixed and uploaded again.
+        """
+        import polars as pl
+
+        errors = pl.read_parquet(self.path_for(report)).iter_rows()
+        next_row, next_errors = next(errors, (None, None))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush() -> str:
+            line = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return line
+
+        with (
+            open(self.upload_path_for(report), "rb") as upload,
+            decompressed(
+                upload,
+                max_size=settings.UPLOAD_MAX_DECOMPRESSED_SIZE,
+                max_ratio=settings.UPLOAD_MAX_COMPRESSION_RATIO,
+            ) as csv_file,
+        ):
+            text = io.TextIOWrapper(csv_file, encoding="utf-8", newline="")
+            # The first line is ignored by CSVService, the second names the columns,
+            # and data rows are numbered from 2 as in CSVService.errors
+            for index, record in enumerate(csv.reader(text)):
+                if index == 0:
+                    writer.writerow(record + [""])
+                elif index == 1:
+                    writer.writerow(record + [ERRORS_COLUMN])
+                elif index == next_row:
+                    writer.writerow(record + ["; ".join(next_errors)])
+                    next_row, next_errors = next(errors, (None, None))
+                else:
+                    writer.writerow(record + [""])
+                yield flush()
+
+    def delete(self, report: ErrorReport):
+        self.path_for(report).unlink(missing_ok=True)
+        self.upload_path_for(report).unlink(missing_ok=True)
+        report.delete()
+
+    def delete_expired(self):
+        """Delete the reports older than UPLOAD_ERROR_REPORT_RETENTION."""
+        cutoff = timezone.now() - timedelta(
+            seconds=settings.UPLOAD_ERROR_REPORT_RETENTION
+        )
+        for report in ErrorReport.objects.filter(created_at__lt=cutoff):
+            self.delete(report)
@@ -0,0 +1,104 @@
+import hashlib
+import json
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, F, Max, QuerySet, Value, When
+from django.db.models.functions import Cast
+
+# Upper bounds of the weight facet's buckets, in pounds of billable weight
+WEIGHT_BUCKETS = (1, 5, 10, 20, 50, 70)
+
+
+def orders_version() -> int:
+    """
+    The current version of the order data, for cache keys: the sequence number
+    of the latest entry of the order change feed, which every change to the
+    order summaries adds to (see OrderChange). Read from the database rather
+    than kept in the cache, so that it is shared by every process.
+    """
+    from core.models import OrderChange
+
+    return OrderChange.objects.aggregate(version=Max("seq"))["version"] or 0
+
+
+def _weight_bucket():
+    whens, lower = [], 0
+    for upper in WEIGHT_BUCKETS:
+        whens.append(
+            When(
+                package_billable_weight__lte=Decimal(upper),
+                then=Value(f"{lower}-{upper}"),
+            )
+        )
+        lower = upper
+    return Case(*whens, default=Value(f"{lower}+"), output_field=CharField())
+
+
+class FacetService:
+    """
+    Counts the orders of an OrderSummary queryset by destination state, shipping
+    provider, job and weight bucket, for the orders dashboard. All the requested
+    facets are computed in a single query (a UNION ALL of one GROUP BY per facet),
+    and the result is cached until the orders change.
+    """
+
+    # Facet name -> (value, label) expressions over OrderSummary
+    FACETS = {
+        "to_state": (F("to_address_state"), F("to_address_state")),
+        "shipping_provider": (F("shipping_provider_id"), F("shipping_provider_name")),
+        "job": (F("job_id"), F("job_id")),
+        "weight": (_weight_bucket(), _weight_bucket()),
+    }
+
+    CACHE_KEY_PREFIX = "order-facets"
+
+    def __init__(self, queryset: QuerySet):
+        self.queryset = queryset.order_by()
+
+    def get_facets(
+        self, facets: Iterable[str], cache_key: Any = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Count the orders by each of the facets, most common value first. If a
+        cache key is given (describing the queryset, e.g. its filters), the
+        result is cached under it for FACET_CACHE_TIMEOUT seconds.
+        """
+        facets = sorted(set(facets))
+        if cache_key is None:
+            return self.compute(facets)
+
+        digest = hashlib.sha256(
+            json.dumps([cache_key, facets], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        key = f"{self.CACHE_KEY_PREFIX}:{orders_version()}:{digest}"
+        result = cache.get(key)
+        if result is None:
+            result = self.compute(facets)
+            cache.set(key, result, timeout=settings.FACET_CACHE_TIMEOUT)
+        return result
+
+    def compute(self, facets: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        result = {facet: [] for facet in facets}
+        if not facets:
+            return result
+
+        grouped = [
+            self.queryset.values(
+                facet=Value(facet, output_field=CharField()),
+                value=Cast(self.FACETS[facet][0], CharField()),
+                label=Cast(self.FACETS[facet][1], CharField()),
+            ).annotate(count=Count("pk"))
+            for facet in facets
+        ]
+        rows = grouped[0].union(*grouped[1:], all=True)
+
+        for row in rows:
+            result[row["facet"]].append(
+                {"value": row["value"], "label": row["label"], "count": row["count"]}
+            )
+        for values in result.values():
+            values.sort(key=lambda row: (-row["count"], row["value"] or ""))
+        return result
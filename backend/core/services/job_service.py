@@ -1,24 +1,271 @@
+from collections import Counter
+from dataclasses import dataclass
 from decimal import Decimal
+from typing import TYPE_CHECKING, List, Optional
 
-from django.db.models import F, Sum
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
 
-from core.models import Job
+from core.models import Job, OrderSummary, ShippingProvider
+from core.rate_tables import load_rate_tables, table_cost_cents
+from core.services.archive_service import ArchiveService
 
+if TYPE_CHECKING:
+    import polars as pl
 
-OUNCES_PER_POUND = Decimal("16")
+
+# OrderSummary columns that orders are priced from by rate tables
+PRICING_COLUMNS = (
+    "shipping_provider_rate_table",
+    "package_billable_weight",
+    "from_address_zip_code",
+    "to_address_zip_code",
+)
+
+
+@dataclass
+class JobCost:
+    """
+    The cost of shipping the orders of a job with their providers. Orders that
+    the rate table of their provider has no price for (see RateTable.cost_cents)
+    are left out of the total and listed, so that they can be fixed, e.g. by
+    choosing another provider.
+    """
+
+    total: Decimal
+    unpriced_order_ids: List[int]
+
+    @classmethod
+    def from_cents(cls, frame: "pl.DataFrame") -> "JobCost":
+        """The cost of orders from a frame of (order_id, cents) rows."""
+        import polars as pl
+
+        cents = frame["cents"].sum()
+        unpriced = frame.filter(pl.col("cents").is_null())["order_id"]
+        return cls(
+            total=Decimal(cents or 0) / 100,
+            unpriced_order_ids=sorted(unpriced.to_list()),
+        )
+
+    def plus(self, total: Decimal) -> "JobCost":
+        return JobCost(self.total + total, self.unpriced_order_ids)
+
+
+@dataclass
+class ProviderAssignment:
+    """
+    The result of assigning the cheapest providers to the orders of a job: the
+    number of orders updated, and the orders that no provider has a price for,
+    which keep their provider.
+    """
+
+    updated: int
+    unpriced_order_ids: List[int]
 
 
 class JobService:
     def __init__(self, job: Job):
         self.job = job
 
+    def _costed_orders(self):
+        # A sum over one table, read from the (job, rate table, cost, billable
+        # weight) index
+        return OrderSummary.objects.filter(
+            job=self.job,
+            shipping_provider_rate_table="",
+            shipping_provider_cost_per_pound__isnull=False,
+        ).annotate(
+            order_cost=F("package_billable_weight")
+            * F("shipping_provider_cost_per_pound")
+        )
+
+    def _table_priced_orders(self):
+        # Orders whose provider has a rate table (neither blank nor null)
+        return OrderSummary.objects.filter(
+            job=self.job, shipping_provider_rate_table__gt=""
+        ).values_list("order_id", *PRICING_COLUMNS)
+
+    @staticmethod
+    def _table_priced_cost(rows: List[tuple]) -> JobCost:
+        """Cost of orders priced by rate tables, in one vectorized pass."""
+        import polars as pl
+
+        if not rows:
+            return JobCost(total=Decimal("0"), unpriced_order_ids=[])
+        frame = pl.DataFrame(
+            [
+                (order_id, table, float(weight), origin, destination)
+                for order_id, table, weight, origin, destination in rows
+            ],
+            schema={
+                "order_id": pl.Int64,
+                "shipping_provider_rate_table": pl.String,
+                "package_billable_weight": pl.Float64,
+                "from_address_zip_code": pl.String,
+                "to_address_zip_code": pl.String,
+            },
+            orient="row",
+        )
+        tables = load_rate_tables(frame["shipping_provider_rate_table"].unique())
+        return JobCost.from_cents(
+            frame.select("order_id", cents=table_cost_cents(tables))
+        )
+
+    def get_cost(self) -> JobCost:
+        if self.job.archived_at is not None:
+            return ArchiveService().get_cost(self.job.id)
+        result = self._costed_orders().aggregate(total=Sum("order_cost"))
+        table_cost = self._table_priced_cost(list(self._table_priced_orders()))
+        return table_cost.plus(result["total"] or Decimal("0"))
+
+    async def aget_cost(self) -> JobCost:
+        if self.job.archived_at is not None:
+            return await sync_to_async(
+                ArchiveService().get_cost, thread_sensitive=False
+            )(self.job.id)
+        result = await self._costed_orders().aaggregate(total=Sum("order_cost"))
+        rows = [row async for row in self._table_priced_orders()]
+        return self._table_priced_cost(rows).plus(result["total"] or Decimal("0"))
+
     def get_total_cost(self) -> Decimal:
-        result = (
-            self.job.orders.filter(shipping_provider__isnull=False)
-            .annotate(
-                order_cost=(F("package__weight") / OUNCES_PER_POUND)
-                * F("shipping_provider__cost_per_pound")
+        """The cost of the orders of the job that can be priced (see get_cost)."""
+        return self.get_cost().total
+
+    async def aget_total_cost(self) -> Decimal:
+        return (await self.aget_cost()).total
+
+    def get_rate_matrix(self) -> "pl.DataFrame":
+        """
+        Compute the cost of every order in the job under every shipping provider:
+        from its rate table if it has one, else from the billable weight of the
+        package and the provider's cost per pound. Providers that can't price an
+        order (see RateTable.cost_cents) are left out for that order.
+        Returns a frame with one row per (order_id, provider_id) pair and a
+        Decimal `cost` column, computed exactly like get_total_cost().
+        """
+        import polars as pl
+
+        orders = pl.DataFrame(
+            [
+                (order_id, int(weight * 10_000), float(weight), origin, destination)
+                for order_id, weight, origin, destination in OrderSummary.objects.filter(
+                    job=self.job
+                ).values_list(
+                    "order_id",
+                    "package_billable_weight",
+                    "from_address_zip_code",
+                    "to_address_zip_code",
+                )
+            ],
+            schema={
+                "order_id": pl.Int64,
+                # In ten-thousandths of a pound, to price by cost per pound
+                "billable_weight_e4": pl.Int64,
+                # To look up rate tables' weight breaks
+                "package_billable_weight": pl.Float64,
+                "from_address_zip_code": pl.String,
+                "to_address_zip_code": pl.String,
+            },
+            orient="row",
+        )
+        providers = pl.DataFrame(
+            [
+                (provider_id, int(cost_per_pound * 100), rate_table)
+                for provider_id, cost_per_pound, rate_table in ShippingProvider.objects.values_list(
+                    "id", "cost_per_pound", "rate_table"
+                )
+            ],
+            schema={
+                "provider_id": pl.Int64,
+                "cost_per_pound_cents": pl.Int64,
+                "shipping_provider_rate_table": pl.String,
+            },
+            orient="row",
+        )
+        tables = load_rate_tables(providers["shipping_provider_rate_table"])
+
+        # Exact integer arithmetic in millionths of a dollar: ten-thousandths of
+        # a pound times cents per pound, or the cents of rate tables
+        micros = (
+            pl.when(pl.col("shipping_provider_rate_table") == "")
+            .then(pl.col("billable_weight_e4") * pl.col("cost_per_pound_cents"))
+            .otherwise(table_cost_cents(tables) * 10_000)
+        )
+        return (
+            orders.join(providers, how="cross")
+            .select(
+                "order_id",
+                "provider_id",
+                cost=micros.cast(pl.Decimal(38, 6)) * pl.lit(Decimal("0.000001")),
             )
-            .aggregate(total=Sum("order_cost"))
+            .drop_nulls("cost")
+            .sort("order_id", "provider_id")
         )
-        return result["total"] or Decimal("0")
+
+    def get_provider_totals(
+        self, matrix: Optional["pl.DataFrame"] = None
+    ) -> "pl.DataFrame":
+        """Total cost of the whole job per shipping provider."""
+        import polars as pl
+
+        if matrix is None:
+            matrix = self.get_rate_matrix()
+        return (
+            matrix.group_by("provider_id")
+            .agg(total_cost=pl.col("cost").sum())
+            .sort("provider_id")
+        )
+
+    def get_cheapest_providers(
+        self, matrix: Optional["pl.DataFrame"] = None
+    ) -> "pl.DataFrame":
+        """
+        The cheapest provider for each order. Ties are broken by the lowest provider id
+        so that the result is deterministic.
+        """
+        if matrix is None:
+            matrix = self.get_rate_matrix()
+        return (
+            matrix.sort("order_id", "cost", "provider_id")
+            .group_by("order_id", maintain_order=True)
+            .first()
+        )
+
+    def assign_cheapest_providers(self) -> "ProviderAssignment":
+        """
+        Assign the cheapest shipping provider to every order in the job with a single
+        UPDATE statement. Orders that no provider can price keep their provider and
+        are listed in the result.
+        """
+        cheapest = self.get_cheapest_providers()
+        priced_ids = set(cheapest["order_id"].to_list())
+        unpriced_ids = sorted(
+            set(self.job.orders.values_list("id", flat=True)) - priced_ids
+        )
+        if cheapest.is_empty():
+            return ProviderAssignment(updated=0, unpriced_order_ids=unpriced_ids)
+
+        orders_by_provider: dict[int, list[int]] = {}
+        for order_id, provider_id in cheapest.select(
+            "order_id", "provider_id"
+        ).iter_rows():
+            orders_by_provider.setdefault(provider_id, []).append(order_id)
+
+        # The most common choice becomes the CASE default so that only the
+        # exceptions have to be listed, keeping the statement small.
+        default_provider_id, _ = Counter(
+            {pid: len(ids) for pid, ids in orders_by_provider.items()}
+        ).most_common(1)[0]
+        whens = [
+            When(id__in=order_ids, then=Value(provider_id))
+            for provider_id, order_ids in orders_by_provider.items()
+            if provider_id != default_provider_id
+        ]
+
+        with transaction.atomic():
+            count = self.job.orders.exclude(id__in=unpriced_ids).update(
+                shipping_provider_id=Case(*whens, default=Value(default_provider_id))
+            )
+            self.job.orders.refresh_summaries()
+        return ProviderAssignment(updated=count, unpriced_order_ids=unpriced_ids)
@@ -0,0 +1,170 @@
+import os
+from concurrent.futures import Executor, Future
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+
+from core.labels import (
+    LabelFormat,
+    label_content_hash,
+    render_chunk,
+    stream_pdf,
+    stream_zip,
+)
+from core.models import Job
+
+
+class LabelService:
+    """
+    Renders shipping labels for every order in a job.
+
+    Labels are rendered in chunks across a process pool and yielded in order as
+    soon as each chunk is done. Rendered labels are cached by a hash of the order
+    content, so unchanged orders are never rendered twice.
+    """
+
+    CACHE_ALIAS = "labels"
+    CACHE_KEY_PREFIX = "label"
+
+    LABEL_FIELDS = {
+        "order_id": F("id"),
+        "from_name": F("from_address__name"),
+        "from_street": F("from_address__address"),
+        "from_street_2": F("from_address__address_2"),
+        "from_city": F("from_address__city"),
+        "from_state": F("from_address__state"),
+        "from_zip_code": F("from_address__zip_code"),
+        "to_name": F("to_address__name"),
+        "to_street": F("to_address__address"),
+        "to_street_2": F("to_address__address_2"),
+        "to_city": F("to_address__city"),
+        "to_state": F("to_address__state"),
+        "to_zip_code": F("to_address__zip_code"),
+        "weight": F("package__weight"),
+        "length": F("package__length"),
+        "width": F("package__width"),
+        "height": F("package__height"),
+        "item_sku": F("package__item_sku"),
+        "carrier": F("shipping_provider__name"),
+        "phone": F("phone_number"),
+    }
+
+    def __init__(self, job: Job, label_format: LabelFormat = LabelFormat.PDF):
+        self.job = job
+        self.label_format = LabelFormat(label_format)
+        self.chunk_size = max(1, settings.LABEL_RENDER_CHUNK_SIZE)
+        self.max_workers = settings.LABEL_RENDER_WORKERS or os.cpu_count() or 1
+
+    def get_labels(self) -> List[Dict[str, Any]]:
+        labels = []
+        for row in (
+            self.job.orders.order_by("id").values(**self.LABEL_FIELDS).iterator()
+        ):
+            phone = row.pop("phone")
+            row["phone_number"] = str(phone) if phone else ""
+            labels.append(row)
+        return labels
+
+    def _cache_key(self, label: Dict[str, Any]) -> str:
+        content_hash = label_content_hash(label, self.label_format)
+        return f"{self.CACHE_KEY_PREFIX}:{content_hash}"
+
+    def _submit(
+        self, executor: Optional[Executor], labels: List[Dict[str, Any]]
+    ) -> Future | List[bytes]:
+        if executor is None:
+            return render_chunk(self.label_format, labels)
+        return executor.submit(render_chunk, self.label_format, labels)
+
+    def _render_chunks(
+        self, chunks: List[List[Dict[str, Any]]], executor: Optional[Executor]
+    ) -> Iterator[Tuple[Dict[str, Any], bytes]]:
+        # Keep a bounded number of chunks in flight so that memory use stays flat
+        # regardless of job size, while every worker has something to do.
+        max_in_flight = self.max_workers * 2
+        cache = caches[self.CACHE_ALIAS]
+        pending = []
+        chunk_iter = iter(chunks)
+
+        def schedule_next() -> bool:
+            chunk = next(chunk_iter, None)
+            if chunk is None:
+                return False
+            keys = [self._cache_key(label) for label in chunk]
+            cached = cache.get_many(keys)
+            missing = [label for label, key in zip(chunk, keys) if key not in cached]
+            result = self._submit(executor, missing) if missing else []
+            pending.append((chunk, keys, cached, result))
+            return True
+
+        while len(pending) < max_in_flight and schedule_next():
+            pass
+
+        while pending:
+            chunk, keys, cached, result = pending.pop(0)
+            rendered = result.result() if isinstance(result, Future) else result
+            schedule_next()
+
+            fresh = dict(zip([k for k in keys if k not in cached], rendered))
+            if fresh:
+                cache.set_many(fresh, timeout=settings.LABEL_CACHE_TIMEOUT)
+
+            for label, key in zip(chunk, keys):
+                yield label, cached[key] if key in cached else fresh[key]
+
+    def render(self) -> Iterator[Tuple[Dict[str, Any], bytes]]:
+        """Yield (label, rendered label) pairs in order id order."""
+        labels = self.get_labels()
+        chunks = [
+            labels[i : i + self.chunk_size]
+            for i in range(0, len(labels), self.chunk_size)
+        ]
+
+        # A process pool only pays off when there is more than one chunk to render
+        if len(chunks) <= 1 or self.max_workers <= 1:
+            yield from self._render_chunks(chunks, executor=None)
+            return
+
+        # Deferred: the process pool machinery is only needed for large jobs
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Forking a multi-threaded server process is unsafe, so workers are started
+        # from a clean fork server where the platform supports it.
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("forkserver")
+        else:
+            mp_context = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(
+            max_workers=min(self.max_workers, len(chunks)), mp_context=mp_context
+        )
+        try:
+            yield from self._render_chunks(chunks, executor=executor)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stream(self) -> Iterator[bytes]:
+        """
+        Stream the job's labels as a single merged PDF, or as a zip archive with one
+        ZPL file per order.
+        """
+        if self.label_format == LabelFormat.PDF:
+            return stream_pdf(rendered for _, rendered in self.render())
+
+        return stream_zip(
+            (f"order-{label['order_id']}.zpl", rendered)
+            for label, rendered in self.render()
+        )
+
+    @property
+    def content_type(self) -> str:
+        if self.label_format == LabelFormat.PDF:
+            return "application/pdf"
+        return "application/zip"
+
+    @property
+    def filename(self) -> str:
+        extension = "pdf" if self.label_format == LabelFormat.PDF else "zip"
+        return f"job-{self.job.id}-labels.{extension}"
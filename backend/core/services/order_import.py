@@ -0,0 +1,406 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.db import connection as default_connection
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Address, Job, Order, OrderParty, Package, ShippingProvider
+from core.querysets import delete_unused_related
+
+# Flat, normalized shape of one imported order, as produced by CSVService
+ORDER_ROW_FIELDS = [
+    "from_name",
+    "from_address",
+    "from_address_2",
+    "from_city",
+    "from_state",
+    "from_zip_code",
+    "to_name",
+    "to_address",
+    "to_address_2",
+    "to_city",
+    "to_state",
+    "to_zip_code",
+    "sender_first_name",
+    "sender_last_name",
+    "recipient_first_name",
+    "recipient_last_name",
+    "length",
+    "width",
+    "height",
+    "weight",
+    "item_sku",
+    "phone_number",
+    "phone_number_2",
+    "order_number",
+]
+
+# Order fields referring to the rows created for each imported row
+RELATED_FIELDS = ("from_address", "to_address", "sender", "recipient", "package")
+
+# Orders whose summaries are refreshed per statement after an upsert
+REFRESH_BATCH_SIZE = 5000
+
+
+def row_hash(row: Dict[str, Any]) -> str:
+    """SHA-256 of the values of an order row, to detect changed rows."""
+    values = [
+        # Phone numbers may be given as PhoneNumber instances or as strings
+        getattr(row[field], "as_e164", row[field])
+        for field in ORDER_ROW_FIELDS
+    ]
+    return hashlib.sha256(json.dumps(values, default=str).encode()).hexdigest()
+
+
+@dataclass
+class UpsertResult:
+    created: List[Order]
+    updated: List[Order]
+    unchanged: int
+
+
+class OrderImporter:
+    """
+    Writes normalized order rows, and the addresses, parties and packages they
+    reference, for a job. This generic implementation uses bulk_create and works
+    on every database backend.
+    """
+
+    def __init__(self, job: Job, shipping_provider: ShippingProvider):
+        self.job = job
+        self.shipping_provider = shipping_provider
+
+    @classmethod
+    def for_connection(
+        cls, job: Job, shipping_provider: ShippingProvider, connection=None
+    ) -> "OrderImporter":
+        """Pick the fastest importer available for the database backend."""
+        connection = connection or default_connection
+        if connection.vendor == "postgresql" and settings.ORDER_IMPORT_USE_COPY:
+            return PostgresCopyOrderImporter(job, shipping_provider)
+        return cls(job, shipping_provider)
+
+    def import_rows(self, rows: List[Dict[str, Any]]) -> List[Order]:
+        orders = self.write_rows(rows)
+        self.job.orders.refresh_summaries()
+        return orders
+
+    def upsert_rows(self, rows: List[Dict[str, Any]]) -> UpsertResult:
+        """
+        Import rows into a job that already has orders, matching them to its
+        orders by order number (which must be set and unique). Rows that are
+        unchanged since they were imported are skipped, changed rows are written
+        to their order in place (see update_rows), and other rows are added.
+        Orders that aren't in the rows are kept.
+        """
+        existing = {
+            order_number: (order_id, digest)
+            for order_number, order_id, digest in self.job.orders.exclude(
+                order_number=""
+            ).values_list("order_number", "id", "row_hash")
+        }
+
+        changed_rows, new_rows, changed_ids = [], [], []
+        for row in rows:
+            match = existing.get(row["order_number"])
+            if match is None:
+                new_rows.append(row)
+            elif match[1] != row_hash(row):
+                changed_rows.append(row)
+                changed_ids.append(match[0])
+
+        with transaction.atomic():
+            updated = self.update_rows(changed_ids, changed_rows)
+            created = self.write_rows(new_rows)
+            order_ids = [order.id for order in updated + created]
+            # Updated orders have summaries, so they are recorded as updated in
+            # the order change feed
+            for start in range(0, len(order_ids), REFRESH_BATCH_SIZE):
+                Order.objects.filter(
+                    id__in=order_ids[start : start + REFRESH_BATCH_SIZE]
+                ).refresh_summaries()
+
+        return UpsertResult(
+            created=created,
+            updated=updated,
+            unchanged=len(rows) - len(updated) - len(created),
+        )
+
+    def update_rows(
+        self, order_ids: List[int], rows: List[Dict[str, Any]]
+    ) -> List[Order]:
+        """
+        Write rows to existing orders in place, without their summaries. Orders
+        keep their ID, job and shipping provider. Rows get new addresses,
+        parties and packages, as those of the orders may be shared with other
+        orders (e.g. of a cloned job); the previous ones are deleted unless other
+        orders still use them.
+        """
+        if not rows:
+            return []
+
+        orders = Order.objects.in_bulk(order_ids)
+        previous = {field: set() for field in RELATED_FIELDS}
+        related = self.write_related(rows)
+        updated = []
+        for i, (order_id, row) in enumerate(zip(order_ids, rows)):
+            order = orders[order_id]
+            for field in RELATED_FIELDS:
+                previous[field].add(getattr(order, f"{field}_id"))
+            for field, value in self._order_values(row, related, i).items():
+                setattr(order, field, value)
+            updated.append(order)
+
+        Order.objects.bulk_update(
+            updated, [*RELATED_FIELDS, "phone_number", "phone_number_2", "row_hash"]
+        )
+        delete_unused_related(
+            previous["from_address"] | previous["to_address"],
+            previous["sender"] | previous["recipient"],
+            previous["package"],
+        )
+        return updated
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> List[Order]:
+        """Create the orders, without their summaries, in the order of the rows."""
+        related = self.write_related(rows)
+        return Order.objects.bulk_create(
+            [
+                Order(
+                    job=self.job,
+                    shipping_provider=self.shipping_provider,
+                    **self._order_values(row, related, i),
+                )
+                for i, row in enumerate(rows)
+            ]
+        )
+
+    def write_related(self, rows: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+        """
+        Create the addresses, parties and packages of the rows. Returns them by
+        the Order field referring to them, in the order of the rows.
+        """
+        return {
+            "from_address": Address.objects.bulk_create(
+                [self._address(row, "from") for row in rows]
+            ),
+            "to_address": Address.objects.bulk_create(
+                [self._address(row, "to") for row in rows]
+            ),
+            "sender": OrderParty.objects.bulk_create(
+                [
+                    OrderParty(
+                        first_name=row["sender_first_name"],
+                        last_name=row["sender_last_name"],
+                    )
+                    for row in rows
+                ]
+            ),
+            "recipient": OrderParty.objects.bulk_create(
+                [
+                    OrderParty(
+                        first_name=row["recipient_first_name"],
+                        last_name=row["recipient_last_name"],
+                    )
+                    for row in rows
+                ]
+            ),
+            "package": Package.objects.bulk_create(
+                [
+                    Package(
+                        length=row["length"],
+                        width=row["width"],
+                        height=row["height"],
+                        weight=row["weight"],
+                        item_sku=row["item_sku"],
+                        is_user_created=False,
+                    )
+                    for row in rows
+                ]
+            ),
+        }
+
+    @staticmethod
+    def _order_values(
+        row: Dict[str, Any], related: Dict[str, List[Any]], i: int
+    ) -> Dict[str, Any]:
+        """The values of the Order fields written from the i-th row."""
+        return {
+            **{field: objects[i] for field, objects in related.items()},
+            "phone_number": row["phone_number"],
+            "phone_number_2": row["phone_number_2"],
+            "order_number": row["order_number"],
+            "row_hash": row_hash(row),
+        }
+
+    @staticmethod
+    def _address(row: Dict[str, Any], prefix: str) -> Address:
+        return Address(
+            name=row[f"{prefix}_name"],
+            address=row[f"{prefix}_address"],
+            address_2=row[f"{prefix}_address_2"],
+            city=row[f"{prefix}_city"],
+            state=row[f"{prefix}_state"],
+            zip_code=row[f"{prefix}_zip_code"],
+            is_user_created=False,
+        )
+
+
+class PostgresCopyOrderImporter(OrderImporter):
+    """
+    PostgreSQL fast path. Rows are streamed into a temporary staging table with
+    COPY FROM STDIN, then fanned out into the model tables with set-based
+    INSERT ... SELECT statements.
+
+    Primary keys are drawn from the tables' sequences up front and copied along
+    with each row, so that every order can reference the addresses, parties and
+    package created from the same row without relying on RETURNING order.
+    """
+
+    STAGING_TABLE = "order_import_staging"
+    ID_COLUMNS = [
+        "order_id",
+        "from_address_id",
+        "to_address_id",
+        "sender_id",
+        "recipient_id",
+        "package_id",
+    ]
+    INTEGER_FIELDS = {"length", "width", "height", "weight"}
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> List[Order]:
+        if not rows:
+            return []
+
+        with default_connection.cursor() as cursor:
+            ids = self._allocate_ids(cursor, len(rows))
+            self._create_staging_table(cursor)
+            self._copy_rows(cursor, rows, ids)
+            self._insert_related(cursor)
+            order_ids = self._insert_orders(cursor)
+            # Dropped now rather than on commit, so that a single transaction can
+            # write rows more than once
+            cursor.execute(f"DROP TABLE {self.STAGING_TABLE}")
+
+        return [
+            Order(
+                id=order_id,
+                job=self.job,
+                shipping_provider=self.shipping_provider,
+                sender_id=ids["sender_id"][i],
+                recipient_id=ids["recipient_id"][i],
+                from_address_id=ids["from_address_id"][i],
+                to_address_id=ids["to_address_id"][i],
+                package_id=ids["package_id"][i],
+                phone_number=rows[i]["phone_number"],
+                phone_number_2=rows[i]["phone_number_2"],
+                order_number=rows[i]["order_number"],
+                row_hash=row_hash(rows[i]),
+                created_at=self.created_at,
+            )
+            for i, order_id in enumerate(order_ids)
+        ]
+
+    def _allocate_ids(self, cursor, count: int) -> Dict[str, List[int]]:
+        tables = {
+            "order_id": Order._meta.db_table,
+            "from_address_id": Address._meta.db_table,
+            "to_address_id": Address._meta.db_table,
+            "sender_id": OrderParty._meta.db_table,
+            "recipient_id": OrderParty._meta.db_table,
+            "package_id": Package._meta.db_table,
+        }
+        ids = {}
+        for column, table in tables.items():
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s) ORDER BY 1",
+                [table, count],
+            )
+            ids[column] = [row[0] for row in cursor.fetchall()]
+        return ids
+
+    def _create_staging_table(self, cursor):
+        columns = [f"{column} bigint NOT NULL" for column in self.ID_COLUMNS]
+        columns += [
+            f"{field} {'integer' if field in self.INTEGER_FIELDS else 'text'}"
+            for field in ORDER_ROW_FIELDS
+        ]
+        columns.append("row_hash text")
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {self.STAGING_TABLE} "
+            f"({', '.join(columns)}) ON COMMIT DROP"
+        )
+
+    def _copy_rows(self, cursor, rows: List[Dict[str, Any]], ids):
+        # Phone numbers are stored in the same normalized form that
+        # PhoneNumberField would produce when saving through the ORM
+        phone_field = Order._meta.get_field("phone_number")
+        columns = self.ID_COLUMNS + ORDER_ROW_FIELDS + ["row_hash"]
+
+        with cursor.cursor.copy(
+            f"COPY {self.STAGING_TABLE} ({', '.join(columns)}) FROM STDIN"
+        ) as copy:
+            for i, row in enumerate(rows):
+                values = [ids[column][i] for column in self.ID_COLUMNS]
+                for field in ORDER_ROW_FIELDS:
+                    value = row[field]
+                    if field in ("phone_number", "phone_number_2"):
+                        value = phone_field.get_prep_value(value) or ""
+                    values.append(value)
+                values.append(row_hash(row))
+                copy.write_row(values)
+
+    def _insert_related(self, cursor):
+        address_columns = "id, name, address, address_2, city, state, zip_code, country, is_user_created"
+        country = Address._meta.get_field("country").get_default()
+        cursor.execute(
+            f"""
+            INSERT INTO {Address._meta.db_table} ({address_columns})
+            SELECT from_address_id, from_name, from_address, from_address_2,
+                   from_city, from_state, from_zip_code, %s, false
+            FROM {self.STAGING_TABLE}
+            UNION ALL
+            SELECT to_address_id, to_name, to_address, to_address_2,
+                   to_city, to_state, to_zip_code, %s, false
+            FROM {self.STAGING_TABLE}
+            """,
+            [country, country],
+        )
+        cursor.execute(f"""
+            INSERT INTO {OrderParty._meta.db_table} (id, first_name, last_name)
+            SELECT sender_id, sender_first_name, sender_last_name
+            FROM {self.STAGING_TABLE}
+            UNION ALL
+            SELECT recipient_id, recipient_first_name, recipient_last_name
+            FROM {self.STAGING_TABLE}
+            """)
+        cursor.execute(f"""
+            INSERT INTO {Package._meta.db_table}
+                (id, length, width, height, weight, item_sku, is_user_created)
+            SELECT package_id, length, width, height, weight, item_sku, false
+            FROM {self.STAGING_TABLE}
+            """)
+
+    def _insert_orders(self, cursor) -> List[int]:
+        self.created_at = timezone.now()
+        cursor.execute(
+            f"""
+            INSERT INTO {Order._meta.db_table}
+                (id, job_id, shipping_provider_id, sender_id, recipient_id,
+                 from_address_id, to_address_id, package_id, created_at,
+                 phone_number, phone_number_2, order_number, row_hash)
+            SELECT order_id, %s, %s, sender_id, recipient_id,
+                   from_address_id, to_address_id, package_id, %s,
+                   phone_number, phone_number_2, order_number, row_hash
+            FROM {self.STAGING_TABLE}
+            ORDER BY order_id
+            RETURNING id
+            """,
+            [self.job.id, self.shipping_provider.id, self.created_at],
+        )
+        return sorted(row[0] for row in cursor.fetchall())
@@ -0,0 +1,97 @@
+"""
+Keep OrderSummary rows current when orders, or the rows they refer to, are saved
+one at a time. Bulk writes (imports and batch updates) refresh the summaries
+themselves, as they don't send these signals. Changes to the summaries are
+recorded in the order change feed (see OrderChange), which also invalidates the
+cached order facets (see core.services.facet_service).
+"""
+
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from core.models import (
+    Address,
+    Order,
+    OrderChange,
+    OrderParty,
+    OrderSummary,
+    Package,
+    ShippingProvider,
+)
+from core.querysets import OrderQuerySet
+
+
+@receiver(post_save, sender=Order)
+def refresh_order_summary(sender, instance: Order, raw: bool = False, **kwargs):
+    if not raw:
+        Order.objects.filter(pk=instance.pk).refresh_summaries()
+
+
+@receiver(post_save, sender=Address)
+def refresh_address_summaries(sender, instance, created, raw=False, **kwargs):
+    if not (created or raw):
+        Order.objects.filter(
+            Q(from_address=instance) | Q(to_address=instance)
+        ).refresh_summaries()
+
+
+@receiver(post_save, sender=OrderParty)
+def refresh_party_summaries(sender, instance, created, raw=False, **kwargs):
+    if not (created or raw):
+        Order.objects.filter(
+            Q(sender=instance) | Q(recipient=instance)
+        ).refresh_summaries()
+
+
+@receiver(post_save, sender=Package)
+def refresh_package_summaries(sender, instance, created, raw=False, **kwargs):
+    if not (created or raw):
+        Order.objects.filter(package=instance).refresh_summaries()
+
+
+@receiver(post_save, sender=ShippingProvider)
+def refresh_provider_summaries(sender, instance, created, raw=False, **kwargs):
+    if not (created or raw):
+        Order.objects.filter(shipping_provider=instance).refresh_summaries()
+
+
+@receiver(post_delete, sender=ShippingProvider)
+def clear_provider_summaries(sender, instance, **kwargs):
+    # Orders have already been detached from the provider (SET_NULL)
+    Order.objects.filter(summary__shipping_provider_id=instance.pk).record_changes(
+        OrderChange.Kind.UPDATED
+    )
+    OrderSummary.objects.filter(shipping_provider_id=instance.pk).update(
+        shipping_provider_id=None,
+        shipping_provider_name=None,
+        shipping_provider_description=None,
+        shipping_provider_cost_per_pound=None,
+        shipping_provider_rate_table=None,
+    )
+
+
+# Deleting orders removes their summaries. Order queryset deletes record the
+# changes themselves (see OrderQuerySet.delete), so that it isn't done once per
+# order. Other deletes are of a single order, or cascade from a deleted job,
+# address, party or package: the deleted orders are collected on the object being
+# deleted, and recorded together once they have been deleted.
+@receiver(pre_delete, sender=Order)
+def collect_deleted_order(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, OrderQuerySet):
+        return
+    if origin is None:
+        Order.objects.filter(pk=instance.pk).record_changes(OrderChange.Kind.DELETED)
+        return
+    if not hasattr(origin, "_deleted_orders"):
+        origin._deleted_orders = []
+    origin._deleted_orders.append((instance.pk, instance.job_id))
+
+
+@receiver(post_delete, sender=Order)
+def record_deleted_orders(sender, instance, origin=None, using=None, **kwargs):
+    # All the collected orders are deleted before the first post_delete is sent
+    deleted = getattr(origin, "_deleted_orders", None)
+    if deleted:
+        OrderChange.objects.using(using).record(deleted, OrderChange.Kind.DELETED)
+        deleted.clear()
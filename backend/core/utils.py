@@ -1,3 +1,14 @@
+import hashlib
+from functools import lru_cache
+from typing import Optional
+
+import phonenumbers
+from phonenumber_field.phonenumber import PhoneNumber
+
+# Distinct phone numbers remembered by parse_phone_number()
+PHONE_NUMBER_CACHE_SIZE = 10_000
+
+
 def lbs_oz_to_oz(lbs: int = 0, oz: int = 0) -> int:
     """
     Convert pounds and ounces to total ounces.
@@ -10,3 +21,67 @@ def lbs_oz_to_oz(lbs: int = 0, oz: int = 0) -> int:
         Total weight in ounces
     """
     return (lbs * 16) + oz
+
+
+def file_sha256(file) -> str:
+    """
+    Compute the SHA-256 hex digest of a file-like object without reading it
+    into memory all at once. The file is rewound before and after hashing.
+
+    Args:
+        file: A Django UploadedFile or any object exposing seek() and chunks()/read()
+
+    Returns:
+        Hex-encoded SHA-256 digest of the file contents
+    """
+    digest = hashlib.sha256()
+    file.seek(0)
+    if hasattr(file, "chunks"):
+        for chunk in file.chunks():
+            digest.update(chunk)
+    else:
+        for chunk in iter(lambda: file.read(64 * 1024), b""):
+            digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def request_content_length(request) -> Optional[int]:
+    """
+    Get the size of a request body from its Content-Length header, without
+    reading the body.
+
+    Args:
+        request: A Django HttpRequest or DRF Request
+
+    Returns:
+        The body size in bytes, or None if the header is missing or invalid
+    """
+    try:
+        length = int(request.META.get("CONTENT_LENGTH") or "")
+    except ValueError:
+        return None
+    return length if length >= 0 else None
+
+
+@lru_cache(maxsize=PHONE_NUMBER_CACHE_SIZE)
+def parse_phone_number(
+    value: str, region: Optional[str] = None
+) -> Optional[PhoneNumber]:
+    """
+    Parse a phone number, remembering the result since the same numbers tend to
+    repeat across the orders of an upload. The returned instance is shared between
+    callers and must not be modified.
+
+    Args:
+        value: The phone number as written, e.g. "(212) 555-1234" or "+12125551234"
+        region: Region code for numbers without a country code, e.g. "US"
+
+    Returns:
+        The parsed phone number, or None if it is not a valid phone number
+    """
+    try:
+        phone_number = PhoneNumber.from_string(value, region=region)
+    except phonenumbers.NumberParseException:
+        return None
+    return phone_number if phone_number.is_valid() else None
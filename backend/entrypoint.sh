@@ -5,5 +5,8 @@ echo "Running database migrations..."
 python manage.py migrate
 python manage.py loaddata fixtures/*.json
 
+echo "Generating the API schema..."
+python manage.py build_schema
+
 echo "Starting Django server..."
-exec gunicorn config.wsgi:application --bind 0.0.0.0:80 --workers 4 --access-logfile - --error-logfile - --capture-output
+exec gunicorn config.asgi:application --worker-class uvicorn_worker.UvicornWorker --bind 0.0.0.0:80 --workers 4 --access-logfile - --error-logfile - --capture-output
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+
+from core.models import Job
+from core.services.archive_service import ArchiveService
+
+
+@pytest.fixture
+def job(providers, order_factory) -> Job:
+    job = Job.objects.create()
+    for weight in (16, 24, 40):
+        order_factory(job, weight=weight, provider=providers[0])
+    return job
+
+
+def _get(url: str, **params):
+    response = async_to_sync(AsyncClient().get)(url, params)
+    return response.status_code, json.loads(response.content)
+
+
+@pytest.mark.django_db
+def test_archived_job_is_served_like_an_active_one(job):
+    url = f"/api/v1/jobs/{job.id}/"
+    _, before = _get(url)
+    _, orders_before = _get("/api/v1/orders/", job=job.id, page_size=2, page=2)
+    order_id = before["orders"][0]
+    _, order_before = _get(f"/api/v1/orders/{order_id}/")
+
+    ArchiveService().archive_job(job)
+
+    status_code, after = _get(url)
+    assert status_code == 200
+    assert after["archivedAt"] is not None
+    assert {**after, "archivedAt": None} == before
+    assert _get("/api/v1/orders/", job=job.id, page_size=2, page=2) == (
+        200,
+        orders_before,
+    )
+    assert _get(f"/api/v1/orders/{order_id}/") == (200, order_before)
+
+
+@pytest.mark.django_db
+def test_sync_views_serve_archived_job(job):
+    client = APIClient()
+    order_id = job.orders.order_by("id").first().id
+    expected = client.get(f"/api/v1/jobs/{job.id}/").json()
+    ArchiveService().archive_job(job)
+
+    # The router's synchronous routes, which the async views take precedence over
+    job_response = client.get(f"/api/v1/jobs/{job.id}/")
+    list_response = client.get("/api/v1/orders/", {"job": job.id, "search": "jane"})
+
+    assert job_response.json()["orders"] == expected["orders"]
+    assert job_response.json()["totalCost"] == expected["totalCost"]
+    assert list_response.json()["count"] == 3
+    assert list_response.json()["results"][0]["id"] == order_id
+
+
+@pytest.mark.django_db
+def test_archived_job_is_read_only(job):
+    ArchiveService().archive_job(job)
+    client = APIClient()
+
+    response = client.post(f"/api/v1/jobs/{job.id}/assign-cheapest-providers/")
+
+    assert response.status_code == 409
+    assert response.json()["code"] == "JOB_ARCHIVED"
+    assert client.get(f"/api/v1/jobs/{job.id}/rates/").status_code == 409
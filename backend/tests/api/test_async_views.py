@@ -0,0 +1,119 @@
+import json
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from rest_framework.permissions import BasePermission
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import BaseThrottle
+from api.views import JobViewSet, OrderViewSet, ShippingProviderViewSet
+from core.models import Job
+
+
+@pytest.fixture
+def job(providers, order_factory) -> Job:
+    job = Job.objects.create()
+    for weight in (16, 24, 40):
+        order_factory(job, weight=weight, provider=providers[0])
+    return job
+
+
+def _async_get(url: str, **params):
+    response = async_to_sync(AsyncClient().get)(url, params)
+    return response.status_code, json.loads(response.content)
+
+
+def _sync_get(viewset, actions: dict, url: str, params=None, **kwargs):
+    request = APIRequestFactory().get(url, params)
+    response = viewset.as_view(actions)(request, **kwargs)
+    response.render()
+    return response.status_code, json.loads(response.content)
+
+
+@pytest.mark.django_db
+def test_async_orders_list_matches_sync_viewset(job):
+    params = {"job": job.id, "page_size": 2, "page": 2}
+    url = "/api/v1/orders/"
+
+    assert _async_get(url, **params) == _sync_get(
+        OrderViewSet, {"get": "list"}, url, params
+    )
+
+
+@pytest.mark.django_db
+def test_async_orders_list_applies_search(job):
+    status_code, data = _async_get("/api/v1/orders/", search="Jane")
+
+    assert status_code == 200
+    assert data["count"] == 3
+    assert data["results"][0]["recipient"]["firstName"] == "Jane"
+
+
+@pytest.mark.django_db
+def test_async_job_retrieve_matches_sync_viewset(job):
+    url = f"/api/v1/jobs/{job.id}/"
+
+    status_code, data = _async_get(url)
+
+    assert (status_code, data) == _sync_get(
+        JobViewSet, {"get": "retrieve"}, url, pk=job.id
+    )
+    assert len(data["orders"]) == 3
+
+
+@pytest.mark.django_db
+def test_async_retrieve_missing_object_returns_error_payload():
+    status_code, data = _async_get("/api/v1/orders/999999/")
+
+    assert status_code == 404
+    assert data["code"] == "NOT_FOUND"
+    assert data["message"] == "No Order matches the given query."
+
+
+@pytest.mark.django_db
+def test_async_list_invalid_page_returns_not_found(job):
+    status_code, data = _async_get("/api/v1/shipping-providers/", page=5)
+
+    assert status_code == 404
+    assert data["code"] == "NOT_FOUND"
+
+
+class DenyAll(BasePermission):
+    def has_permission(self, request, view):
+        return False
+
+
+class AlwaysThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        return False
+
+    def wait(self):
+        return 30
+
+
+@pytest.mark.django_db
+def test_async_views_negotiate_the_renderer(job):
+    response = async_to_sync(AsyncClient().get)(
+        "/api/v1/shipping-providers/", {"format": "api"}
+    )
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/html")
+
+
+def test_async_views_check_permissions(monkeypatch):
+    monkeypatch.setattr(ShippingProviderViewSet, "permission_classes", [DenyAll])
+
+    status_code, data = _async_get("/api/v1/shipping-providers/")
+
+    assert status_code == 403
+    assert data["code"] == "NOT_AUTHENTICATED"
+
+
+def test_async_views_apply_throttles(monkeypatch):
+    monkeypatch.setattr(ShippingProviderViewSet, "throttle_classes", [AlwaysThrottle])
+
+    response = async_to_sync(AsyncClient().get)("/api/v1/shipping-providers/")
+
+    assert response.status_code == 429
+    assert response["Retry-After"] == "30"
+    assert json.loads(response.content)["code"] == "THROTTLED"
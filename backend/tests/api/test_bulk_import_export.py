@@ -0,0 +1,126 @@
+import gzip
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+
+from core.models import Address, Package
+
+ADDRESSES_CSV = (
+    "name,address,address_2,city,state,zip_code,country\n"
+    "John Doe,123 Main St,Apt 4,New York,NY,10001,\n"
+    "Jane Smith,456 Oak Ave,,Los Angeles,CA,90001,USA\n"
+)
+
+
+@pytest.fixture
+def client() -> APIClient:
+    return APIClient()
+
+
+def _content(response) -> str:
+    return b"".join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("compress", [lambda data: data, gzip.compress])
+def test_import_addresses_from_csv(client, compress):
+    file = SimpleUploadedFile("addresses.csv", compress(ADDRESSES_CSV.encode()))
+
+    response = client.post(
+        "/api/v1/addresses/import/", {"file": file}, format="multipart"
+    )
+
+    assert response.status_code == 201
+    assert response.data["created"] == 2
+    john = Address.objects.get(name="John Doe")
+    assert john.is_user_created is True
+    assert john.address_2 == "Apt 4"
+    assert john.country == "USA"
+
+
+@pytest.mark.django_db
+def test_import_packages_from_json(client):
+    packages = [
+        {"length": 10, "width": 8, "height": 6, "weight": 16, "itemSku": "SKU-1"},
+        {"length": "4", "width": "4", "height": "4", "weight": "8"},
+    ]
+
+    response = client.post("/api/v1/packages/import/", packages, format="json")
+
+    assert response.status_code == 201
+    assert Package.objects.user_created().count() == 2
+    assert Package.objects.get(item_sku="SKU-1").weight == 16
+    assert Package.objects.get(item_sku="").billable_weight is not None
+
+
+@pytest.mark.django_db
+def test_import_with_errors_saves_nothing(client):
+    packages = [
+        {"length": 10, "width": 8, "height": 6, "weight": 16},
+        {"length": "ten", "width": 8, "height": -1},
+    ]
+
+    response = client.post("/api/v1/packages/import/", packages, format="json")
+
+    assert response.status_code == 400
+    info = response.json()["info"]
+    assert info["errors"] == {
+        "1": [
+            "length must be a whole number, not ten",
+            "height must be a whole number, not -1",
+            "weight is required",
+        ]
+    }
+    assert info["errorRowCount"] == 1
+    assert not Package.objects.exists()
+
+
+@pytest.mark.django_db
+def test_import_rejects_unknown_columns(client):
+    file = SimpleUploadedFile("addresses.csv", b"name,color\nJohn,red\n")
+
+    response = client.post(
+        "/api/v1/addresses/import/", {"file": file}, format="multipart"
+    )
+
+    assert response.status_code == 400
+    assert response.json()["info"]["errors"]["general"] == [
+        "Unknown column(s): color.",
+        "Missing column(s): address, city, state, zip_code.",
+    ]
+
+
+@pytest.mark.django_db
+def test_export_round_trips_through_import(client):
+    file = SimpleUploadedFile("addresses.csv", ADDRESSES_CSV.encode())
+    client.post("/api/v1/addresses/import/", {"file": file}, format="multipart")
+    # Addresses created for orders aren't part of the address book
+    Address.objects.create(name="Import", address="1 Elm St", city="X", state="TX")
+
+    exported = _content(client.get("/api/v1/addresses/export/"))
+
+    assert exported.splitlines() == [
+        "name,address,address_2,city,state,zip_code,country",
+        "John Doe,123 Main St,Apt 4,New York,NY,10001,USA",
+        "Jane Smith,456 Oak Ave,,Los Angeles,CA,90001,USA",
+    ]
+    Address.objects.all().delete()
+    file = SimpleUploadedFile("addresses.csv", exported.encode())
+    response = client.post(
+        "/api/v1/addresses/import/", {"file": file}, format="multipart"
+    )
+    assert response.data["created"] == 2
+
+
+@pytest.mark.django_db
+def test_export_packages_as_json(client):
+    Package.objects.create(length=1, width=2, height=3, weight=4, is_user_created=True)
+
+    response = client.get("/api/v1/packages/export/", {"exportFormat": "json"})
+
+    assert response["Content-Type"] == "application/json"
+    assert json.loads(_content(response)) == [
+        {"length": 1, "width": 2, "height": 3, "weight": 4, "itemSku": ""}
+    ]
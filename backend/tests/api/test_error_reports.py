@@ -0,0 +1,138 @@
+import csv
+import gzip
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+
+from core.models import ErrorReport, Order
+
+UPLOAD_URL = "/api/v1/orders/upload/"
+
+HEADER = (
+    "Header Row (ignored by CSVService)\n"
+    "first name,last name,address,address2,city,zip/postal code,abbreviation,"
+    "first name,last name,address,address2,city,zip/postal code,abbreviation,"
+    "lbs,oz,length,width,height,phone num1,phone num2,order no,item-sku\n"
+)
+ROW = (
+    "John,Doe,123 Main St,,New York,10001,NY,Jane,Smith,456 Oak Ave,,"
+    "Los Angeles,90001,CA,1,0,10,8,6,{phone},,ORD-{i},SKU-{i}\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def errors_in_response(settings):
+    settings.UPLOAD_ERRORS_IN_RESPONSE = 20
+
+
+@pytest.fixture
+def client() -> APIClient:
+    return APIClient()
+
+
+def _content(rows: int = 40) -> bytes:
+    # Every other row has an invalid phone number
+    return (
+        HEADER
+        + "".join(
+            ROW.format(i=i, phone="555-1234" if i % 2 else "212-555-1234")
+            for i in range(rows)
+        )
+    ).encode()
+
+
+def _upload(client: APIClient, content: bytes, name: str = "orders.csv"):
+    file = SimpleUploadedFile(name, content, content_type="text/csv")
+    return client.post(UPLOAD_URL, {"file": file}, format="multipart")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_upload_returns_capped_errors_and_a_report(client):
+    response = _upload(client, _content())
+
+    assert response.status_code == 400
+    info = response.json()["info"]
+    # Rows are numbered from 2, so the odd (invalid) rows are 3, 5, ..., 41
+    assert list(info["errors"]) == [str(row) for row in range(3, 42, 2)][:20]
+    assert info["errors"]["3"] == ["Invalid phone number 555-1234 (phone_number)"]
+    assert info["errorRowCount"] == 20
+    assert info["truncated"] is False
+    assert not Order.objects.exists()
+
+    response = _upload(client, _content(100))
+
+    info = response.json()["info"]
+    assert len(info["errors"]) == 20
+    assert info["errorRowCount"] == 50
+    assert info["truncated"] is True
+    report = client.get(f"/api/v1/error-reports/{info['report']}/").json()
+    assert report["rowCount"] == 50
+    assert report["errorCount"] == 50
+    assert report["fileName"] == "orders.csv"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_report_rows_are_paginated(client):
+    report_id = _upload(client, _content(100)).json()["info"]["report"]
+
+    response = client.get(
+        f"/api/v1/error-reports/{report_id}/rows/", {"page": 3, "page_size": 20}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 50
+    assert body["next"] is None
+    assert [row["row"] for row in body["results"]] == list(range(83, 102, 2))
+    assert body["results"][0]["errors"] == [
+        "Invalid phone number 555-1234 (phone_number)"
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("compress", [False, True])
+def test_annotated_download_adds_an_errors_column(client, compress):
+    content = _content(4)
+    upload = gzip.compress(content) if compress else content
+    report_id = _upload(client, upload, name="orders.csv.gz").json()["info"]["report"]
+
+    response = client.get(f"/api/v1/error-reports/{report_id}/annotated/")
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/csv"
+    assert 'filename="orders-errors.csv"' in response["Content-Disposition"]
+    records = list(
+        csv.reader(io.StringIO(b"".join(response.streaming_content).decode()))
+    )
+    original = list(csv.reader(io.StringIO(content.decode())))
+    assert [record[:-1] for record in records] == original
+    assert [record[-1] for record in records] == [
+        "",
+        "errors",
+        "",
+        "Invalid phone number 555-1234 (phone_number)",
+        "",
+        "Invalid phone number 555-1234 (phone_number)",
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_structure_errors_have_no_report(client):
+    response = _upload(client, b"Wrong,Header\nValue1,Value2\n")
+
+    info = response.json()["info"]
+    assert response.status_code == 400
+    assert "general" in info["errors"]
+    assert info["report"] is None
+    assert not ErrorReport.objects.exists()
+
+
+@pytest.mark.django_db
+def test_unknown_report_is_not_found(client):
+    response = client.get(
+        "/api/v1/error-reports/00000000-0000-0000-0000-000000000000/rows/"
+    )
+
+    assert response.status_code == 404
@@ -0,0 +1,57 @@
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Job, Package
+from core.services.job_service import JobService
+
+
+@pytest.fixture
+def client() -> APIClient:
+    return APIClient()
+
+
+@pytest.mark.django_db
+def test_clone_job(client, providers, order_factory):
+    job = Job.objects.create()
+    order = order_factory(job, provider=providers[0])
+
+    response = client.post(
+        f"/api/v1/jobs/{job.id}/clone/", {"sharePackages": True}, format="json"
+    )
+
+    assert response.status_code == 201
+    clone = Job.objects.get(id=response.data["id"])
+    assert clone.id != job.id
+    assert response.data["total_cost"] == JobService(job).get_total_cost()
+    copy = clone.orders.get()
+    assert copy.package_id == order.package_id
+    assert copy.shipping_provider_id == providers[0].id
+
+
+@pytest.mark.django_db
+def test_clone_job_copies_packages_by_default(client, order_factory):
+    job = Job.objects.create()
+    order = order_factory(job, weight=24)
+
+    response = client.post(
+        f"/api/v1/jobs/{job.id}/clone/", {"sharePackages": False}, format="json"
+    )
+
+    assert response.status_code == 201
+    copy = Job.objects.get(id=response.data["id"]).orders.get()
+    assert copy.package_id != order.package_id
+    assert (copy.package.weight, copy.package.item_sku) == (
+        order.package.weight,
+        order.package.item_sku,
+    )
+    assert Package.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_archived_job_cannot_be_cloned(client):
+    job = Job.objects.create(archived_at=timezone.now())
+
+    response = client.post(f"/api/v1/jobs/{job.id}/clone/", {}, format="json")
+
+    assert response.status_code == 409
@@ -0,0 +1,116 @@
+import gzip
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from core.admission import get_pool
+from core.models import Job
+
+BUSY_SETTINGS = {
+    "ADMISSION_UPLOAD_BUDGET_BYTES": 10,
+    "ADMISSION_BATCH_BUDGET_ORDERS": 10,
+    "ADMISSION_QUEUE_TIMEOUT": 0,
+    "ADMISSION_RETRY_AFTER": 3,
+}
+
+
+@pytest.fixture
+def client() -> APIClient:
+    return APIClient()
+
+
+def _assert_busy(response):
+    assert response.status_code == 429
+    assert response["Retry-After"] == "3"
+    assert response.json()["code"] == "SERVER_BUSY"
+
+
+@pytest.mark.django_db
+@override_settings(**BUSY_SETTINGS)
+def test_upload_is_rejected_while_upload_budget_is_used(client):
+    held = get_pool("upload").admit(10)
+    file = SimpleUploadedFile("orders.csv", b"a,b\n1,2\n", content_type="text/csv")
+
+    try:
+        response = client.post(
+            "/api/v1/orders/upload/", {"file": file}, format="multipart"
+        )
+    finally:
+        held.release()
+
+    _assert_busy(response)
+    assert not Job.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(
+    **{**BUSY_SETTINGS, "ADMISSION_UPLOAD_BUDGET_BYTES": 10_000},
+    ADMISSION_UPLOAD_MIN_BYTES=1,
+    UPLOAD_MAX_COMPRESSION_RATIO=100,
+)
+def test_compressed_upload_is_charged_its_inflated_size(client):
+    held = get_pool("upload").admit(9_000)
+    content = gzip.compress(b"a,b\n" + b"1,2\n" * 100)
+    file = SimpleUploadedFile("orders.csv.gz", content, content_type="text/csv")
+
+    try:
+        # Admitted on its Content-Length, rejected once found to be compressed
+        response = client.post(
+            "/api/v1/orders/upload/", {"file": file}, format="multipart"
+        )
+    finally:
+        held.release()
+
+    _assert_busy(response)
+    assert get_pool("upload").in_flight == 0
+    assert not Job.objects.exists()
+
+
+@pytest.mark.django_db
+@override_settings(**BUSY_SETTINGS)
+def test_batch_action_is_rejected_while_batch_budget_is_used(client):
+    held = get_pool("batch").admit(10)
+
+    try:
+        response = client.post(
+            "/api/v1/orders/batch-delete/", {"orderIds": [1, 2]}, format="json"
+        )
+    finally:
+        held.release()
+
+    _assert_busy(response)
+
+
+@pytest.mark.django_db
+@override_settings(**BUSY_SETTINGS)
+def test_batch_action_releases_its_admission(client, providers, order_factory):
+    order = order_factory(Job.objects.create())
+
+    # The second request fails validation, as the order no longer exists
+    statuses = [
+        client.post(
+            "/api/v1/orders/batch-delete/", {"orderIds": [order.id]}, format="json"
+        ).status_code
+        for _ in range(2)
+    ]
+
+    assert statuses == [200, 400]
+
+    assert get_pool("batch").in_flight == 0
+
+
+@pytest.mark.django_db
+@override_settings(**BUSY_SETTINGS)
+def test_reads_are_not_subject_to_admission(client):
+    held = get_pool("batch").admit(10)
+    upload = get_pool("upload").admit(10)
+
+    try:
+        response = client.get("/api/v1/orders/")
+    finally:
+        held.release()
+        upload.release()
+
+    assert response.status_code == 200
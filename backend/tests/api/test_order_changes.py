@@ -0,0 +1,153 @@
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import querysets
+from core.models import Job, OrderChange, Package
+
+URL = "/api/v1/orders/changes/"
+
+
+@pytest.fixture
+def client() -> APIClient:
+    return APIClient()
+
+
+def _changes(client, **params):
+    response = client.get(URL, params)
+    assert response.status_code == 200, response.content
+    return response.json()
+
+
+@pytest.mark.django_db
+def test_changes_since_the_current_point(client, providers, order_factory):
+    job = Job.objects.create()
+    first = order_factory(job)
+    start = _changes(client)
+    assert start == {
+        "next": start["next"],
+        "hasMore": False,
+        "created": [],
+        "updated": [],
+        "deleted": [],
+    }
+
+    second = order_factory(job)
+    package = Package.objects.create(length=1, width=1, height=1, weight=1)
+    client.post(
+        "/api/v1/orders/batch-update-package/",
+        {"orderIds": [first.id], "packageId": package.id},
+        format="json",
+    )
+
+    changes = _changes(client, since=start["next"], includeOrders="true")
+    assert changes["created"] == [second.id]
+    assert changes["updated"] == [first.id]
+    assert changes["deleted"] == []
+    assert [order["id"] for order in changes["orders"]] == [first.id, second.id]
+    assert changes["orders"][0]["package"]["id"] == package.id
+
+    # Nothing changed since
+    assert _changes(client, since=changes["next"])["created"] == []
+
+
+@pytest.mark.django_db
+def test_deletes_are_recorded(client, order_factory):
+    job = Job.objects.create()
+    kept, deleted, batch_deleted = (order_factory(job) for _ in range(3))
+    since = _changes(client)["next"]
+
+    client.delete(f"/api/v1/orders/{deleted.id}/")
+    client.post(
+        "/api/v1/orders/batch-delete/", {"orderIds": [batch_deleted.id]}, format="json"
+    )
+    # Created and deleted since, so the client never saw it
+    order_factory(job).delete()
+    client.patch(
+        f"/api/v1/orders/{kept.id}/", {"phoneNumber": "+12125550000"}, format="json"
+    )
+
+    changes = _changes(client, since=since)
+    assert changes["created"] == []
+    assert changes["updated"] == [kept.id]
+    assert sorted(changes["deleted"]) == [deleted.id, batch_deleted.id]
+
+
+@pytest.mark.django_db
+def test_changes_are_paged_and_filtered_by_job(client, order_factory, settings):
+    settings.ORDER_CHANGES_PAGE_SIZE = 2
+    job, other_job = Job.objects.create(), Job.objects.create()
+    orders = [order_factory(job) for _ in range(3)]
+    order_factory(other_job)
+
+    page = _changes(client, since=0, job=job.id)
+    assert page["created"] == [orders[0].id, orders[1].id]
+    assert page["hasMore"] is True
+
+    page = _changes(client, since=page["next"], job=job.id)
+    assert page["created"] == [orders[2].id]
+    assert page["hasMore"] is False
+    # Past the other job's changes too
+    assert page["next"] == OrderChange.objects.latest("seq").seq
+
+
+@pytest.mark.django_db
+def test_cascading_deletes_are_recorded_together(client, order_factory):
+    job = Job.objects.create()
+    job_id = job.id
+    order_ids = [order_factory(job).id for _ in range(5)]
+    since = _changes(client)["next"]
+
+    with CaptureQueriesContext(connection) as queries:
+        job.delete()
+
+    assert len([q for q in queries if "core_orderchange" in q["sql"]]) == 1
+    changes = _changes(client, since=since, job=job_id)
+    assert sorted(changes["deleted"]) == order_ids
+
+
+@pytest.mark.django_db
+def test_expired_changes_are_gone(client, order_factory, settings):
+    job = Job.objects.create()
+    order_factory(job)
+    since = _changes(client)["next"]
+    OrderChange.objects.update(created_at=timezone.now() - timedelta(days=30))
+    settings.ORDER_CHANGE_RETENTION = 24 * 60 * 60
+
+    call_command("prune_order_changes", stdout=StringIO())
+    order_factory(job)
+    response = client.get(URL, {"since": since})
+
+    assert response.status_code == 410
+    assert response.json()["code"] == "CHANGES_EXPIRED"
+
+
+@pytest.mark.django_db
+def test_expired_changes_are_pruned_periodically(order_factory, settings, monkeypatch):
+    settings.ORDER_CHANGE_RETENTION = 24 * 60 * 60
+    settings.ORDER_CHANGE_PRUNE_INTERVAL = 60
+    monkeypatch.setattr(querysets, "_changes_pruned_at", None)
+    clock = iter([1000.0, 1030.0, 1090.0])
+    monkeypatch.setattr(
+        querysets, "time", SimpleNamespace(monotonic=lambda: next(clock))
+    )
+    job = Job.objects.create()
+
+    def expire_all():
+        OrderChange.objects.update(created_at=timezone.now() - timedelta(days=30))
+
+    order_factory(job)  # Prunes
+    expire_all()
+    order_factory(job)  # Within the interval
+    assert OrderChange.objects.count() == 2
+
+    expire_all()
+    order_factory(job)  # Prunes again
+    assert OrderChange.objects.count() == 1
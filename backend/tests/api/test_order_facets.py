@@ -0,0 +1,84 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from api.views import OrderViewSet
+from core.models import Job
+
+URL = "/api/v1/orders/facets/"
+
+
+def _facets(params=None):
+    request = APIRequestFactory().get(URL, params)
+    response = OrderViewSet.as_view({"get": "facets"})(request)
+    response.render()
+    return response
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def job(providers, order_factory) -> Job:
+    job = Job.objects.create()
+    order_factory(job, weight=16, provider=providers[0])
+    order_factory(job, weight=16, provider=providers[0])
+    # 30 lb
+    order_factory(job, weight=480, provider=providers[1])
+    return job
+
+
+@pytest.mark.django_db
+def test_facets_count_orders_in_one_query(job, providers):
+    with CaptureQueriesContext(connection) as queries:
+        response = _facets()
+
+    assert response.status_code == 200
+    facets = response.data["facets"]
+    assert facets["to_state"] == [{"value": "CA", "label": "CA", "count": 3}]
+    assert facets["shipping_provider"] == [
+        {"value": str(providers[0].id), "label": "Cheap", "count": 2},
+        {"value": str(providers[1].id), "label": "Pricey", "count": 1},
+    ]
+    assert facets["job"] == [{"value": str(job.id), "label": str(job.id), "count": 3}]
+    # Small packages are billed by their dimensional weight (10 x 8 x 6 / 139 lb)
+    assert facets["weight"] == [
+        {"value": "1-5", "label": "1-5", "count": 2},
+        {"value": "20-50", "label": "20-50", "count": 1},
+    ]
+    facet_queries = [q for q in queries if "core_ordersummary" in q["sql"]]
+    assert len(facet_queries) == 1
+
+
+@pytest.mark.django_db
+def test_facets_honor_filters_and_selection(job, order_factory):
+    order_factory(Job.objects.create())
+
+    response = _facets({"job": job.id, "facets": "toState,job"})
+
+    assert set(response.data["facets"]) == {"to_state", "job"}
+    assert response.data["facets"]["to_state"][0]["count"] == 3
+
+
+@pytest.mark.django_db
+def test_facets_are_cached_until_orders_change(job, order_factory):
+    _facets({"facets": "job"})
+    with CaptureQueriesContext(connection) as queries:
+        cached = _facets({"facets": "job"})
+    assert cached.data["facets"]["job"][0]["count"] == 3
+    assert not [q for q in queries if "core_ordersummary" in q["sql"]]
+
+    order_factory(job)
+
+    assert _facets({"facets": "job"}).data["facets"]["job"][0]["count"] == 4
+
+
+@pytest.mark.django_db
+def test_unknown_facet_is_rejected():
+    response = _facets({"facets": "to_state,color"})
+
+    assert response.status_code == 400
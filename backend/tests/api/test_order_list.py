@@ -0,0 +1,54 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from api.serializers import OrderSerializer
+from api.views import OrderViewSet
+from core.models import Job, Order
+
+URL = "/api/v1/orders/"
+
+
+def _list(params=None):
+    request = APIRequestFactory().get(URL, params)
+    response = OrderViewSet.as_view({"get": "list"})(request)
+    response.render()
+    return response
+
+
+@pytest.fixture
+def job(providers, order_factory) -> Job:
+    job = Job.objects.create()
+    order_factory(job, weight=16, provider=providers[0])
+    order_factory(job, weight=24)
+    return job
+
+
+@pytest.mark.django_db
+def test_list_matches_order_serializer(job):
+    orders = Order.objects.order_by("id")
+
+    response = _list()
+
+    assert response.data["results"] == OrderSerializer(orders, many=True).data
+
+
+@pytest.mark.django_db
+def test_list_reads_only_the_summary_table(job):
+    with CaptureQueriesContext(connection) as queries:
+        _list({"job": job.id, "search": "Jane"})
+
+    assert queries
+    for query in queries:
+        assert "core_ordersummary" in query["sql"]
+        assert "JOIN" not in query["sql"]
+
+
+@pytest.mark.django_db
+def test_list_filters_and_search(job, order_factory):
+    other = order_factory(Job.objects.create())
+
+    assert _list({"job": job.id}).data["count"] == 2
+    assert _list({"recipient_name": "jan"}).data["count"] == 3
+    assert _list({"to_address": "Oak"}).data["count"] == 3
+    assert _list({"search": str(other.id)}).data["results"][0]["id"] == other.id
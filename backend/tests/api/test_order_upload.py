@@ -0,0 +1,184 @@
+import gzip
+
+import pytest
+import zstandard
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework.test import APIClient
+from core.models import Job, Order, ShippingProvider, UploadClaim
+from core.services.csv_service import CSVService
+
+UPLOAD_URL = "/api/v1/orders/upload/"
+
+CSV_CONTENT = b"""Header Row (ignored by CSVService)
+first name,last name,address,address2,city,zip/postal code,abbreviation,first name,last name,address,address2,city,zip/postal code,abbreviation,lbs,oz,length,width,height,phone num1,phone num2,order no,item-sku
+John,Doe,123 Main St,Apt 4,New York,10001,NY,Jane,Smith,456 Oak Ave,Suite 100,Los Angeles,90001,CA,5,8,10,8,6,212-555-1234,212-555-5678,ORD-001,SKU-123
+Alice,Johnson,789 Pine Rd,,Chicago,60601,IL,Bob,Williams,321 Elm St,,Houston,77001,TX,3,4,12,10,8,212-555-9876,212-555-4321,ORD-002,SKU-456
+"""
+
+
+@pytest.fixture
+def client() -> APIClient:
+    return APIClient()
+
+
+# Uploads run on their own thread (and database connection), so the data they
+# write is only visible outside of the test's transaction.
+@pytest.fixture
+def default_provider(transactional_db) -> ShippingProvider:
+    return ShippingProvider.objects.create(id=2, name="Default", cost_per_pound="1.00")
+
+
+def _upload(client: APIClient, content: bytes = CSV_CONTENT, **headers):
+    file = SimpleUploadedFile("orders.csv", content, content_type="text/csv")
+    return client.post(UPLOAD_URL, {"file": file}, format="multipart", headers=headers)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_repeated_upload_returns_existing_job(client, default_provider):
+    first = _upload(client)
+    second = _upload(client)
+
+    assert first.status_code == 201
+    assert second.status_code == 200
+    assert second.data["job"] == first.data["job"]
+    assert Job.objects.count() == 1
+    assert Order.objects.count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_idempotency_key_takes_precedence_over_content_hash(client, default_provider):
+    first = _upload(client, **{"Idempotency-Key": "abc"})
+    replay = _upload(client, **{"Idempotency-Key": "abc"})
+    new_key = _upload(client, **{"Idempotency-Key": "def"})
+
+    assert replay.status_code == 200
+    assert replay.data["job"] == first.data["job"]
+    assert new_key.status_code == 201
+    assert new_key.data["job"] != first.data["job"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_upload_repeated_while_in_flight_is_rejected(
+    client, default_provider, monkeypatch
+):
+    create_orders = CSVService.create_orders
+    retries = []
+
+    def create_orders_with_retry(self, *args, **kwargs):
+        # The client retries while the first upload is still being imported
+        retries.append(_upload(APIClient()))
+        return create_orders(self, *args, **kwargs)
+
+    monkeypatch.setattr(CSVService, "create_orders", create_orders_with_retry)
+    first = _upload(client)
+    monkeypatch.undo()
+    later = _upload(client)
+
+    assert first.status_code == 201
+    assert retries[0].status_code == 409
+    assert retries[0].data["code"] == "UPLOAD_IN_PROGRESS"
+    assert later.status_code == 200
+    assert later.data["job"] == first.data["job"]
+    assert Job.objects.count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_upload_can_be_retried(client, default_provider, monkeypatch):
+    def fail(self, *args, **kwargs):
+        raise RuntimeError("Connection lost")
+
+    monkeypatch.setattr(CSVService, "create_orders", fail)
+    with pytest.raises(RuntimeError):
+        _upload(client)
+    monkeypatch.undo()
+    retry = _upload(client)
+
+    assert retry.status_code == 201
+    assert UploadClaim.objects.get().job_id == retry.data["job"]
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(UPLOAD_IDEMPOTENCY_WINDOW=0)
+def test_repeated_upload_creates_new_job_when_window_disabled(client, default_provider):
+    first = _upload(client)
+    second = _upload(client)
+
+    assert second.status_code == 201
+    assert second.data["job"] != first.data["job"]
+    assert Order.objects.count() == 4
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("compress", [gzip.compress, zstandard.compress])
+def test_compressed_upload_creates_orders(client, default_provider, compress):
+    response = _upload(client, compress(CSV_CONTENT))
+
+    assert response.status_code == 201
+    assert Order.objects.filter(job=response.data["job"]).count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(UPLOAD_MAX_DECOMPRESSED_SIZE=len(CSV_CONTENT) - 1)
+def test_compressed_upload_over_size_limit_is_rejected(client, default_provider):
+    response = _upload(client, gzip.compress(CSV_CONTENT))
+
+    assert response.status_code == 400
+    assert "maximum size" in response.data["info"]["errors"]["general"][0]
+    assert Job.objects.count() == 0
+
+
+def _upsert(client: APIClient, job: int, content: bytes):
+    file = SimpleUploadedFile("orders.csv", content, content_type="text/csv")
+    return client.post(UPLOAD_URL, {"file": file, "job": job}, format="multipart")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_upload_with_job_updates_orders_by_order_number(client, default_provider):
+    job = _upload(client).data["job"]
+    header, first, second = CSV_CONTENT.decode().splitlines(keepends=True)[1:]
+    new = first.replace("ORD-001", "ORD-003")
+    changed = second.replace("Houston", "Dallas")
+
+    response = _upsert(
+        client, job, ("Header\n" + header + first + changed + new).encode()
+    )
+
+    assert response.status_code == 200
+    assert (response.data["created"], response.data["updated"]) == (1, 1)
+    assert response.data["unchanged"] == 1
+    assert Job.objects.count() == 1
+    orders = Order.objects.filter(job=job)
+    assert sorted(orders.values_list("order_number", flat=True)) == [
+        "ORD-001",
+        "ORD-002",
+        "ORD-003",
+    ]
+    assert orders.get(order_number="ORD-002").to_address.city == "Dallas"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_upload_with_job_requires_unique_order_numbers(client, default_provider):
+    job = _upload(client).data["job"]
+    header, first = CSV_CONTENT.decode().splitlines(keepends=True)[1:3]
+    missing = first.replace("ORD-001", "")
+
+    response = _upsert(
+        client, job, ("Header\n" + header + first + first + missing).encode()
+    )
+
+    assert response.status_code == 400
+    errors = response.json()["info"]["errors"]
+    assert errors["3"] == ["Duplicate order_number ORD-001 (also on row 2)"]
+    assert errors["4"] == ["order_number is required when updating a job"]
+    assert Order.objects.filter(job=job).count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_upload_with_archived_job_is_rejected(client, default_provider):
+    job = Job.objects.create(archived_at="2026-01-01T00:00:00Z")
+
+    response = _upsert(client, job.id, CSV_CONTENT)
+
+    assert response.status_code == 409
+    assert not Order.objects.filter(job=job).exists()
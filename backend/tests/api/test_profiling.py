@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, Client, override_settings
+from core.models import Job
+
+ORDERS_URL = "/api/v1/orders/"
+
+
+@pytest.fixture
+def profiles_dir(tmp_path, settings):
+    settings.REQUEST_PROFILING_ENABLED = True
+    settings.REQUEST_PROFILING_DIR = str(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def staff_user(db):
+    return get_user_model().objects.create_user(
+        username="admin", password="secret", is_staff=True
+    )
+
+
+@pytest.fixture
+def job(providers, order_factory) -> Job:
+    job = Job.objects.create()
+    order_factory(job, provider=providers[0])
+    return job
+
+
+def _load_profile(profiles_dir, profile_id: str):
+    summary = json.loads((profiles_dir / f"{profile_id}.json").read_text())
+    flame_graph = json.loads((profiles_dir / summary["flame_graph"]).read_text())
+    return summary, flame_graph
+
+
+def test_staff_request_with_query_flag_is_profiled(profiles_dir, staff_user, job):
+    client = Client()
+    client.force_login(staff_user)
+
+    response = client.get(ORDERS_URL, {"job": job.id, "_profile": "1"})
+
+    assert response.status_code == 200
+    assert "db;dur=" in response["Server-Timing"]
+    summary, flame_graph = _load_profile(profiles_dir, response["X-Profile-Id"])
+    assert summary["path"] == ORDERS_URL
+    assert summary["status_code"] == 200
+    assert summary["sql"]["count"] == len(summary["sql"]["queries"]) > 0
+    assert any("core_order" in q["sql"] for q in summary["sql"]["queries"])
+    assert flame_graph["$schema"].startswith("https://www.speedscope.app")
+    for profile in flame_graph["profiles"]:
+        assert len(profile["samples"]) == len(profile["weights"])
+
+
+def test_staff_request_with_header_is_profiled(profiles_dir, staff_user, job):
+    client = Client()
+    client.force_login(staff_user)
+
+    response = client.get(f"/api/v1/jobs/{job.id}/", headers={"X-Profile": "1"})
+
+    assert response.status_code == 200
+    assert (profiles_dir / f"{response['X-Profile-Id']}.json").exists()
+
+
+def test_async_request_is_profiled(profiles_dir, staff_user, job):
+    client = AsyncClient()
+    client.force_login(staff_user)
+
+    response = async_to_sync(client.get)(ORDERS_URL, {"_profile": "1"})
+
+    assert response.status_code == 200
+    summary, _ = _load_profile(profiles_dir, response["X-Profile-Id"])
+    assert summary["sql"]["count"] > 0
+
+
+@pytest.mark.django_db
+def test_anonymous_request_is_not_profiled(profiles_dir):
+    response = Client().get(ORDERS_URL, {"_profile": "1"})
+
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response
+    assert list(profiles_dir.iterdir()) == []
+
+
+def test_non_staff_request_is_not_profiled(profiles_dir, staff_user):
+    staff_user.is_staff = False
+    staff_user.save()
+    client = Client()
+    client.force_login(staff_user)
+
+    response = client.get(ORDERS_URL, headers={"X-Profile": "1"})
+
+    assert "X-Profile-Id" not in response
+    assert list(profiles_dir.iterdir()) == []
+
+
+def test_profiling_disabled_by_default(tmp_path, staff_user):
+    client = Client()
+    client.force_login(staff_user)
+
+    with override_settings(REQUEST_PROFILING_DIR=str(tmp_path)):
+        response = client.get(ORDERS_URL, {"_profile": "1"})
+
+    assert "X-Profile-Id" not in response
+    assert list(tmp_path.iterdir()) == []
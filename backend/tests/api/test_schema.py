@@ -0,0 +1,80 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework.test import APIClient
+
+from api.schema import SchemaCache
+
+URL = "/api/v1/schema/"
+
+
+@pytest.fixture(autouse=True)
+def schema_cache(settings, data_dirs):
+    settings.SCHEMA_CODE_VERSION = "abc123"
+    SchemaCache.clear()
+    yield data_dirs / "schema_cache"
+    SchemaCache.clear()
+
+
+@pytest.fixture
+def generated(monkeypatch) -> list:
+    """The API versions that schemas are generated for."""
+    calls = []
+    get_schema = SchemaGenerator.get_schema
+
+    def counting_get_schema(self, *args, **kwargs):
+        calls.append(self.api_version)
+        return get_schema(self, *args, **kwargs)
+
+    monkeypatch.setattr(SchemaGenerator, "get_schema", counting_get_schema)
+    return calls
+
+
+@pytest.fixture
+def client() -> APIClient:
+    return APIClient()
+
+
+def test_schema_is_generated_once(client, generated, schema_cache):
+    first = client.get(URL, {"format": "json"})
+    second = client.get(URL, {"format": "json"})
+
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content
+    assert json.loads(first.content)["paths"]["/api/v1/orders/changes/"]
+    assert generated == ["v1"]
+    assert (schema_cache / "openapi-v1-abc123.json").exists()
+    # YAML is rendered from the same document
+    assert client.get(URL).content.startswith(b"openapi:")
+    assert generated == ["v1"]
+
+
+def test_schema_is_revalidated_with_etag(client, generated):
+    response = client.get(URL)
+    assert "no-cache" in response["Cache-Control"]
+
+    not_modified = client.get(URL, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert client.get(URL, HTTP_IF_NONE_MATCH='"stale"').status_code == 200
+
+
+def test_schema_built_ahead_of_time_is_served_from_disk(client, generated, settings):
+    call_command("build_schema")
+    SchemaCache.clear()
+    generated.clear()
+
+    assert client.get(URL).status_code == 200
+    assert generated == []
+
+    # A new code version replaces the stored schema
+    settings.SCHEMA_CODE_VERSION = "def456"
+    SchemaCache.clear()
+    assert client.get(URL).status_code == 200
+    assert generated == ["v1"]
+    assert [path.name for path in SchemaCache().directory.iterdir()] == [
+        "openapi-v1-def456.json"
+    ]
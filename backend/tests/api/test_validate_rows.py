@@ -0,0 +1,75 @@
+import pytest
+from rest_framework.test import APIClient
+
+from core.models import Order
+
+URL = "/api/v1/orders/validate-rows/"
+
+VALID_ROW = {
+    "fromFirstName": "John",
+    "fromLastName": "Doe",
+    "fromAddress": "123 Main St",
+    "fromCity": "New York",
+    "fromZipCode": "10001",
+    "fromState": "NY",
+    "toFirstName": "Jane",
+    "toLastName": "Smith",
+    "toAddress": "456 Oak Ave",
+    "toAddress2": "Suite 100",
+    "toCity": "Los Angeles",
+    "toZipCode": "90001",
+    "toState": "CA",
+    "weightLbs": 1,
+    "weightOz": 0,
+    "length": 10,
+    "width": 8,
+    "height": 6,
+    "phoneNumber": "212-555-1234",
+}
+
+
+def _validate(*rows):
+    return APIClient().post(URL, {"rows": list(rows)}, format="json")
+
+
+@pytest.mark.django_db
+def test_only_the_given_rows_are_validated(settings):
+    settings.CSV_VALIDATE_ZIP_STATE = True
+    response = _validate(
+        {**VALID_ROW, "row": 7},
+        {**VALID_ROW, "row": 4120, "toState": "TX", "toCity": ""},
+        {**VALID_ROW, "row": 15, "phoneNumber2": "555-1234"},
+        {**VALID_ROW, "row": 16, "length": "ten"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "errors": {
+            "15": ["Invalid phone number 555-1234 (phone_number_2)"],
+            "16": ["Invalid data - invalid literal for int() with base 10: 'ten'"],
+            "4120": [
+                "Missing required fields: to_city",
+                "ZIP code 90001 (to_zip_code) is not in TX (to_state)",
+            ],
+        }
+    }
+    assert not Order.objects.exists()
+
+
+@pytest.mark.django_db
+def test_valid_rows_have_no_errors():
+    response = _validate({**VALID_ROW, "row": 2})
+
+    assert response.status_code == 200
+    assert response.json() == {"errors": {}}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "payload",
+    [{"rows": []}, {"rows": [VALID_ROW]}, {"rows": [{**VALID_ROW, "row": 1}]}],
+)
+def test_invalid_requests_are_rejected(payload):
+    response = APIClient().post(URL, payload, format="json")
+
+    assert response.status_code == 400
@@ -0,0 +1,80 @@
+import threading
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import close_old_connections, connection, transaction
+from core.models import Order, ShippingProvider
+from core.services.csv_service import CSVService
+
+IMPORTERS = 4
+READERS = 4
+IMPORTS_PER_THREAD = 5
+
+CSV_HEADER = b"""Header Row (ignored by CSVService)
+first name,last name,address,address2,city,zip/postal code,abbreviation,first name,last name,address,address2,city,zip/postal code,abbreviation,lbs,oz,length,width,height,phone num1,phone num2,order no,item-sku
+"""
+CSV_ROW = b"John,Doe,123 Main St,Apt 4,New York,10001,NY,Jane,Smith,456 Oak Ave,Suite 100,Los Angeles,90001,CA,5,8,10,8,6,212-555-1234,212-555-5678,ORD-001,SKU-123\n"
+ROWS_PER_IMPORT = 200
+
+
+def _run_threads(targets) -> list:
+    errors = []
+    barrier = threading.Barrier(len(targets))
+
+    def wrapper(target):
+        try:
+            barrier.wait()
+            target()
+        except Exception as e:  # noqa: BLE001 - collected and asserted on below
+            errors.append(e)
+        finally:
+            close_old_connections()
+            connection.close()
+
+    threads = [threading.Thread(target=wrapper, args=(t,)) for t in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="Requires SQLite")
+@pytest.mark.django_db(transaction=True)
+def test_sqlite_is_tuned_for_concurrency():
+    with connection.cursor() as cursor:
+        assert cursor.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert cursor.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert connection.transaction_mode == "IMMEDIATE"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_imports_and_reads_do_not_fail():
+    ShippingProvider.objects.create(id=2, name="Default", cost_per_pound="1.00")
+    content = CSV_HEADER + CSV_ROW * ROWS_PER_IMPORT
+
+    def importer():
+        for _ in range(IMPORTS_PER_THREAD):
+            service = CSVService(SimpleUploadedFile("orders.csv", content))
+            orders = service.create_orders()
+            assert service.is_valid, service.errors
+            assert len(orders) == ROWS_PER_IMPORT
+
+    def reader():
+        for _ in range(IMPORTS_PER_THREAD * 4):
+            list(Order.objects.select_related("from_address", "package")[:100])
+            Order.objects.filter(job__isnull=False).count()
+
+    def batch_updater():
+        # Read-then-write transactions, like the batch actions. With DEFERRED
+        # transactions the lock upgrade can deadlock and fail immediately.
+        for _ in range(IMPORTS_PER_THREAD * 4):
+            with transaction.atomic():
+                order_ids = list(Order.objects.values_list("id", flat=True)[:50])
+                Order.objects.filter(id__in=order_ids).update(phone_number_2="")
+
+    errors = _run_threads(
+        [importer] * IMPORTERS + [reader] * READERS + [batch_updater] * READERS
+    )
+
+    assert errors == []
+    assert Order.objects.count() == IMPORTERS * IMPORTS_PER_THREAD * ROWS_PER_IMPORT
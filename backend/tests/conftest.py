@@ -0,0 +1,89 @@
+import pytest
+from django.conf import settings
+from core.models import Address, Job, Order, OrderParty, Package, ShippingProvider
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(
+    django_db_modify_db_settings_parallel_suffix, tmp_path_factory
+):
+    # Use an on-disk test database so that SQLite's journal mode and locking
+    # behave as they do in production (in-memory databases ignore WAL).
+    if settings.DATABASES["default"]["ENGINE"] != "django.db.backends.sqlite3":
+        return
+    db_path = tmp_path_factory.mktemp("db") / "test.sqlite3"
+    settings.DATABASES["default"].setdefault("TEST", {})["NAME"] = str(db_path)
+
+
+@pytest.fixture(autouse=True)
+def data_dirs(settings, tmp_path):
+    """
+    Point the directories that uploads, labels, the schema and archives are
+    written to at the test's temporary directory, so that tests leave no files
+    behind in the source tree.
+    """
+    settings.UPLOAD_ERROR_REPORT_DIR = str(tmp_path / "error_reports")
+    settings.ORDER_ARCHIVE_DIR = str(tmp_path / "archive")
+    settings.SCHEMA_CACHE_DIR = str(tmp_path / "schema_cache")
+    settings.LABEL_CACHE_DIR = str(tmp_path / "label_cache")
+    settings.CACHES = {
+        **settings.CACHES,
+        "labels": {**settings.CACHES["labels"], "LOCATION": settings.LABEL_CACHE_DIR},
+    }
+    return tmp_path
+
+
+@pytest.fixture
+def providers(db):
+    return [
+        ShippingProvider.objects.create(name="Cheap", cost_per_pound="1.00"),
+        ShippingProvider.objects.create(name="Pricey", cost_per_pound="2.50"),
+    ]
+
+
+@pytest.fixture
+def order_factory(db):
+    """Fixture that creates an order (with its own parties, addresses and package)."""
+
+    def create_order(
+        job: Job,
+        weight: int = 16,
+        provider: ShippingProvider | None = None,
+        **package_fields,
+    ) -> Order:
+        sender = OrderParty.objects.create(first_name="John", last_name="Doe")
+        recipient = OrderParty.objects.create(first_name="Jane", last_name="Smith")
+        from_address = Address.objects.create(
+            name="John Doe",
+            address="123 Main St",
+            city="New York",
+            state="NY",
+            zip_code="10001",
+        )
+        to_address = Address.objects.create(
+            name="Jane Smith",
+            address="456 Oak Ave",
+            address_2="Suite 100",
+            city="Los Angeles",
+            state="CA",
+            zip_code="90001",
+        )
+        package = Package.objects.create(
+            length=package_fields.get("length", 10),
+            width=package_fields.get("width", 8),
+            height=package_fields.get("height", 6),
+            weight=weight,
+            item_sku=package_fields.get("item_sku", "SKU-123"),
+        )
+        return Order.objects.create(
+            job=job,
+            sender=sender,
+            recipient=recipient,
+            from_address=from_address,
+            to_address=to_address,
+            package=package,
+            shipping_provider=provider,
+            phone_number="+12125551234",
+        )
+
+    return create_order
@@ -0,0 +1,47 @@
+import json
+import os
+
+import pytest
+from django.core.management import CommandError, call_command
+
+# Wall-clock timings depend on the machine and its load, so comparing them with
+# the stored budget is opt-in
+timed = pytest.mark.skipif(
+    not os.environ.get("STARTUP_BENCHMARK"),
+    reason="Set STARTUP_BENCHMARK=1 to check startup timings",
+)
+
+
+def write_budget(path, budget: dict):
+    path.write_text(json.dumps(budget))
+    return path
+
+
+@timed
+def test_startup_is_within_stored_budget():
+    call_command("startup_benchmark", runs=3)
+
+
+def test_slow_startup_fails(tmp_path):
+    budget = write_budget(tmp_path / "budget.json", {"total_ms": 1})
+
+    with pytest.raises(CommandError, match="total_ms"):
+        call_command("startup_benchmark", runs=1, budget=budget)
+
+
+def test_eagerly_imported_deferred_module_fails(tmp_path):
+    budget = write_budget(tmp_path / "budget.json", {"deferred_modules": ["django"]})
+
+    with pytest.raises(CommandError, match="django is imported at startup"):
+        call_command("startup_benchmark", runs=1, budget=budget)
+
+
+def test_update_writes_timings_and_keeps_deferred_modules(tmp_path):
+    budget = write_budget(tmp_path / "budget.json", {"deferred_modules": ["polars"]})
+
+    call_command("startup_benchmark", runs=1, budget=budget, update=True, headroom=1)
+
+    saved = json.loads(budget.read_text())
+    assert saved["deferred_modules"] == ["polars"]
+    assert saved["total_ms"] >= saved["setup_ms"] > 0
+    assert saved["urlconf_ms"] > 0
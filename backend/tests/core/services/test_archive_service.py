@@ -0,0 +1,197 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from core.models import (
+    Address,
+    Job,
+    Order,
+    OrderParty,
+    OrderSummary,
+    Package,
+    ShippingProvider,
+)
+from core.services.archive_service import ArchiveError, ArchiveService
+from core.services.job_service import JobService
+
+
+@pytest.fixture
+def archive_dir(data_dirs):
+    return data_dirs / "archive"
+
+
+@pytest.fixture
+def job(providers, order_factory) -> Job:
+    job = Job.objects.create()
+    order_factory(job, weight=16, provider=providers[0])
+    order_factory(job, weight=40, provider=providers[1])
+    order_factory(job, weight=8)
+    return job
+
+
+@pytest.mark.django_db
+def test_archive_job_moves_orders_to_parquet(job, archive_dir):
+    summaries = {s.order_id: s for s in OrderSummary.objects.filter(job=job)}
+    total_cost = JobService(job=job).get_total_cost()
+
+    count = ArchiveService().archive_job(job)
+
+    job.refresh_from_db()
+    assert count == 3
+    assert job.archived_at is not None
+    assert (archive_dir / f"job-{job.id}.parquet").exists()
+    assert not Order.objects.filter(job=job).exists()
+    assert not OrderSummary.objects.exists()
+    assert not Address.objects.exists()
+    assert not OrderParty.objects.exists()
+    assert not Package.objects.exists()
+
+    service = ArchiveService()
+    assert service.get_order_ids(job.id) == sorted(summaries)
+    assert JobService(job=job).get_total_cost() == total_cost
+    for order_id, summary in summaries.items():
+        archived = service.get_order(order_id)
+        for field in OrderSummary._meta.concrete_fields:
+            assert getattr(archived, field.attname) == getattr(
+                summary, field.attname
+            ), field.attname
+
+
+@pytest.mark.django_db
+def test_archive_keeps_rows_used_by_other_orders(job, order_factory):
+    package = Package.objects.create(
+        length=1, width=1, height=1, weight=1, is_user_created=True
+    )
+    Order.objects.filter(job=job).update_package(package)
+    other = order_factory(Job.objects.create())
+    shared_address = other.to_address
+    Order.objects.filter(job=job).update_from_address(shared_address)
+
+    ArchiveService().archive_job(job)
+
+    assert Package.objects.filter(id=package.id).exists()
+    assert Address.objects.filter(id=shared_address.id).exists()
+    assert Order.objects.filter(id=other.id).exists()
+
+
+@pytest.mark.django_db
+def test_find_orders_filters_and_searches(job, order_factory):
+    order = Order.objects.filter(job=job).order_by("id").last()
+    order.recipient.first_name = "Zed"
+    order.recipient.save()
+    ArchiveService().archive_job(job)
+    service = ArchiveService()
+
+    assert service.find_orders(job.id).count() == 3
+    assert service.find_orders(job.id, {"recipient_first_name": "ze"}).count() == 1
+    found = service.find_orders(
+        job.id, search_terms=["zed"], search_columns=["recipient_first_name"]
+    )
+    assert [o.order_id for o in found[0:10]] == [order.id]
+    assert service.find_orders(job.id)[1:2][0].order_id == order.id - 1
+
+
+@pytest.mark.django_db
+def test_failed_deletion_removes_the_archive_file(job, archive_dir, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(ArchiveService, "delete_orders", fail)
+
+    with pytest.raises(RuntimeError):
+        ArchiveService().archive_job(job)
+
+    assert Order.objects.filter(job=job).count() == 3
+    assert not list(archive_dir.glob("*.parquet"))
+
+
+@pytest.mark.django_db
+def test_orders_added_after_the_export_are_not_deleted(
+    job, archive_dir, order_factory, monkeypatch
+):
+    export_job = ArchiveService.export_job
+
+    def export_then_add_order(self, job):
+        frame = export_job(self, job)
+        order_factory(job)
+        return frame
+
+    monkeypatch.setattr(ArchiveService, "export_job", export_then_add_order)
+
+    with pytest.raises(ArchiveError):
+        ArchiveService().archive_job(job)
+
+    assert Order.objects.filter(job=job).count() == 3
+    assert Job.objects.get(id=job.id).archived_at is None
+    assert not list(archive_dir.iterdir())
+
+
+@pytest.mark.django_db
+def test_get_order_only_reads_the_archive_of_its_job(job, archive_dir, order_factory):
+    other = Job.objects.create()
+    order_factory(other)
+    service = ArchiveService()
+    service.archive_job(other)
+    order_id = Order.objects.filter(job=job).order_by("id").first().id
+    service.archive_job(job)
+    # Reading the other job's file would fail
+    service.path_for(other.id).write_bytes(b"not parquet")
+
+    assert service.get_order(order_id).order_id == order_id
+    assert service.get_order(10_000) is None
+
+
+@pytest.mark.django_db
+def test_archive_jobs_command_archives_old_jobs(job, providers, order_factory):
+    Job.objects.filter(id=job.id).update(
+        created_at=timezone.now() - timedelta(days=100)
+    )
+    recent = Job.objects.create()
+    order_factory(recent)
+
+    call_command("archive_jobs", older_than=90)
+
+    assert Job.objects.get(id=job.id).archived_at is not None
+    assert Job.objects.get(id=recent.id).archived_at is None
+    assert Order.objects.filter(job=recent).count() == 1
+
+
+@pytest.mark.django_db
+def test_archives_without_billable_weights_are_costed_by_weight(job, archive_dir):
+    import polars as pl
+
+    service = ArchiveService()
+    service.archive_job(job)
+    path = service.path_for(job.id)
+    pl.read_parquet(path).drop("package_billable_weight").write_parquet(path)
+
+    # 16 oz at $1.00 and 40 oz at $2.50 per pound; the third order has no provider
+    assert service.get_total_cost(job.id) == Decimal("7.25")
+
+
+@pytest.mark.django_db
+def test_archived_total_cost_uses_rate_tables(job, order_factory, settings, tmp_path):
+    settings.RATE_TABLE_DIR = str(tmp_path / "rates")
+    (tmp_path / "rates" / "ground").mkdir(parents=True)
+    (tmp_path / "rates" / "ground" / "zones.csv").write_text(
+        "origin_first,origin_last,destination_first,destination_last,zone\n"
+        "100,100,900,900,2\n"
+    )
+    (tmp_path / "rates" / "ground" / "rates.csv").write_text("max_weight,2\n10,6.75\n")
+    zoned = ShippingProvider.objects.create(
+        name="Zoned", cost_per_pound="0", rate_table="ground"
+    )
+    flat_cost = JobService(job=job).get_total_cost()
+    order_factory(job, weight=16, provider=zoned)
+    # Over the heaviest weight break
+    unpriced = order_factory(job, weight=320, provider=zoned)
+    cost = JobService(job=job).get_cost()
+
+    ArchiveService().archive_job(job)
+
+    assert cost.total == flat_cost + Decimal("6.75")
+    assert cost.unpriced_order_ids == [unpriced.id]
+    assert JobService(job=job).get_cost() == cost
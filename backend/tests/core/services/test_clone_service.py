@@ -0,0 +1,116 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.serializers import OrderSerializer
+from core.models import Address, Job, Order, OrderParty, OrderSummary, Package
+from core.services.clone_service import JobCloneService
+
+# Fields of an order that its copy has different values for
+NEW_FIELDS = {"id", "job", "created_at"}
+
+
+@pytest.fixture
+def job(providers, order_factory) -> Job:
+    job = Job.objects.create()
+    order_factory(job, weight=16, provider=providers[0])
+    order = order_factory(job, weight=24)
+    order.order_number = "A-2"
+    order.save()
+    return job
+
+
+def _without_ids(data: dict) -> dict:
+    data = {key: value for key, value in data.items() if key not in NEW_FIELDS}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            data[key] = {k: v for k, v in value.items() if k != "id"}
+    return data
+
+
+@pytest.mark.django_db
+def test_clone_copies_orders_and_related_rows(job, order_factory):
+    originals = list(job.orders.order_by("id"))
+    deleted = Address.objects.create(name="X", address="X", city="X", state="X")
+    deleted_id = deleted.id
+    deleted.delete()
+
+    with CaptureQueriesContext(connection) as queries:
+        clone = JobCloneService(job).clone()
+
+    copies = list(clone.orders.order_by("id"))
+    assert len(copies) == 2
+    for original, copy in zip(originals, copies):
+        assert _without_ids(OrderSerializer(copy).data) == _without_ids(
+            OrderSerializer(original).data
+        )
+        assert copy.from_address_id != original.from_address_id
+        assert copy.sender_id != original.sender_id
+        assert copy.package_id != original.package_id
+    assert Address.objects.count() == 8
+    # IDs of deleted rows aren't reused
+    assert min(copy.from_address_id for copy in copies) > deleted_id
+    assert OrderParty.objects.count() == 8
+    # Summaries of the copies are written too
+    assert OrderSummary.objects.filter(job=clone).count() == 2
+
+    # Set-based: the number of statements doesn't depend on the number of orders
+    order_factory(job)
+    with CaptureQueriesContext(connection) as larger_job_queries:
+        JobCloneService(job).clone()
+    assert len(larger_job_queries) == len(queries)
+
+
+@pytest.mark.django_db
+def test_clone_shares_related_rows_as_configured(job):
+    saved = Package.objects.create(
+        length=1, width=1, height=1, weight=1, is_user_created=True
+    )
+    job.orders.update_package(saved)
+
+    clone = JobCloneService(job, share_addresses=True, share_parties=True).clone()
+
+    original, copy = job.orders.order_by("id").first(), clone.orders.first()
+    assert copy.from_address_id == original.from_address_id
+    assert copy.recipient_id == original.recipient_id
+    # Saved packages are always shared
+    assert copy.package_id == saved.id
+    assert Package.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_rows_shared_between_orders_are_copied_once(job):
+    first, second = job.orders.order_by("id")
+    second.from_address = first.from_address
+    second.save()
+
+    clone = JobCloneService(job).clone()
+
+    copies = list(clone.orders.order_by("id"))
+    assert copies[0].from_address_id == copies[1].from_address_id
+    assert copies[0].from_address_id != first.from_address_id
+    assert Address.objects.filter(sent_orders__job=clone).distinct().count() == 1
+
+
+@pytest.mark.django_db
+def test_each_clone_uses_its_own_temporary_tables(job):
+    def temporary_tables():
+        with CaptureQueriesContext(connection) as queries:
+            JobCloneService(job).clone()
+        return {
+            query["sql"].split()[3]
+            for query in queries
+            if "CREATE TEMPORARY TABLE" in query["sql"]
+        }
+
+    first, second = temporary_tables(), temporary_tables()
+
+    assert len(first) == len(second) == 3
+    assert not first & second
+
+
+@pytest.mark.django_db
+def test_clone_of_empty_job():
+    clone = JobCloneService(Job.objects.create()).clone()
+
+    assert not Order.objects.filter(job=clone).exists()
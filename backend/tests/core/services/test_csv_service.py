@@ -45,8 +45,8 @@ def test_invalid_header_fails():
 def test_create_orders_from_valid_csv():
     csv_content = b"""Header Row (ignored by CSVService)
 first name,last name,address,address2,city,zip/postal code,abbreviation,first name,last name,address,address2,city,zip/postal code,abbreviation,lbs,oz,length,width,height,phone num1,phone num2,order no,item-sku
-John,Doe,123 Main St,Apt 4,New York,10001,NY,Jane,Smith,456 Oak Ave,Suite 100,Los Angeles,90001,CA,5,8,10,8,6,555-1234,555-5678,ORD-001,SKU-123
-Alice,Johnson,789 Pine Rd,,Chicago,60601,IL,Bob,Williams,321 Elm St,,Houston,77001,TX,3,4,12,10,8,555-9876,555-4321,ORD-002,SKU-456
+John,Doe,123 Main St,Apt 4,New York,10001,NY,Jane,Smith,456 Oak Ave,Suite 100,Los Angeles,90001,CA,5,8,10,8,6,212-555-1234,212-555-5678,ORD-001,SKU-123
+Alice,Johnson,789 Pine Rd,,Chicago,60601,IL,Bob,Williams,321 Elm St,,Houston,77001,TX,3,4,12,10,8,212-555-9876,212-555-4321,ORD-002,SKU-456
 """
 
     uploaded_file = SimpleUploadedFile("test.csv", csv_content, content_type="text/csv")
@@ -106,8 +106,8 @@ Alice,Johnson,789 Pine Rd,,Chicago,60601,IL,Bob,Williams,321 Elm St,,Houston,770
     assert first_order.package.weight == 88
     assert first_order.package.item_sku == "SKU-123"
 
-    assert first_order.phone_number == "555-1234"
-    assert first_order.phone_number_2 == "555-5678"
+    assert first_order.phone_number == "+12125551234"
+    assert first_order.phone_number_2 == "+12125555678"
 
     second_order = orders[1]
     assert second_order.sender.first_name == "Alice"
@@ -135,5 +135,139 @@ Alice,Johnson,789 Pine Rd,,Chicago,60601,IL,Bob,Williams,321 Elm St,,Houston,770
     assert second_order.package.weight == 52
     assert second_order.package.item_sku == "SKU-456"
 
-    assert second_order.phone_number == "555-9876"
-    assert second_order.phone_number_2 == "555-4321"
+    assert second_order.phone_number == "+12125559876"
+    assert second_order.phone_number_2 == "+12125554321"
+
+
+def _upload(*rows: str) -> SimpleUploadedFile:
+    header = (
+        "Header Row (ignored by CSVService)\n"
+        "first name,last name,address,address2,city,zip/postal code,abbreviation,"
+        "first name,last name,address,address2,city,zip/postal code,abbreviation,"
+        "lbs,oz,length,width,height,phone num1,phone num2,order no,item-sku\n"
+    )
+    return SimpleUploadedFile("test.csv", (header + "\n".join(rows)).encode())
+
+
+def _row(from_zip: str, from_state: str, to_zip: str, to_state: str) -> str:
+    return (
+        f"John,Doe,123 Main St,,New York,{from_zip},{from_state},"
+        f"Jane,Smith,456 Oak Ave,,Los Angeles,{to_zip},{to_state},1,0,10,8,6,,,,"
+    )
+
+
+@pytest.fixture
+def zip_state_check(settings):
+    settings.CSV_VALIDATE_ZIP_STATE = True
+
+
+@pytest.mark.usefixtures("zip_state_check")
+def test_zip_codes_must_belong_to_their_states():
+    service = CSVService(
+        _upload(
+            _row("10001", "NY", "90001-1234", "ca"),
+            _row("10001", "NJ", "90001", "CA"),
+            _row("02134", "MA", "96799", "AS"),
+            _row("60601", "IL", "90001", "TX"),
+            _row("10001", "CA", "77001", "NY"),
+        )
+    )
+
+    assert service.errors == {
+        3: ["ZIP code 10001 (from_zip_code) is not in NJ (from_state)"],
+        5: ["ZIP code 90001 (to_zip_code) is not in TX (to_state)"],
+        6: [
+            "ZIP code 10001 (from_zip_code) is not in CA (from_state)",
+            "ZIP code 77001 (to_zip_code) is not in NY (to_state)",
+        ],
+    }
+
+
+@pytest.mark.usefixtures("zip_state_check")
+def test_zip_state_check_follows_completeness_errors_and_skips_unknown_zips():
+    service = CSVService(
+        _upload(
+            _row("10001", "", "90001", "NY"),
+            _row("K1A 0B1", "ON", "00100", "CA"),
+        )
+    )
+
+    assert service.errors == {
+        2: [
+            "Missing required fields: from_state",
+            "ZIP code 90001 (to_zip_code) is not in NY (to_state)",
+        ],
+    }
+
+
+def test_zip_state_check_is_off_by_default():
+    service = CSVService(_upload(_row("10001", "NJ", "90001", "TX")))
+
+    assert service.is_valid is True
+
+
+def _phone_row(phone_number: str, phone_number_2: str) -> str:
+    return (
+        "John,Doe,123 Main St,,New York,10001,NY,Jane,Smith,456 Oak Ave,,"
+        f"Los Angeles,90001,CA,1,0,10,8,6,{phone_number},{phone_number_2},,"
+    )
+
+
+def test_phone_numbers_are_normalized_to_e164():
+    service = CSVService(
+        _upload(
+            _phone_row("(212) 555-1234", ""),
+            _phone_row(" 212.555.1234 ", "+44 20 7946 0958"),
+        )
+    )
+
+    assert service.is_valid is True, service.errors
+    assert service.df["phone_number"].to_list() == ["+12125551234"] * 2
+    assert service.df["phone_number_2"].to_list() == ["", "+442079460958"]
+    rows = service.normalize_rows()
+    assert rows[0]["phone_number"] is rows[1]["phone_number"]
+    assert rows[0]["phone_number_2"] == ""
+
+
+@pytest.mark.usefixtures("zip_state_check")
+def test_invalid_phone_numbers_are_row_errors():
+    service = CSVService(
+        _upload(
+            _phone_row("212-555-1234", "555-1234"),
+            _phone_row("555-1234", "not a number"),
+            _row("10001", "NJ", "90001", "CA"),
+        )
+    )
+
+    assert service.errors == {
+        2: ["Invalid phone number 555-1234 (phone_number_2)"],
+        3: [
+            "Invalid phone number 555-1234 (phone_number)",
+            "Invalid phone number not a number (phone_number_2)",
+        ],
+        4: ["ZIP code 10001 (from_zip_code) is not in NJ (from_state)"],
+    }
+
+
+@pytest.mark.django_db
+def test_imported_phone_numbers_are_parsed_once(monkeypatch):
+    from core.models import ShippingProvider
+    from phonenumber_field.phonenumber import PhoneNumber
+
+    ShippingProvider.objects.get_or_create(id=2, defaults={"cost_per_pound": 1})
+    service = CSVService(_upload(*[_phone_row("(646) 555-0101", "")] * 3))
+    parse = PhoneNumber.from_string
+    calls = []
+    monkeypatch.setattr(
+        PhoneNumber,
+        "from_string",
+        classmethod(
+            lambda cls, *args, **kwargs: calls.append(args) or parse(*args, **kwargs)
+        ),
+    )
+
+    orders = service.create_orders()
+
+    assert calls == []
+    assert [str(order.phone_number) for order in orders] == ["+16465550101"] * 3
+    assert set(Order.objects.values_list("phone_number", flat=True)) == {"+16465550101"}
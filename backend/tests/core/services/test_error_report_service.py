@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from core.models import ErrorReport
+from core.services.error_report_service import ErrorReportService
+
+
+@pytest.fixture
+def service(settings, tmp_path) -> ErrorReportService:
+    settings.UPLOAD_ERROR_REPORT_RETENTION = 60 * 60
+    return ErrorReportService(directory=tmp_path)
+
+
+def _file() -> SimpleUploadedFile:
+    return SimpleUploadedFile("orders.csv", b"ignored\na,b\n1,2\n3,4\n")
+
+
+@pytest.mark.django_db
+def test_create_stores_all_row_errors(service):
+    report = service.create({3: ["b", "c"], "general": ["x"], 2: ["a"]}, _file())
+
+    assert report.general_errors == ["x"]
+    assert (report.row_count, report.error_count) == (2, 3)
+    assert service.rows(report)[0:10] == [
+        {"row": 2, "errors": ["a"]},
+        {"row": 3, "errors": ["b", "c"]},
+    ]
+    assert service.upload_path_for(report).read_bytes() == _file().read()
+
+
+@pytest.mark.django_db
+def test_expired_reports_are_deleted(service):
+    old = service.create({2: ["a"]}, _file())
+    ErrorReport.objects.filter(id=old.id).update(
+        created_at=timezone.now() - timedelta(hours=2)
+    )
+
+    new = service.create({2: ["a"]}, _file())
+
+    assert list(ErrorReport.objects.all()) == [new]
+    assert not service.path_for(old).exists()
+    assert not service.upload_path_for(old).exists()
+    assert service.path_for(new).exists()
@@ -0,0 +1,166 @@
+import pytest
+from asgiref.sync import async_to_sync
+from decimal import Decimal
+from core.models import Job, ShippingProvider
+from core.services.job_service import JobService
+
+# Small enough that billable weight is the actual weight
+SMALL = {"length": 4, "width": 4, "height": 4}
+
+
+@pytest.mark.django_db
+def test_rate_matrix_covers_every_order_and_provider(providers, order_factory):
+    job = Job.objects.create()
+    first = order_factory(job, weight=16, provider=providers[1], **SMALL)
+    second = order_factory(job, weight=40, provider=providers[1], **SMALL)
+
+    matrix = JobService(job).get_rate_matrix()
+
+    assert matrix.shape == (4, 3)
+    costs = {(o, p): c for o, p, c in matrix.iter_rows()}
+    assert costs[(first.id, providers[0].id)] == Decimal("1.00")
+    assert costs[(first.id, providers[1].id)] == Decimal("2.50")
+    assert costs[(second.id, providers[1].id)] == Decimal("6.25")
+
+
+@pytest.mark.django_db
+def test_provider_totals_match_total_cost(providers, order_factory):
+    job = Job.objects.create()
+    order_factory(job, weight=16, provider=providers[1], **SMALL)
+    order_factory(job, weight=40, provider=providers[1], **SMALL)
+    service = JobService(job)
+
+    totals = dict(service.get_provider_totals().iter_rows())
+
+    assert totals[providers[0].id] == Decimal("3.50")
+    assert totals[providers[1].id] == Decimal("8.75")
+    assert service.get_total_cost() == totals[providers[1].id]
+
+
+@pytest.mark.django_db
+def test_costs_use_dimensional_weight_when_greater(providers, order_factory):
+    job = Job.objects.create()
+    # 20 x 10 x 10 in is 2000 / 139 = 14.3885 lb, more than the actual 2.5 lb
+    bulky = order_factory(
+        job, weight=40, provider=providers[0], length=20, width=10, height=10
+    )
+    # 1 x 1 x 1 in is 0.0072 lb, less than the actual 1 lb
+    order_factory(job, weight=16, provider=providers[1], length=1, width=1, height=1)
+
+    assert bulky.package.billable_weight == Decimal("14.3885")
+    assert JobService(job).get_total_cost() == Decimal("14.3885") + Decimal("2.5")
+    # Rates are exact too: providers[1] costs 2.50 per pound
+    costs = {(o, p): c for o, p, c in JobService(job).get_rate_matrix().iter_rows()}
+    assert costs[(bulky.id, providers[1].id)] == Decimal("35.97125")
+
+    bulky.package.height = 5
+    bulky.package.save()
+    bulky.package.refresh_from_db()
+    assert bulky.package.billable_weight == Decimal("7.1942")
+    assert JobService(job).get_total_cost() == Decimal("7.1942") + Decimal("2.5")
+
+
+@pytest.mark.django_db
+def test_assign_cheapest_providers_updates_all_orders(providers, order_factory):
+    job = Job.objects.create()
+    order_factory(job, weight=16, provider=providers[1])
+    order_factory(job, weight=40, provider=providers[1])
+    other_job_order = order_factory(Job.objects.create(), 8, providers[1])
+
+    assignment = JobService(job).assign_cheapest_providers()
+
+    assert assignment.updated == 2
+    assert assignment.unpriced_order_ids == []
+    assert set(job.orders.values_list("shipping_provider", flat=True)) == {
+        providers[0].id
+    }
+    other_job_order.refresh_from_db()
+    assert other_job_order.shipping_provider == providers[1]
+
+
+@pytest.mark.django_db
+def test_assign_cheapest_providers_on_empty_job(providers, order_factory):
+    assignment = JobService(Job.objects.create()).assign_cheapest_providers()
+    assert assignment.updated == 0
+
+
+@pytest.fixture
+def zoned_provider(settings, tmp_path):
+    settings.RATE_TABLE_DIR = str(tmp_path)
+    (tmp_path / "ground").mkdir()
+    # Orders from the factory ship from 100xx to 900xx
+    (tmp_path / "ground" / "zones.csv").write_text(
+        "origin_first,origin_last,destination_first,destination_last,zone\n"
+        "100,199,900,999,5\n"
+    )
+    (tmp_path / "ground" / "rates.csv").write_text("max_weight,5\n1,10.00\n5,12.50\n")
+    return ShippingProvider.objects.create(
+        name="Zoned", cost_per_pound="0", rate_table="ground"
+    )
+
+
+@pytest.mark.django_db
+def test_costs_use_rate_tables(providers, order_factory, zoned_provider):
+    job = Job.objects.create()
+    light = order_factory(job, weight=16, provider=zoned_provider, **SMALL)
+    order_factory(job, weight=40, provider=zoned_provider, **SMALL)
+    # Over the heaviest weight break, so the zoned provider can't ship it
+    heavy = order_factory(job, weight=160, provider=providers[0], **SMALL)
+    service = JobService(job)
+
+    assert service.get_total_cost() == Decimal("10.00") + Decimal("12.50") + 10
+    assert async_to_sync(service.aget_total_cost)() == service.get_total_cost()
+
+    matrix = service.get_rate_matrix()
+    costs = {(o, p): c for o, p, c in matrix.iter_rows()}
+    assert costs[(light.id, zoned_provider.id)] == Decimal("10.00")
+    assert costs[(light.id, providers[0].id)] == Decimal("1.00")
+    assert (heavy.id, zoned_provider.id) not in costs
+    cheapest = dict(
+        service.get_cheapest_providers(matrix)
+        .select("order_id", "provider_id")
+        .iter_rows()
+    )
+    assert cheapest[heavy.id] == providers[0].id
+
+
+@pytest.mark.django_db
+def test_assign_cheapest_providers_keeps_provider_of_unpriced_orders(
+    order_factory, zoned_provider
+):
+    job = Job.objects.create()
+    priced = order_factory(job, weight=16, **SMALL)
+    # No zone between the ZIP codes
+    elsewhere = order_factory(job, weight=16, **SMALL)
+    elsewhere.to_address.zip_code = "10001"
+    elsewhere.to_address.save()
+
+    assignment = JobService(job).assign_cheapest_providers()
+
+    assert assignment.updated == 1
+    assert assignment.unpriced_order_ids == [elsewhere.id]
+    priced.refresh_from_db()
+    elsewhere.refresh_from_db()
+    assert priced.shipping_provider == zoned_provider
+    assert elsewhere.shipping_provider is None
+
+
+@pytest.mark.django_db
+def test_orders_that_rate_tables_cannot_price_are_listed(
+    providers, order_factory, zoned_provider
+):
+    job = Job.objects.create()
+    order_factory(job, weight=16, provider=zoned_provider, **SMALL)
+    # Over the heaviest weight break
+    heavy = order_factory(job, weight=160, provider=zoned_provider, **SMALL)
+    # No zone between the ZIP codes
+    elsewhere = order_factory(job, weight=16, provider=zoned_provider, **SMALL)
+    elsewhere.to_address.zip_code = "10001"
+    elsewhere.to_address.save()
+    service = JobService(job)
+
+    cost = service.get_cost()
+
+    assert cost.total == Decimal("10.00")
+    assert cost.unpriced_order_ids == [heavy.id, elsewhere.id]
+    assert async_to_sync(service.aget_cost)() == cost
@@ -0,0 +1,74 @@
+import io
+import zipfile
+import pytest
+from django.test import override_settings
+from core.labels import LabelFormat
+from core.models import Job
+from core.services import label_service
+from core.services.label_service import LabelService
+
+
+@pytest.fixture
+def label_cache(data_dirs):
+    return data_dirs / "label_cache"
+
+
+@pytest.fixture
+def job(providers, order_factory) -> Job:
+    job = Job.objects.create()
+    for weight in (16, 24, 40):
+        order_factory(job, weight=weight, provider=providers[0])
+    return job
+
+
+@pytest.mark.django_db
+@override_settings(LABEL_RENDER_CHUNK_SIZE=1, LABEL_RENDER_WORKERS=2)
+def test_pdf_labels_are_merged_into_one_document(job):
+    pdf = b"".join(LabelService(job, LabelFormat.PDF).stream())
+
+    assert pdf.startswith(b"%PDF-1.4")
+    assert pdf.rstrip().endswith(b"%%EOF")
+    assert b"/Type /Pages" in pdf
+    assert b"/Count 3" in pdf
+
+
+@pytest.mark.django_db
+def test_zpl_labels_are_zipped_one_file_per_order(job):
+    archive = b"".join(LabelService(job, LabelFormat.ZPL).stream())
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        names = zf.namelist()
+        first = zf.read(names[0]).decode()
+
+    order_ids = list(job.orders.order_by("id").values_list("id", flat=True))
+    assert names == [f"order-{order_id}.zpl" for order_id in order_ids]
+    assert first.startswith("^XA")
+    assert first.rstrip().endswith("^XZ")
+    assert "Jane Smith" in first
+
+
+@pytest.mark.django_db
+@override_settings(LABEL_RENDER_WORKERS=1)
+def test_unchanged_orders_are_not_rendered_again(job, monkeypatch, label_cache):
+    rendered_counts = []
+    original_render_chunk = label_service.render_chunk
+
+    def counting_render_chunk(label_format, labels):
+        rendered_counts.append(len(labels))
+        return original_render_chunk(label_format, labels)
+
+    monkeypatch.setattr(label_service, "render_chunk", counting_render_chunk)
+
+    first = b"".join(LabelService(job).stream())
+    second = b"".join(LabelService(job).stream())
+    assert first == second
+    assert rendered_counts == [3]
+    # Shared with the other processes
+    assert len(list(label_cache.iterdir())) == 3
+
+    order = job.orders.order_by("id").first()
+    order.package.weight = 99
+    order.package.save()
+    b"".join(LabelService(job).stream())
+
+    assert rendered_counts == [3, 1]
@@ -0,0 +1,212 @@
+import pytest
+from django.db import connection
+
+from core.models import (
+    Address,
+    Job,
+    Order,
+    OrderChange,
+    OrderSummary,
+    Package,
+    ShippingProvider,
+)
+from core.services.order_import import (
+    OrderImporter,
+    PostgresCopyOrderImporter,
+    row_hash,
+)
+
+postgres_only = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Requires PostgreSQL"
+)
+
+
+def make_row(i: int) -> dict:
+    return {
+        "from_name": f"Sender {i}",
+        "from_address": f"{i} Main St",
+        "from_address_2": "",
+        "from_city": "New York",
+        "from_state": "NY",
+        "from_zip_code": "10001",
+        "to_name": f"Recipient {i}",
+        "to_address": f"{i} Oak Ave",
+        "to_address_2": "Suite 100",
+        "to_city": "Los Angeles",
+        "to_state": "CA",
+        "to_zip_code": "90001",
+        "sender_first_name": "Sender",
+        "sender_last_name": str(i),
+        "recipient_first_name": "Recipient",
+        "recipient_last_name": str(i),
+        "length": 10,
+        "width": 8,
+        "height": 6,
+        "weight": 16 + i,
+        "item_sku": f"SKU-{i}",
+        "phone_number": "+12125551234",
+        "phone_number_2": "",
+        "order_number": f"ORD-{i}",
+    }
+
+
+@pytest.fixture
+def job(db):
+    return Job.objects.create()
+
+
+@pytest.fixture
+def provider(db):
+    return ShippingProvider.objects.create(name="Default", cost_per_pound="1.00")
+
+
+def assert_rows_imported(job: Job, rows: list):
+    orders = list(
+        job.orders.select_related(
+            "sender", "recipient", "from_address", "to_address", "package"
+        ).order_by("id")
+    )
+    assert len(orders) == len(rows)
+    for order, row in zip(orders, rows):
+        assert order.from_address.name == row["from_name"]
+        assert order.to_address.address_2 == row["to_address_2"]
+        assert order.to_address.country == "USA"
+        assert order.sender.last_name == row["sender_last_name"]
+        assert order.recipient.last_name == row["recipient_last_name"]
+        assert order.package.weight == row["weight"]
+        assert order.package.item_sku == row["item_sku"]
+        assert order.package.is_user_created is False
+        assert str(order.phone_number) == row["phone_number"]
+        assert order.order_number == row["order_number"]
+        assert order.row_hash == row_hash(row)
+        assert order.created_at is not None
+
+
+def test_generic_importer_used_on_sqlite(job, provider):
+    if connection.vendor == "postgresql":
+        pytest.skip("Requires a database without COPY support")
+
+    importer = OrderImporter.for_connection(job, provider)
+    assert type(importer) is OrderImporter
+
+
+def test_generic_importer_creates_linked_records(job, provider):
+    rows = [make_row(i) for i in range(5)]
+
+    orders = OrderImporter(job, provider).import_rows(rows)
+
+    assert len(orders) == 5
+    assert_rows_imported(job, rows)
+
+
+@postgres_only
+def test_copy_importer_used_on_postgres(job, provider, settings):
+    assert isinstance(
+        OrderImporter.for_connection(job, provider), PostgresCopyOrderImporter
+    )
+
+    settings.ORDER_IMPORT_USE_COPY = False
+    assert type(OrderImporter.for_connection(job, provider)) is OrderImporter
+
+
+@postgres_only
+def test_copy_importer_creates_linked_records(job, provider):
+    rows = [make_row(i) for i in range(50)]
+
+    orders = PostgresCopyOrderImporter(job, provider).import_rows(rows)
+
+    assert [order.id for order in orders] == list(
+        job.orders.order_by("id").values_list("id", flat=True)
+    )
+    assert_rows_imported(job, rows)
+
+
+@postgres_only
+def test_copy_importer_matches_generic_importer(provider):
+    rows = [make_row(i) for i in range(10)]
+    copy_job = Job.objects.create()
+    generic_job = Job.objects.create()
+
+    PostgresCopyOrderImporter(copy_job, provider).import_rows(rows)
+    OrderImporter(generic_job, provider).import_rows(rows)
+
+    fields = [
+        "from_address__name",
+        "to_address__zip_code",
+        "sender__first_name",
+        "recipient__last_name",
+        "package__weight",
+        "package__item_sku",
+        "phone_number",
+        "phone_number_2",
+        "order_number",
+        "row_hash",
+    ]
+    assert list(copy_job.orders.order_by("id").values(*fields)) == list(
+        generic_job.orders.order_by("id").values(*fields)
+    )
+
+
+def test_row_hash_ignores_phone_number_type():
+    from phonenumber_field.phonenumber import PhoneNumber
+
+    row = make_row(1)
+    parsed = {**row, "phone_number": PhoneNumber.from_string(row["phone_number"])}
+
+    assert row_hash(parsed) == row_hash(row)
+    assert row_hash({**row, "weight": 99}) != row_hash(row)
+
+
+@pytest.mark.parametrize(
+    "importer_class",
+    [
+        OrderImporter,
+        pytest.param(PostgresCopyOrderImporter, marks=postgres_only),
+    ],
+)
+def test_upsert_rows_only_rewrites_changed_rows(job, provider, importer_class):
+    importer = importer_class(job, provider)
+    originals = importer.import_rows([make_row(i) for i in range(3)])
+    other_provider = ShippingProvider.objects.create(name="Other", cost_per_pound=2)
+    Order.objects.filter(id=originals[1].id).update_shipping_provider(other_provider)
+
+    changed = {**make_row(1), "to_city": "San Diego"}
+    result = importer.upsert_rows([make_row(0), changed, make_row(3)])
+
+    assert result.unchanged == 1
+    assert [order.order_number for order in result.updated] == ["ORD-1"]
+    assert [order.order_number for order in result.created] == ["ORD-3"]
+
+    orders = {order.order_number: order for order in job.orders.all()}
+    # Orders missing from the upload are kept, and every order keeps its ID
+    assert sorted(orders) == ["ORD-0", "ORD-1", "ORD-2", "ORD-3"]
+    assert [orders[f"ORD-{i}"].id for i in range(3)] == [o.id for o in originals]
+    assert orders["ORD-1"].to_address.city == "San Diego"
+    # The shipping provider chosen since the import is kept
+    assert orders["ORD-1"].shipping_provider == other_provider
+    assert OrderChange.objects.filter(
+        order_id=originals[1].id, kind=OrderChange.Kind.UPDATED
+    ).exists()
+    assert not OrderChange.objects.filter(kind=OrderChange.Kind.DELETED).exists()
+
+    summaries = OrderSummary.objects.filter(job=job)
+    assert summaries.count() == 4
+    assert summaries.get(order_number="ORD-1").to_address_city == "San Diego"
+
+    # The records the order no longer refers to are deleted
+    assert not Address.objects.filter(id=originals[1].to_address_id).exists()
+    assert not Package.objects.filter(id=originals[1].package_id).exists()
+
+
+def test_upsert_rows_with_no_changes_writes_nothing(
+    job, provider, django_assert_max_num_queries
+):
+    rows = [make_row(i) for i in range(3)]
+    OrderImporter(job, provider).import_rows(rows)
+    order_ids = list(job.orders.values_list("id", flat=True))
+
+    with django_assert_max_num_queries(3):
+        result = OrderImporter(job, provider).upsert_rows(rows)
+
+    assert (len(result.created), len(result.updated), result.unchanged) == (0, 0, 3)
+    assert list(job.orders.values_list("id", flat=True)) == order_ids
@@ -0,0 +1,145 @@
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import override_settings
+
+from core.admission import AdmissionPool, get_pool, upload_cost
+from core.exceptions import ServerBusy
+
+
+def _pool(**kwargs) -> AdmissionPool:
+    options = {"budget": 100, "max_queued": 2, "timeout": 0.1, "retry_after": 7}
+    return AdmissionPool("test", **{**options, **kwargs})
+
+
+def test_admits_requests_while_within_budget():
+    pool = _pool()
+
+    first = pool.admit(60)
+    second = pool.admit(40)
+
+    assert pool.in_flight == 100
+    first.release()
+    second.release()
+    assert pool.in_flight == 0
+
+
+def test_rejects_request_over_budget_after_timeout():
+    pool = _pool()
+    pool.admit(60)
+
+    with pytest.raises(ServerBusy) as exc_info:
+        pool.admit(50)
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.wait == 7
+    assert pool.queued == 0
+
+
+def test_request_larger_than_budget_is_admitted_alone():
+    pool = _pool()
+
+    admission = pool.admit(500)
+
+    assert pool.try_acquire(1) is None
+    admission.release()
+    assert pool.try_acquire(1) is not None
+
+
+def test_release_is_idempotent():
+    pool = _pool()
+    admission = pool.admit(60)
+
+    admission.release()
+    admission.release()
+
+    assert pool.in_flight == 0
+
+
+def test_resized_admission_holds_the_new_cost():
+    pool = _pool()
+    admission = pool.admit(60)
+
+    admission.resize(20)
+    assert pool.in_flight == 20
+    admission.resize(100)
+    assert pool.in_flight == 100
+    admission.release()
+    assert pool.in_flight == 0
+
+
+def test_growing_admission_over_budget_is_rejected_and_released():
+    pool = _pool()
+    pool.admit(50)
+    admission = pool.admit(50)
+
+    with pytest.raises(ServerBusy):
+        admission.resize(60)
+
+    assert pool.in_flight == 50
+    admission.release()
+    assert pool.in_flight == 50
+
+
+def test_waiting_request_is_admitted_when_capacity_is_released():
+    pool = _pool(timeout=5)
+    held = pool.admit(100)
+    admitted = []
+
+    waiter = threading.Thread(target=lambda: admitted.append(pool.admit(50)))
+    waiter.start()
+    threading.Timer(0.05, held.release).start()
+    waiter.join(timeout=5)
+
+    assert len(admitted) == 1
+    assert pool.in_flight == 50
+
+
+def test_rejects_immediately_when_queue_is_full():
+    pool = _pool(max_queued=0, timeout=5)
+    pool.admit(100)
+
+    with pytest.raises(ServerBusy):
+        pool.admit(1)
+
+
+def test_async_admission_waits_for_capacity():
+    pool = _pool(timeout=5)
+    held = pool.admit(100)
+    threading.Timer(0.05, held.release).start()
+
+    admission = async_to_sync(pool.aadmit)(80)
+
+    assert admission.cost == 80
+    assert pool.in_flight == 80
+    assert pool.queued == 0
+
+
+def test_async_admission_rejects_after_timeout():
+    pool = _pool()
+    pool.admit(100)
+
+    with pytest.raises(ServerBusy):
+        async_to_sync(pool.aadmit)(1)
+    assert pool.queued == 0
+
+
+def test_get_pool_is_disabled_by_zero_budget():
+    with override_settings(ADMISSION_BATCH_BUDGET_ORDERS=0):
+        assert get_pool("batch") is None
+    with override_settings(ADMISSION_BATCH_BUDGET_ORDERS=10):
+        assert get_pool("batch").budget == 10
+        assert get_pool("batch") is get_pool("batch")
+
+
+@override_settings(
+    ADMISSION_UPLOAD_MIN_BYTES=1000,
+    UPLOAD_MAX_COMPRESSION_RATIO=100,
+    UPLOAD_MAX_DECOMPRESSED_SIZE=50_000,
+)
+def test_upload_cost():
+    assert upload_cost(10) == 1000
+    assert upload_cost(2000) == 2000
+    assert upload_cost(200, compressed=True) == 20_000
+    assert upload_cost(2000, compressed=True) == 50_000
@@ -0,0 +1,77 @@
+import gzip
+import io
+
+import pytest
+import zstandard
+
+from core import compression
+from core.compression import (
+    Compression,
+    DecompressionError,
+    decompressed,
+    detect_compression,
+)
+
+CONTENT = b"first name,last name\n" + b"John,Doe\n" * 1000
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        (CONTENT, Compression.NONE),
+        (gzip.compress(CONTENT), Compression.GZIP),
+        (zstandard.compress(CONTENT), Compression.ZSTD),
+        (b"", Compression.NONE),
+    ],
+)
+def test_detect_compression(data, expected):
+    file = io.BytesIO(data)
+
+    assert detect_compression(file) == expected
+    assert file.tell() == 0
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, zstandard.compress])
+def test_decompressed_inflates_compressed_files(compress):
+    with decompressed(io.BytesIO(compress(CONTENT)), 10**6, 100) as file:
+        assert file.read() == CONTENT
+
+
+def test_decompressed_passes_through_uncompressed_files():
+    original = io.BytesIO(CONTENT)
+
+    with decompressed(original, 10**6, 100) as file:
+        assert file is original
+
+
+def test_decompressed_reads_concatenated_gzip_members():
+    data = gzip.compress(CONTENT) + gzip.compress(CONTENT)
+
+    with decompressed(io.BytesIO(data), 10**6, 100) as file:
+        assert file.read() == CONTENT * 2
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, zstandard.compress])
+def test_decompressed_enforces_max_size(compress):
+    with pytest.raises(DecompressionError, match="maximum size"):
+        with decompressed(io.BytesIO(compress(CONTENT)), len(CONTENT) - 1, 100):
+            pass
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, zstandard.compress])
+def test_decompressed_enforces_max_ratio(compress, monkeypatch):
+    monkeypatch.setattr(compression, "RATIO_CHECK_THRESHOLD", 0)
+    bomb = compress(b"\0" * 10 * 1024 * 1024)
+
+    with pytest.raises(DecompressionError, match="compression ratio"):
+        with decompressed(io.BytesIO(bomb), 10**9, 100):
+            pass
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, zstandard.compress])
+def test_decompressed_rejects_truncated_files(compress):
+    data = compress(CONTENT)
+
+    with pytest.raises(DecompressionError, match="corrupt or truncated"):
+        with decompressed(io.BytesIO(data[: len(data) // 2]), 10**6, 100):
+            pass
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+from core.loadtest import (
+    DEFAULT_MIX,
+    Result,
+    parse_mix,
+    percentile,
+    run_load,
+    summarize,
+)
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7.0], 99) == 7.0
+
+
+def test_parse_mix():
+    assert parse_mix("orders_list=3, csv_upload=1") == {
+        "orders_list": 3,
+        "csv_upload": 1,
+    }
+    with pytest.raises(ValueError, match="Unknown scenario"):
+        parse_mix("orders=1")
+    with pytest.raises(ValueError, match="positive weight"):
+        parse_mix("orders_list=0")
+
+
+def test_summarize_groups_results_by_endpoint():
+    results = [Result("orders_list", 200, float(ms)) for ms in range(1, 11)]
+    results.append(Result("csv_upload", 400, 50.0))
+
+    summary = summarize(results, duration=2)
+
+    assert summary["total"]["requests"] == 11
+    assert summary["total"]["errors"] == 1
+    assert summary["endpoints"]["orders_list"] == {
+        "requests": 10,
+        "errors": 0,
+        "throughput_rps": 5.0,
+        "mean_ms": 5.5,
+        "p50_ms": 5.0,
+        "p95_ms": 10.0,
+        "p99_ms": 10.0,
+        "max_ms": 10.0,
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_seeded_mix_runs_without_errors(live_server, tmp_path):
+    context_path = tmp_path / "context.json"
+    call_command("seed_load_test", jobs=2, orders=30, context=context_path)
+    context = json.loads(context_path.read_text())
+
+    assert len(context["jobs"]) == 2
+    assert all(len(order_ids) == 30 for order_ids in context["jobs"].values())
+
+    results = run_load(live_server.url, context, DEFAULT_MIX, concurrency=2, duration=1)
+
+    assert results
+    assert [r for r in results if not r.ok] == []
@@ -0,0 +1,135 @@
+import pytest
+from core.models import (
+    Address,
+    Job,
+    Order,
+    OrderSummary,
+    Package,
+    ShippingProvider,
+)
+from core.services.job_service import JobService
+from core.services.order_import import OrderImporter
+
+
+@pytest.fixture
+def job() -> Job:
+    return Job.objects.create()
+
+
+def _summary(order: Order) -> OrderSummary:
+    return OrderSummary.objects.get(order=order)
+
+
+@pytest.mark.django_db
+def test_saving_an_order_writes_its_summary(job, providers, order_factory):
+    order = order_factory(job, weight=40, provider=providers[1])
+
+    summary = _summary(order)
+    assert summary.job_id == job.id
+    assert summary.sender_first_name == "John"
+    assert summary.to_address_city == "Los Angeles"
+    assert summary.package_weight == 40
+    assert summary.shipping_provider_name == "Pricey"
+    assert summary.phone_number == order.phone_number
+
+
+@pytest.mark.django_db
+def test_batch_updates_refresh_summaries(job, providers, order_factory):
+    orders = [order_factory(job, provider=providers[0]) for _ in range(3)]
+    package = Package.objects.create(length=1, width=2, height=3, weight=99)
+    selected = Order.objects.filter(id__in=[orders[0].id, orders[1].id])
+
+    selected.update_package(package)
+    selected.update_shipping_provider(providers[1])
+
+    assert _summary(orders[0]).package_weight == 99
+    assert _summary(orders[1]).shipping_provider_name == "Pricey"
+    assert _summary(orders[2]).package_weight == 16
+    assert _summary(orders[2]).shipping_provider_name == "Cheap"
+
+
+@pytest.mark.django_db
+def test_editing_related_rows_refreshes_summaries(job, providers, order_factory):
+    order = order_factory(job, provider=providers[0])
+
+    address = Address.objects.get(id=order.to_address_id)
+    address.city = "San Diego"
+    address.save()
+    order.sender.first_name = "Johnny"
+    order.sender.save()
+    provider = ShippingProvider.objects.get(id=providers[0].id)
+    provider.name = "Budget"
+    provider.save()
+
+    summary = _summary(order)
+    assert summary.to_address_city == "San Diego"
+    assert summary.sender_first_name == "Johnny"
+    assert summary.shipping_provider_name == "Budget"
+
+
+@pytest.mark.django_db
+def test_deleting_provider_clears_it_from_summaries(job, providers, order_factory):
+    order = order_factory(job, provider=providers[0])
+
+    providers[0].delete()
+
+    summary = _summary(order)
+    assert summary.shipping_provider_id is None
+    assert summary.shipping_provider_name is None
+
+
+@pytest.mark.django_db
+def test_deleting_orders_deletes_summaries(job, providers, order_factory):
+    order_factory(job)
+    order_factory(job)
+
+    Order.objects.all().delete()
+
+    assert not OrderSummary.objects.exists()
+
+
+@pytest.mark.django_db
+def test_assign_cheapest_providers_refreshes_summaries(job, providers, order_factory):
+    order = order_factory(job, provider=providers[1])
+
+    JobService(job=job).assign_cheapest_providers()
+
+    assert _summary(order).shipping_provider_name == "Cheap"
+
+
+@pytest.mark.django_db
+def test_import_writes_summaries(job, providers):
+    row = {
+        "from_name": "John Doe",
+        "from_address": "123 Main St",
+        "from_address_2": "",
+        "from_city": "New York",
+        "from_state": "NY",
+        "from_zip_code": "10001",
+        "to_name": "Jane Smith",
+        "to_address": "456 Oak Ave",
+        "to_address_2": "",
+        "to_city": "Los Angeles",
+        "to_state": "CA",
+        "to_zip_code": "90001",
+        "sender_first_name": "John",
+        "sender_last_name": "Doe",
+        "recipient_first_name": "Jane",
+        "recipient_last_name": "Smith",
+        "length": 10,
+        "width": 8,
+        "height": 6,
+        "weight": 24,
+        "item_sku": "SKU-1",
+        "phone_number": "+12125551234",
+        "phone_number_2": "",
+        "order_number": "",
+    }
+
+    orders = OrderImporter.for_connection(job, providers[0]).import_rows([row] * 3)
+
+    summaries = OrderSummary.objects.filter(job=job)
+    assert sorted(summaries.values_list("order_id", flat=True)) == sorted(
+        order.id for order in orders
+    )
+    assert {summary.package_weight for summary in summaries} == {24}
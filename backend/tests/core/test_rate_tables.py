@@ -0,0 +1,120 @@
+import os
+
+import polars as pl
+import pytest
+from django.core.exceptions import ValidationError
+
+from core.models import ShippingProvider
+from core.rate_tables import load_rate_table
+
+ZONES = """origin_first,origin_last,destination_first,destination_last,zone
+100,199,900,999,5
+100,199,100,199,2
+"""
+RATES = """max_weight,2,5
+1,8.5,10
+5,9.25,12.50
+"""
+
+
+@pytest.fixture
+def rate_table_dir(settings, tmp_path):
+    settings.RATE_TABLE_DIR = str(tmp_path)
+    (tmp_path / "ground").mkdir()
+    (tmp_path / "ground" / "zones.csv").write_text(ZONES)
+    (tmp_path / "ground" / "rates.csv").write_text(RATES)
+    return tmp_path
+
+
+def _costs(table, rows):
+    frame = pl.DataFrame(rows, schema=["weight", "origin", "destination"], orient="row")
+    return (
+        frame.select(
+            table.cost_cents(pl.col("weight"), pl.col("origin"), pl.col("destination"))
+        )
+        .to_series()
+        .to_list()
+    )
+
+
+def test_cost_by_zone_and_weight_break(rate_table_dir):
+    table = load_rate_table("ground")
+
+    assert _costs(
+        table,
+        [
+            (0.5, "10001", "90001"),
+            (1.0, "10001", "90001"),
+            (1.01, "10001", "90210-1234"),
+            (4.2, "12345", "10001"),
+        ],
+    ) == [1000, 1000, 1250, 925]
+
+
+def test_unpriceable_orders_cost_null(rate_table_dir):
+    table = load_rate_table("ground")
+
+    assert _costs(
+        table,
+        [
+            # Over the heaviest weight break
+            (5.5, "10001", "90001"),
+            # No zone between the prefixes
+            (1.0, "90001", "10001"),
+            # Not a ZIP code
+            (1.0, "", "90001"),
+        ],
+    ) == [None, None, None]
+
+
+def test_tables_are_reloaded_when_changed(rate_table_dir):
+    first = load_rate_table("ground")
+    assert load_rate_table("ground") is first
+
+    rates = rate_table_dir / "ground" / "rates.csv"
+    rates.write_text(RATES.replace("8.5", "7"))
+    stat = rates.stat()
+    os.utime(rates, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert _costs(load_rate_table("ground"), [(1.0, "10001", "10001")]) == [700]
+
+
+@pytest.mark.parametrize(
+    "name,files",
+    [
+        ("missing", {}),
+        ("../ground", {}),
+        ("bad_weights", {"rates.csv": "max_weight,2\n5,1\n1,2\n"}),
+        ("bad_zones", {"rates.csv": "max_weight,zone2\n1,2\n"}),
+        ("bad_prefixes", {"zones.csv": ZONES + "0,1000,0,1,2\n"}),
+    ],
+)
+def test_invalid_tables_are_rejected(rate_table_dir, name, files):
+    if files:
+        (rate_table_dir / name).mkdir()
+        for file_name, content in {
+            "zones.csv": ZONES,
+            "rates.csv": RATES,
+            **files,
+        }.items():
+            (rate_table_dir / name / file_name).write_text(content)
+
+    with pytest.raises(ValueError):
+        load_rate_table(name)
+
+
+def test_bundled_example_table_loads():
+    table = load_rate_table("example")
+
+    assert table.zone_count == 7
+    assert table.zones.null_count() == 0
+
+
+@pytest.mark.django_db
+def test_provider_rate_table_is_validated(rate_table_dir):
+    provider = ShippingProvider(name="Zoned", cost_per_pound="0", rate_table="ground")
+    provider.full_clean()
+
+    provider.rate_table = "missing"
+    with pytest.raises(ValidationError):
+        provider.full_clean()
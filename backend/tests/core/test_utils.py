@@ -1,6 +1,6 @@
 import pytest
 
-from core.utils import lbs_oz_to_oz
+from core.utils import lbs_oz_to_oz, parse_phone_number
 
 
 class TestLbsOzToOz:
@@ -26,3 +26,19 @@ class TestLbsOzToOz:
         assert lbs_oz_to_oz() == 0
         assert lbs_oz_to_oz(lbs=1) == 16
         assert lbs_oz_to_oz(oz=8) == 8
+
+
+class TestParsePhoneNumber:
+    def test_parses_valid_numbers(self):
+        phone_number = parse_phone_number("(212) 555-1234", "US")
+        assert phone_number.as_e164 == "+12125551234"
+        assert parse_phone_number("+44 20 7946 0958").as_e164 == "+442079460958"
+
+    @pytest.mark.parametrize("value", ["555-1234", "not a number", "+1"])
+    def test_returns_none_for_invalid_numbers(self, value):
+        assert parse_phone_number(value, "US") is None
+
+    def test_results_are_cached(self):
+        assert parse_phone_number("212-555-0199", "US") is parse_phone_number(
+            "212-555-0199", "US"
+        )
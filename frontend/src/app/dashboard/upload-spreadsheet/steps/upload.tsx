@@ -17,12 +17,19 @@ import { useMultiPageFormContext } from "@/components/dashboard/multi-page-form"
 import { getErrorInfo } from "@/lib/errors";
 import { TbArrowLeft, TbArrowRight } from "react-icons/tb";
 
+const CSV_EXTENSIONS = [".csv", ".csv.gz", ".csv.zst"];
+
 const uploadFormSchema = z.object({
   file: z
     .instanceof(File, { message: "Please select a file" })
-    .refine((file) => file.type === "text/csv" || file.name.endsWith(".csv"), {
-      message: "File must be a CSV",
-    })
+    .refine(
+      (file) =>
+        file.type === "text/csv" ||
+        CSV_EXTENSIONS.some((extension) => file.name.endsWith(extension)),
+      {
+        message: "File must be a CSV (optionally gzip or zstd compressed)",
+      },
+    )
     .refine((file) => file.size <= 10 * 1024 * 1024, {
       message: "File size must be less than 10MB",
     }),
@@ -84,7 +91,7 @@ export const Upload = () => {
                 <FormItem>
                   <FormControl>
                     <FileUpload
-                      accept="text/csv,.csv"
+                      accept={["text/csv", ...CSV_EXTENSIONS].join(",")}
                       value={field.value || null}
                       onChange={(file) => field.onChange(file)}
                       disabled={isPending}